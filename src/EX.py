@@ -1,26 +1,124 @@
 from assassyn.frontend import *
-from .utils import BranchType, ExCtrlSignals,MemOp, MemCtrlSignals, WbCtrlSignals
+from .utils import ALUOp, BranchType, MemOp, ExCtrlFormat, MemCtrlFormat, Lane1ExFormat, Lane1Signals, debug_log, trace_log
+from .utils import redirect_word, redirect_valid
+from .trace import REDIRECT_FORMAT
+from .perf import trace_cycle
+
+def alu(alu_op, alu_op1, alu_op2, csr_value):
+    op1_signed = alu_op1.bitcast(Int(32))
+    op2_signed = alu_op2.bitcast(Int(32))
+
+    add_res = (op1_signed + op2_signed).bitcast(Bits(32))
+    sub_res = (op1_signed - op2_signed).bitcast(Bits(32))
+    and_res = alu_op1 & alu_op2
+    or_res = alu_op1 | alu_op2
+    xor_res = alu_op1 ^ alu_op2
+    sll_res = alu_op1 << alu_op2[0:4]
+    srl_res = alu_op1 >> alu_op2[0:4]
+    sra_res = (op1_signed >> alu_op2[0:4]).bitcast(Bits(32))
+    slt_res = (op1_signed < op2_signed).bitcast(Bits(32))
+    sltu_res = (alu_op1 < alu_op2).bitcast(Bits(32))
+
+    return alu_op.select1hot(
+        add_res,
+        sub_res,
+        sll_res,
+        slt_res,
+        sltu_res,
+        xor_res,
+        srl_res,
+        sra_res,
+        or_res,
+        and_res,
+        alu_op2,
+        alu_op2,
+        Bits(32)(0), # MDU 的结果由 MulDivUnit 在完成时给出
+        csr_value,
+    )
+
+def resolve_branch(branch_type, alu_res, pc, rs1, imm, predicted_pc):
+    # 返回 (is_branch, is_jalr, is_taken, calc_target, next_pc)，非跳转指令的 next_pc 即预测值
+    # jal 和 jalr 计算跳转地址
+    is_jalr = branch_type == BranchType.JALR
+    is_jal = branch_type == BranchType.JAL
+    target_base = is_jalr.select(rs1, pc)
+
+    imm_signed = imm.bitcast(Int(32))
+    target_base_signed = target_base.bitcast(Int(32))
+    raw_calc_target = (target_base_signed + imm_signed).bitcast(Bits(32))
+    calc_target = is_jalr.select(
+        concat(raw_calc_target[1:31], Bits(1)(0)),
+        raw_calc_target
+    )
+
+    # branch
+    is_branch = branch_type != BranchType.NONE
+
+    is_eq = alu_res == Bits(32)(0)
+    is_lt = alu_res[0:0] == Bits(1)(1)
+
+    is_taken_eq = (BranchType.BEQ == branch_type) & is_eq
+    is_taken_ne = (BranchType.BNE == branch_type) & (~is_eq)
+    is_taken_lt = (BranchType.BLT == branch_type) & is_lt
+    is_taken_ge = (BranchType.BGE == branch_type) & (~is_lt)
+    is_taken_ltu = (BranchType.BLTU == branch_type) & is_lt
+    is_taken_geu = (BranchType.BGEU == branch_type) & (~is_lt)
+
+    is_taken = is_branch & (
+        is_taken_eq |
+        is_taken_ne |
+        is_taken_lt |
+        is_taken_ge |
+        is_taken_ltu |
+        is_taken_geu |
+        is_jal |
+        is_jalr
+    )
+
+    next_pc = is_branch.select(
+        is_taken.select(
+            calc_target,
+            (pc.bitcast(UInt(32)) + Bits(32)(4)).bitcast(Bits(32))
+        ),
+        predicted_pc
+    )
+    return is_branch, is_jalr, is_taken, calc_target, next_pc
 
 class Executor(Module):
-    def __init__(self):
-        super().__init__(
-            ports={
-                "ctrl": Port(ExCtrlSignals),
-                "pc": Port(Bits(32)),
-                "rs1": Port(Bits(32)),
-                "rs2": Port(Bits(32)),
-                "imm": Port(Bits(32))
-            }
-        )
+    def __init__(self, dual_issue=False, compact=False):
+        # compact=True 时级间记录使用紧凑编码（见 utils.StageRecord）
+        ports = {
+            "ctrl": Port(ExCtrlFormat.record(compact)),
+            "pc": Port(Bits(32)),
+            "rs1": Port(Bits(32)),
+            "rs2": Port(Bits(32)),
+            "imm": Port(Bits(32))
+        }
+        # 双发射时 lane 1 的指令与 lane 0 一同到达，由第二个 ALU 执行
+        if dual_issue:
+            ports["lane1"] = Port(Lane1ExFormat.record(compact))
+        super().__init__(ports=ports)
+        self.dual_issue = dual_issue
+        self.compact = compact
 
     @module.combinational
     def build(
         self,
         memory_access: Module,
-        branch_target: RegArray
+        branch_target: RegArray,
+        muldiv,                     # MulDivUnit，RV32M 乘除法
+        predictor = None,
+        dcache = None,              # 数据 cache（DCache），未命中的访存指令作废并重新取指
+        perf = None,                # 性能计数器（PerfCounters），csrr 读取
     ):
-        ctrl, pc, rs1, rs2, imm = self.pop_all_ports(True)
-        log("Input: pc={}, rs1={}, rs2={}, imm={}", pc, rs1, rs2, imm)
+        if self.dual_issue:
+            ctrl, pc, rs1, rs2, imm, lane1 = self.pop_all_ports(True)
+        else:
+            ctrl, pc, rs1, rs2, imm = self.pop_all_ports(True)
+        ctrl = ExCtrlFormat.view(ctrl, self.compact)
+        if self.dual_issue:
+            lane1 = Lane1ExFormat.view(lane1, self.compact)
+        debug_log("Input: pc={}, rs1={}, rs2={}, imm={}", pc, rs1, rs2, imm)
 
         alu_op1 = ctrl.op1_type.select1hot(
             rs1, pc, Bits(32)(0)
@@ -29,123 +127,130 @@ class Executor(Module):
             rs2, imm, Bits(32)(4)
         )
 
-        log("op1_type={}, op2_type={}, alu_op1=0x{:x}, alu_op2=0x{:x}", ctrl.op1_type, ctrl.op2_type, alu_op1, alu_op2)
-
-        op1_signed = alu_op1.bitcast(Int(32))
-        op2_signed = alu_op2.bitcast(Int(32))
-
-        add_res = (op1_signed + op2_signed).bitcast(Bits(32))
-        sub_res = (op1_signed - op2_signed).bitcast(Bits(32))
-        and_res = alu_op1 & alu_op2
-        or_res = alu_op1 | alu_op2
-        xor_res = alu_op1 ^ alu_op2
-        sll_res = alu_op1 << alu_op2[0:4]
-        srl_res = alu_op1 >> alu_op2[0:4]
-        sra_res = (op1_signed >> alu_op2[0:4]).bitcast(Bits(32))
-        slt_res = (op1_signed < op2_signed).bitcast(Bits(32))
-        sltu_res = (alu_op1 < alu_op2).bitcast(Bits(32))
-
-        alu_res = ctrl.alu_op.select1hot(
-            add_res,
-            sub_res,
-            sll_res,
-            slt_res,
-            sltu_res,
-            xor_res,
-            srl_res,
-            sra_res,
-            or_res,
-            and_res,
-            alu_op2,
-            alu_op2,
-        )
+        debug_log("op1_type={}, op2_type={}, alu_op1=0x{:x}, alu_op2=0x{:x}", ctrl.op1_type, ctrl.op2_type, alu_op1, alu_op2)
 
-        log("ALU Result: {}", alu_res)
-    
-        # jal 和 jalr 计算跳转地址
-        is_jalr = ctrl.branch_type == BranchType.JALR
-        is_jal = ctrl.branch_type == BranchType.JAL
-        target_base = is_jalr.select(rs1, pc)
-
-        imm_signed = imm.bitcast(Int(32))
-        target_base_signed = target_base.bitcast(Int(32))
-        raw_calc_target = (target_base_signed + imm_signed).bitcast(Bits(32))
-        calc_target = is_jalr.select(
-            concat(raw_calc_target[1:31], Bits(1)(0)),
-            raw_calc_target
+        alu_res = alu(
+            ctrl.alu_op, alu_op1, alu_op2,
+            perf.read(imm[0:11]) if perf is not None else Bits(32)(0),
         )
 
-        # branch
-        is_taken = Bits(1)(0)
-        is_branch = ctrl.branch_type != BranchType.NONE
-
-        is_eq = alu_res == Bits(32)(0)
-        is_lt = alu_res[0:0] == Bits(1)(1)
-
-        is_taken_eq = (BranchType.BEQ == ctrl.branch_type) & is_eq
-        is_taken_ne = (BranchType.BNE == ctrl.branch_type) & (~is_eq)
-        is_taken_lt = (BranchType.BLT == ctrl.branch_type) & is_lt
-        is_taken_ge = (BranchType.BGE == ctrl.branch_type) & (~is_lt)
-        is_taken_ltu = (BranchType.BLTU == ctrl.branch_type) & is_lt
-        is_taken_geu = (BranchType.BGEU == ctrl.branch_type) & (~is_lt)
-
-        is_taken = is_branch & (
-            is_taken_eq |
-            is_taken_ne |
-            is_taken_lt |
-            is_taken_ge |
-            is_taken_ltu |
-            is_taken_geu |
-            is_jal |
-            is_jalr
+        debug_log("ALU Result: {}", alu_res)
+    
+        is_branch, is_jalr, is_taken, calc_target, next_pc = resolve_branch(
+            ctrl.branch_type, alu_res, pc, rs1, imm, ctrl.predicted_pc,
         )
 
-        is_flush = branch_target[0] != Bits(32)(0)
-        next_pc = is_flush.select(
-            Bits(32)(0),
-            is_branch.select(
-                is_taken.select(
-                    calc_target,
-                    (pc.bitcast(UInt(32)) + Bits(32)(4)).bitcast(Bits(32))
-                ),
-                ctrl.predicted_pc
-            )
-        )
+        is_flush = redirect_valid(branch_target[0])
+        next_pc = is_flush.select(Bits(32)(0), next_pc)
 
         branch_miss = next_pc != ctrl.predicted_pc
-        branch_target[0] = branch_miss.select(
-            next_pc,
-            Bits(32)(0)
+
+        with Condition(branch_miss & ~is_flush):
+            debug_log("EX: Branch mispredict at PC=0x{:x}, predicted=0x{:x}, actual=0x{:x}", pc, ctrl.predicted_pc, next_pc)
+
+        # 条件分支与 jal 在解析后训练预测器，jalr 目标不固定，不写入 BTB
+        if predictor is not None:
+            with Condition(is_branch & ~is_jalr & ~is_flush):
+                predictor.update(pc, is_taken, calc_target)
+
+        # 数据 cache 未命中：作废本条访存指令，从它的 pc 重新取指，等缺失处理完成后重放
+        dc_replay = Bits(1)(0)
+        if dcache is not None:
+            dc_replay = (ctrl.mem_op != MemOp.NONE) & ~is_flush & ~dcache.hit(alu_res)
+            with Condition(dc_replay):
+                debug_log("EX: DCache miss, replay PC=0x{:x}", pc)
+
+        # 本拍重定向取指：ID 中的指令在错误路径上，DecoderImpl 据此不更新返回地址栈
+        redirect = (branch_miss & ~is_flush) | dc_replay
+        with Condition(redirect):
+            trace_log(REDIRECT_FORMAT, trace_cycle(perf), pc, dc_replay)
+
+        # 重放的目标为本条指令的 pc，可能为 0，由有效位区分
+        branch_target[0] = redirect_word(redirect, dc_replay.select(pc, next_pc))
+
+        # 乘除法：启动当拍指令以 rd=0 流下去，完成当拍把结果和 rd 插入到 EX 的气泡中
+        md_start = (ctrl.alu_op == ALUOp.MDU) & ~is_flush
+        md_done, md_rd, md_result, md_stall = muldiv.build(
+            start = md_start,
+            op = ctrl.md_op,
+            rs1 = alu_op1,
+            rs2 = alu_op2,
+            rd = ctrl.rd,
         )
+        alu_res = md_done.select(md_result, alu_res)
+
+        # 乘除法完成当拍提交的是启动时的那条指令，记下它的 pc / 指令字供提交记录使用
+        md_pc = RegArray(Bits(32), 1, initializer=[0])
+        md_inst = RegArray(Bits(32), 1, initializer=[0])
+        with Condition(md_start):
+            md_pc[0] <= pc
+            md_inst[0] <= ctrl.inst
 
-        rd = is_flush.select(
+        rd = (is_flush | md_start | dc_replay).select(
             Bits(5)(0),
             ctrl.rd
         )
-        is_halt = is_flush.select(
+        rd = md_done.select(md_rd, rd)
+        # 停机 store（0xFE000FA3）也可能在 DCache 中未命中而重放：重放时不能把停机传给 MEM / WB，
+        # 但 MemoryUser 仍要认出它，不对 0xFFFFFFFF 做越界检查，因此返回未经重放屏蔽的 ex_halt
+        ex_halt = is_flush.select(
             Bits(1)(0),
             ctrl.is_halt
         )
+        is_halt = ex_halt & ~dc_replay
         mem_opcode = is_flush.select(
             MemOp.NONE,
             ctrl.mem_op
         )
+        # MemoryUser 仍需看到未命中的访存以启动缺失处理，MEM/WB 则收到气泡
+        mem_req = mem_opcode
+        mem_opcode = dc_replay.select(MemOp.NONE, mem_opcode)
 
-        mem_ctrl = MemCtrlSignals.bundle(
+        # 真正执行完的指令：气泡（含取指为 0 换成的占位 NOP）、被冲刷 / 重放的指令以及乘除法启动当拍都不算，乘除法在完成当拍计入
+        retire = (ctrl.valid & ~is_flush & ~dc_replay & ~md_start) | md_done
+
+        mem_ctrl = MemCtrlFormat.bundle(
+            self.compact,
             mem_op = mem_opcode,
             mem_width = ctrl.mem_width,
             mem_sign = ctrl.mem_sign,
             rd = rd,
-            is_halt = is_halt
+            is_halt = is_halt,
+            retire = retire,
+            pc = md_done.select(md_pc[0], pc),
+            inst = md_done.select(md_inst[0], ctrl.inst),
         )
 
-        memory_access.async_called(ctrl = mem_ctrl, alu_result = alu_res)
+        if self.dual_issue:
+            # lane 1 只有 ALU 指令，随 lane 0 一起被冲刷；lane 0 的访存重放时 lane 1 也从头重新取指
+            lane1_op1 = lane1.op1_type.select1hot(lane1.rs1_data, lane1.pc, Bits(32)(0))
+            lane1_op2 = lane1.op2_type.select1hot(lane1.rs2_data, lane1.imm, Bits(32)(4))
+            alu_res1 = alu(lane1.alu_op, lane1_op1, lane1_op2, Bits(32)(0))
+            retire1 = lane1.valid & ~is_flush & ~dc_replay
+            rd1 = retire1.select(lane1.rd, Bits(5)(0))
+            debug_log("EX: Lane1 pc=0x{:x}, rd={}, result=0x{:x}, retire={}", lane1.pc, rd1, alu_res1, retire1)
+            lane1_ctrl = Lane1Signals.bundle(
+                rd = rd1,
+                retire = retire1,
+                pc = lane1.pc,
+                inst = lane1.inst,
+            )
+            memory_access.async_called(ctrl = mem_ctrl, alu_result = alu_res, lane1 = lane1_ctrl, data1 = alu_res1)
+        else:
+            memory_access.async_called(ctrl = mem_ctrl, alu_result = alu_res)
+
+        is_store = mem_req == MemOp.STORE
+        is_load = mem_req == MemOp.LOAD
 
-        is_store = mem_opcode == MemOp.STORE
-        is_load = mem_opcode == MemOp.LOAD
+        debug_log("Memory Access: is_load={}, is_store={}, mem_width={}", is_load, is_store, ctrl.mem_width)
 
-        log("Memory Access: is_load={}, is_store={}, mem_width={}", is_load, is_store, ctrl.mem_width)
+        if perf is not None:
+            perf.count("branch_mispredict", branch_miss & ~is_flush)
+            perf.count("load", mem_opcode == MemOp.LOAD)
+            perf.count("store", mem_opcode == MemOp.STORE)
 
         mem_width = ctrl.mem_width
 
-        return rd, alu_res, is_store, is_load, mem_width, rs2
+        if self.dual_issue:
+            return rd, alu_res, is_store, is_load, mem_width, rs2, md_stall, ex_halt, redirect, (rd1, alu_res1)
+        return rd, alu_res, is_store, is_load, mem_width, rs2, md_stall, ex_halt, redirect
@@ -1,5 +1,9 @@
 from assassyn.frontend import *
+from .utils import debug_log, profile_log, redirect_valid
 from .instructions import *
+from .trace import PIPE_FORMAT
+from .perf import trace_cycle
+from .predecode import PREDECODE_WIDTH, INST_SLICE, IMM_SLICE, CTRL_SLICE, CTI_BIT, NOP_WORD, NOP_INST
 
 # 从指令中提取立即数
 def get_imm(inst):
@@ -14,6 +18,63 @@ def get_imm(inst):
     imm_j = concat(pad_bits_11, inst[31:31], inst[12:19], inst[20:20], inst[21:30], Bits(1)(0))
     return imm_i, imm_s, imm_b, imm_u, imm_j
 
+def _const(leaf, width):
+    return Bits(width)(leaf) if isinstance(leaf, int) else leaf
+
+# 以 index_bits（低位在前）为下标在 leaves 中选择，生成深度为下标位数的选择树
+# 两半是相同常量时直接合并，不生成选择器
+def table_lookup(index_bits, leaves, width):
+    if len(leaves) == 1:
+        return leaves[0]
+    half = len(leaves) // 2
+    lo = table_lookup(index_bits[:-1], leaves[:half], width)
+    hi = table_lookup(index_bits[:-1], leaves[half:], width)
+    if isinstance(lo, int) and isinstance(hi, int) and lo == hi:
+        return lo
+    return index_bits[-1].select(_const(hi, width), _const(lo, width))
+
+# 按 decode_table 查出控制字：第一级 opcode[6:2]，第二级 funct3 / funct7 的区分位
+# 译码深度只取决于下标位数，不随 instruction_table 的条目数增长
+def decode_control_word(instruction):
+    funct7 = instruction[25:31]
+    f3_bits = [instruction[i:i] for i in range(12, 15)]
+    groups = [0] * 32
+    for major, group in decode_table.items():
+        index = (f3_bits if group.use_funct3 else []) + [instruction[25 + b:25 + b] for b in group.f7_bits]
+        word = table_lookup(index, group.words, CTRL_WIDTH)
+        strict = table_lookup(index, group.strict, 1)
+        if not isinstance(strict, int) or strict:
+            # 检查 funct7 的指令，funct7 中不参与索引的位也必须匹配
+            rest_ok = (funct7 & Bits(7)(group.f7_mask)) == Bits(7)(group.f7_rest)
+            if not isinstance(strict, int):
+                rest_ok = strict.select(rest_ok, Bits(1)(1))
+            word = rest_ok.select(_const(word, CTRL_WIDTH), Bits(CTRL_WIDTH)(0))
+        groups[major] = word
+    word = table_lookup([instruction[i:i] for i in range(2, 7)], groups, CTRL_WIDTH)
+    return (instruction[0:1] == Bits(2)(0b11)).select(_const(word, CTRL_WIDTH), Bits(CTRL_WIDTH)(0))
+
+# 按 decode_table 译码一条指令，双发射时两个槽各用一份
+def decode_fields(instruction):
+    imm_i, imm_s, imm_b, imm_u, imm_j = get_imm(instruction)
+
+    word = decode_control_word(instruction)
+    field = {name: word[lo:hi] for name, (lo, hi) in CTRL_SLICES.items()}
+    imm_type = field['imm_type']
+
+    imm = imm_type.select1hot(Bits(32)(0), imm_i, imm_s, imm_b, imm_u, imm_j)
+    return field['alu_op'], imm_type, field['op1_type'], field['op2_type'], field['branch_type'], \
+        field['mem_op'], field['mem_width'], field['mem_sign'], field['if_wb'], imm
+
+# 预译码宽字中直接取出控制字与立即数，返回值与 decode_fields 相同
+def predecoded_fields(word):
+    ctrl = word[CTRL_SLICE[0]:CTRL_SLICE[1]]
+    field = {name: ctrl[lo:hi] for name, (lo, hi) in CTRL_SLICES.items()}
+    return field['alu_op'], field['imm_type'], field['op1_type'], field['op2_type'], field['branch_type'], \
+        field['mem_op'], field['mem_width'], field['mem_sign'], field['if_wb'], word[IMM_SLICE[0]:IMM_SLICE[1]]
+
+def is_halt(instruction):
+    return (instruction == Bits(32)(0x00000073)) | (instruction == Bits(32)(0x00100073)) | (instruction == Bits(32)(0xFE000FA3))
+
 class Decoder(Module):
     def __init__(self):
         super().__init__(
@@ -25,23 +86,37 @@ class Decoder(Module):
         )
     
     @module.combinational
-    def build(self, icache_dout: Array, reg_file: Array):
-        log("Decoder!")
+    def build(
+        self,
+        icache_dout: Array,
+        reg_file: Array,
+        ras = None,                 # 返回地址栈（ReturnAddressStack），为 None 时不预测返回
+        early_jump: bool = False,   # jal 在 ID 阶段直接重定向取指
+        static_branch: bool = False,# 条件分支静态预测：向后跳转预测为跳转（BTFN）
+        icache1_dout: Array = None, # 双发射：第二个指令存储体读出的 pc+4 处的指令
+        predecode: bool = False,    # 指令存储器中为预译码的宽字（见 predecode.py）
+    ):
+        debug_log("Decoder!")
         pc_addr, next_pc_addr, is_stall = self.pop_all_ports(False)
-        icache_instruction = icache_dout[0].bitcast(Bits(32))
-        last_inst_reg = RegArray(Bits(32), 1, initializer=[0])
+        fetch_width = PREDECODE_WIDTH if predecode else 32
+        icache_instruction = icache_dout[0].bitcast(Bits(fetch_width))
+        last_inst_reg = RegArray(Bits(fetch_width), 1, initializer=[0])
         #真正要处理的指令，默认先保持不动
-        instruction = (is_stall == Bits(1)(0)).select(icache_instruction, last_inst_reg[0])
+        fetched = (is_stall == Bits(1)(0)).select(icache_instruction, last_inst_reg[0])
         #如果需要修改instruction，即不bubble，就需要修改last_inst_reg和instruction
         with Condition(is_stall == Bits(1)(0)):
             last_inst_reg[0] <= icache_instruction
         
         #第一条指令PC不是有效地址，输出是0，但是这不是合法RISC-V指令，需要转成NOP：addi x0, x0, 0
-        instruction = (instruction == Bits(32)(0)).select(Bits(32)(0x00000013), instruction)
+        #这样换进来的占位 NOP（含 ICache 缺失时读出的 0）不是真正的指令，valid 为 0，EX 不计入退休
+        valid = fetched != Bits(fetch_width)(0)
+        nop = NOP_WORD if predecode else NOP_INST
+        fetched = (fetched == Bits(fetch_width)(0)).select(Bits(fetch_width)(nop), fetched)
+        instruction = fetched[INST_SLICE[0]:INST_SLICE[1]] if predecode else fetched
         
-        log("ID: Fetching Instruction=0x{:x} at PC=0x{:x}", instruction, pc_addr)
+        debug_log("ID: Fetching Instruction=0x{:x} at PC=0x{:x}", instruction, pc_addr)
 
-        is_halt_inst = ((instruction == Bits(32)(0x00000073)) | (instruction == Bits(32)(0x00100073)) | (instruction == Bits(32)(0xFE000FA3)))
+        is_halt_inst = is_halt(instruction)
 
         with Condition(is_halt_inst == Bits(1)(1)):
             log("ID : HALT INSTRUCTION")
@@ -51,59 +126,83 @@ class Decoder(Module):
         funct3 = instruction[12:14]
         rs1 = instruction[15:19]
         rs2 = instruction[20:24]
-        bit30 = instruction[30:30]
-        imm_i, imm_s, imm_b, imm_u, imm_j = get_imm(instruction)
-
-        match = Bits(1)(0)
-
-        alu_op = Bits(12)(0)
-        imm_type = Bits(6)(0)
-        op1_type = Bits(3)(0)
-        op2_type = Bits(3)(0)
-        branch_type = Bits(9)(0)
-        mem_op = Bits(3)(0)
-        mem_width = Bits(3)(0)
-        mem_sign = Bits(1)(0)
-        if_wb = Bits(2)(0)
-        imm = Bits(32)(0)
-
-        for inst_entry in instruction_table:
-            match = opcode == inst_entry[1]
-            if inst_entry[2] is not None:
-                match &= funct3 == Bits(3)(inst_entry[2])
-            if inst_entry[3] is not None:
-                match &= bit30 == Bits(1)(inst_entry[3])
-            alu_op |= match.select(inst_entry[4], Bits(12)(0))
-            imm_type |= match.select(inst_entry[-1], Bits(6)(0))
-            op1_type |= match.select(inst_entry[5], Bits(3)(0))
-            op2_type |= match.select(inst_entry[6], Bits(3)(0))
-            branch_type |= match.select(inst_entry[-2], Bits(9)(0))
-            mem_op |= match.select(inst_entry[7], Bits(3)(0))
-            mem_width |= match.select(inst_entry[8], Bits(3)(0))
-            mem_sign |= match.select(inst_entry[9], Bits(1)(0))
-            if_wb |= match.select(inst_entry[-3], Bits(2)(0))
+        if predecode:
+            # 立即数已按指令格式选好，ID 阶段预测只在对应格式的指令上使用它
+            alu_op, imm_type, op1_type, op2_type, branch_type, mem_op, mem_width, mem_sign, if_wb, imm = \
+                predecoded_fields(fetched)
+            imm_i = imm_b = imm_j = imm
+        else:
+            imm_i, imm_s, imm_b, imm_u, imm_j = get_imm(instruction)
+            alu_op, imm_type, op1_type, op2_type, branch_type, mem_op, mem_width, mem_sign, if_wb, imm = \
+                decode_fields(instruction)
 
         with Condition(imm_type == Bits(6)(0)):
             log("ID: Unknown instruction 0x{:x} at PC=0x{:x}, treat as NOP", instruction, pc_addr)
             finish()
-            
-        imm = imm_type.select1hot(Bits(32)(0), imm_i, imm_s, imm_b, imm_u, imm_j)
+
         rs1_data = reg_file[rs1]
         rs2_data = reg_file[rs2]
 
-        log("ID: rs1=x{}, rs1_data=0x{:x}, rs2=x{}, rs2_data=0x{:x}, if_wb={}", rs1, rs1_data, rs2, rs2_data, if_wb)
+        debug_log("ID: rs1=x{}, rs1_data=0x{:x}, rs2=x{}, rs2_data=0x{:x}, if_wb={}", rs1, rs1_data, rs2, rs2_data, if_wb)
 
         rd2 = (if_wb == IF_WB.YES).select(rd, Bits(5)(0))
         
-        log("rd={}", rd2)
+        debug_log("rd={}", rd2)
+
+        is_jal = branch_type == BranchType.JAL
+        is_jalr = branch_type == BranchType.JALR
+        # 预译码时用宽字中的分支 / 跳转标志识别条件分支，不再比较 opcode
+        is_cond_branch = (fetched[CTI_BIT:CTI_BIT] & ~is_jal & ~is_jalr) if predecode else (opcode == OP_BRANCH)
+
+        # ID 阶段的预测：predicted_pc 与 IF 给出的 next_pc 不同时需要重定向取指
+        # 未启用任何 ID 阶段预测时 id_redirect 为 None，IF 不接这条通路
+        predicted_pc = next_pc_addr
+        id_redirect = None
+        ras_push = Bits(1)(0)
+        ras_pop = Bits(1)(0)
+
+        if ras is not None:
+            # jal/jalr 且 rd=ra 视为调用；jalr x0, 0(ra) 视为返回，用栈顶作为预测目标
+            ras_push = (is_jal | is_jalr) & (rd == Bits(5)(1))
+            ras_pop = is_jalr & (rd == Bits(5)(0)) & (rs1 == Bits(5)(1)) & (imm_i == Bits(32)(0))
+            predicted_pc = ras_pop.select(ras.top(), predicted_pc)
+            id_redirect = ras_pop
+
+        if early_jump:
+            # jal 的目标只依赖 pc 和 imm_j，译码时即可算出，不必等 EX 计算 calc_target
+            jal_target = (pc_addr.bitcast(Int(32)) + imm_j.bitcast(Int(32))).bitcast(Bits(32))
+            predicted_pc = is_jal.select(jal_target, predicted_pc)
+            id_redirect = is_jal if id_redirect is None else (id_redirect | is_jal)
+
+        if static_branch:
+            # IF 没有给出跳转预测时，向后的条件分支（通常是循环）预测为跳转，由 EX 照常验证
+            fallthrough = (pc_addr.bitcast(UInt(32)) + UInt(32)(4)).bitcast(Bits(32))
+            branch_target = (pc_addr.bitcast(Int(32)) + imm_b.bitcast(Int(32))).bitcast(Bits(32))
+            is_backward = is_cond_branch & (imm_b[31:31] == Bits(1)(1)) & (next_pc_addr == fallthrough)
+            predicted_pc = is_backward.select(branch_target, predicted_pc)
+            id_redirect = is_backward if id_redirect is None else (id_redirect | is_backward)
+
+        lane1 = None
+        if icache1_dout is not None:
+            assert id_redirect is None, "dual issue does not support ID-stage prediction"
+            lane1, rs1b, rs2b, predicted_pc, id_redirect = self.decode_lane1(
+                icache1_dout, reg_file, is_stall, pc_addr, next_pc_addr, instruction,
+                alu_op, branch_type, imm_type, is_halt_inst, rd2, valid,
+            )
+
+        if id_redirect is not None:
+            with Condition(id_redirect):
+                debug_log("ID: Redirect to 0x{:x} at PC=0x{:x}", predicted_pc, pc_addr)
 
         ctrl = DecoderSignals.bundle(
+            valid = valid,
             alu_op = alu_op,
+            md_op = funct3,
             branch_type = branch_type,
             op1_type = op1_type,
             op2_type = op2_type,
             cur_pc = pc_addr,
-            predicted_pc = next_pc_addr,
+            predicted_pc = predicted_pc,
             mem_op = mem_op,
             mem_width = mem_width,
             mem_sign = mem_sign,
@@ -112,9 +211,73 @@ class Decoder(Module):
             rs1_data = rs1_data,
             rs2_data = rs2_data,
             imm = imm,
+            ras_push = ras_push,
+            ras_pop = ras_pop,
+            inst = instruction,
         )
 
-        return ctrl, rs1, rs2
+        if lane1 is not None:
+            return ctrl, rs1, rs2, id_redirect, predicted_pc, (lane1, rs1b, rs2b)
+        return ctrl, rs1, rs2, id_redirect, predicted_pc
+
+    def decode_lane1(
+        self, icache1_dout, reg_file, is_stall, pc_addr, next_pc_addr, instruction,
+        alu_op, branch_type, imm_type, is_halt_inst, rd, valid,
+    ):
+        # 双发射的第二个译码槽：pc+4 处的指令满足配对条件时与 pc 处的指令一同发射
+        last_inst1_reg = RegArray(Bits(32), 1, initializer=[0])
+        icache1_instruction = icache1_dout[0].bitcast(Bits(32))
+        instruction1 = (is_stall == Bits(1)(0)).select(icache1_instruction, last_inst1_reg[0])
+        with Condition(is_stall == Bits(1)(0)):
+            last_inst1_reg[0] <= icache1_instruction
+
+        alu_op1, imm_type1, op1_type1, op2_type1, branch_type1, mem_op1, _, _, if_wb1, imm1 = \
+            decode_fields(instruction1)
+
+        # 不用到的源寄存器按 x0 处理，避免 I 型立即数被误判为相关
+        rs1b = (op1_type1 == Op1Type.RS1).select(instruction1[15:19], Bits(5)(0))
+        rs2b = (op2_type1 == Op2Type.RS2).select(instruction1[20:24], Bits(5)(0))
+        rd1 = (if_wb1 == IF_WB.YES).select(instruction1[7:11], Bits(5)(0))
+
+        def is_complex(op):
+            return (op == ALUOp.SYS) | (op == ALUOp.NOP) | (op == ALUOp.MDU) | (op == ALUOp.CSR)
+
+        # 配对条件：
+        #   两条都是取到的真实指令（不是 0 换成的占位 NOP）
+        #   第一条不是跳转 / 分支 / 停机 / 乘除法 / CSR，可以访存
+        #   第二条只能是普通 ALU 指令（R / I 型运算、lui、auipc）
+        #   第二条不读、不写第一条的 rd，且取指按顺序给出了 pc+8
+        slot0_ok = valid & (branch_type == BranchType.NONE) & ~is_complex(alu_op) & ~is_halt_inst & (imm_type != Bits(6)(0))
+        slot1_ok = (instruction1 != Bits(32)(0)) & (branch_type1 == BranchType.NONE) & (mem_op1 == MemOp.NONE) & ~is_complex(alu_op1) & \
+            ~is_halt(instruction1) & (imm_type1 != Bits(6)(0))
+        rd_zero = rd == Bits(5)(0)
+        no_dep = rd_zero | ((rs1b != rd) & (rs2b != rd) & (rd1 != rd))
+        seq_pc = (pc_addr.bitcast(UInt(32)) + UInt(32)(4)).bitcast(Bits(32))
+        pair_pc = (pc_addr.bitcast(UInt(32)) + UInt(32)(8)).bitcast(Bits(32))
+        is_seq = next_pc_addr == pair_pc
+        paired = slot0_ok & slot1_ok & no_dep & is_seq
+
+        # IF 按 pc+8 取指而第二条不能一起发射时，让 IF 改取 pc+4
+        predicted_pc = is_seq.select(seq_pc, next_pc_addr)
+        id_redirect = is_seq & ~paired
+
+        debug_log("ID: Lane1 Instruction=0x{:x} at PC=0x{:x}, paired={}", instruction1, seq_pc, paired)
+
+        lane1 = Lane1ExSignals.bundle(
+            valid = paired,
+            alu_op = alu_op1,
+            op1_type = op1_type1,
+            op2_type = op2_type1,
+            rd = rd1,
+            rs1_data = reg_file[rs1b],
+            rs2_data = reg_file[rs2b],
+            imm = imm1,
+            pc = seq_pc,
+            inst = instruction1,
+        )
+        # 源寄存器同时送往 Bypass 判断 load-use 相关，未配对时置 0，避免不发射的指令引起 stall
+        zero = Bits(5)(0)
+        return lane1, paired.select(rs1b, zero), paired.select(rs2b, zero), predicted_pc, id_redirect
 
 class DecoderImpl(Downstream):
     def __init__(self):
@@ -125,43 +288,105 @@ class DecoderImpl(Downstream):
         self,
         ctrl: Record,
         executor: Module,
-        rs1_ex_type: Bits(4),
+        rs1_ex_type: Bits(4),       # 为 None 时不做旁路（乱序后端）
         rs2_ex_type: Bits(4),
         if_stall: Bits(1),
         ex_bypass: Value,           # EX-MEM 旁路寄存器的数据（上条指令结果）
         mem_bypass: Value,          # MEM-WB 旁路寄存器的数据 (上上条指令结果)
         wb_bypass: Value,           # WB 旁路寄存器的数据 (当前写回数据)
         branch_target_reg: Array,
+        ras = None,
+        ex_redirect: Value = None,  # EX 本拍重定向取指（分支预测失败 / 重放），为 None 时（乱序后端）不检查
+        perf = None,                # 性能计数器（PerfCounters），统计被冲刷的周期
+        lane1 = None,               # 双发射：第二个译码槽的 Lane1ExSignals，此时旁路选择为 7 路的 FwdType
+        rs1b_ex_type: Value = None,
+        rs2b_ex_type: Value = None,
+        ex_bypass1: Value = None,   # lane 1 在 EX / MEM / WB 的结果
+        mem_bypass1: Value = None,
+        wb_bypass1: Value = None,
+        compact: bool = False,      # 发往 EX 的记录使用紧凑编码（需与 Executor 一致）
     ):
-        if_flush = branch_target_reg[0] != Bits(32)(0)
+        if_flush = redirect_valid(branch_target_reg[0])
+        # 乱序后端的 stall 来自 OoOCore（Module），在它尚未执行的周期无效
+        if_stall = if_stall.optional(Bits(1)(0))
         if_nop = if_flush | if_stall
 
+        if perf is not None:
+            perf.count("flush", if_flush)
+
+        profile_log(PIPE_FORMAT, trace_cycle(perf), ctrl.cur_pc, if_stall, if_flush)
+
+        # 返回地址栈只在指令真正进入 EX 时更新，stall 重复译码和被冲刷的指令不更新
+        # if_flush 来自寄存器，晚一拍才生效：EX 本拍重定向时 ID 中的指令已在错误路径上，同样不更新
+        if ras is not None:
+            ras_ok = ~if_nop
+            if ex_redirect is not None:
+                ras_ok = ras_ok & ~ex_redirect.optional(Bits(1)(0))
+            return_addr = (ctrl.cur_pc.bitcast(UInt(32)) + UInt(32)(4)).bitcast(Bits(32))
+            ras.update(
+                push = ctrl.ras_push & ras_ok,
+                pop = ctrl.ras_pop & ras_ok,
+                push_addr = return_addr,
+            )
+
         rd = if_nop.select(Bits(5)(0), ctrl.rd)
         if_halt = if_nop.select(Bits(1)(0), ctrl.is_halt)
         mem_op = if_nop.select(MemOp.NONE, ctrl.mem_op)
         alu_op = if_nop.select(ALUOp.NOP, ctrl.alu_op)
         branch_type = if_nop.select(BranchType.NONE, ctrl.branch_type)
 
-        ex_bypass_val = ex_bypass.optional(Bits(32)(0))
-        mem_bypass_val = mem_bypass.optional(Bits(32)(0))
-        wb_bypass_val = wb_bypass.optional(Bits(32)(0))
+        if rs1_ex_type is not None:
+            ex_bypass_val = ex_bypass.optional(Bits(32)(0))
+            mem_bypass_val = mem_bypass.optional(Bits(32)(0))
+            wb_bypass_val = wb_bypass.optional(Bits(32)(0))
 
-        fwd_from_ex_to_mem = ex_bypass_val
-        fwd_from_mem_to_wb = mem_bypass_val
-        fwd_after_wb = wb_bypass_val
+            fwd_from_ex_to_mem = ex_bypass_val
+            fwd_from_mem_to_wb = mem_bypass_val
+            fwd_after_wb = wb_bypass_val
 
-        rs1_data = rs1_ex_type.select1hot(
-            ctrl.rs1_data, fwd_from_ex_to_mem, fwd_from_mem_to_wb, fwd_after_wb
-        )
+        if rs1_ex_type is None:
+            # 乱序后端在派遣时按重命名表读取操作数，这里不做旁路
+            rs1_data = ctrl.rs1_data
+            rs2_data = ctrl.rs2_data
+        elif lane1 is None:
+            rs1_data = rs1_ex_type.select1hot(
+                ctrl.rs1_data, fwd_from_ex_to_mem, fwd_from_mem_to_wb, fwd_after_wb
+            )
 
-        rs2_data = rs2_ex_type.select1hot(
-            ctrl.rs2_data, fwd_from_ex_to_mem, fwd_from_mem_to_wb, fwd_after_wb
-        )
+            rs2_data = rs2_ex_type.select1hot(
+                ctrl.rs2_data, fwd_from_ex_to_mem, fwd_from_mem_to_wb, fwd_after_wb
+            )
+        else:
+            fwd1 = (
+                ex_bypass1.optional(Bits(32)(0)),
+                mem_bypass1.optional(Bits(32)(0)),
+                wb_bypass1.optional(Bits(32)(0)),
+            )
+            fwd = (fwd_from_ex_to_mem, fwd_from_mem_to_wb, fwd_after_wb) + fwd1
+            rs1_data = rs1_ex_type.select1hot(ctrl.rs1_data, *fwd)
+            rs2_data = rs2_ex_type.select1hot(ctrl.rs2_data, *fwd)
+            lane1_signals = Lane1ExFormat.bundle(
+                compact,
+                valid = lane1.valid & ~if_nop,
+                alu_op = lane1.alu_op,
+                op1_type = lane1.op1_type,
+                op2_type = lane1.op2_type,
+                rd = if_nop.select(Bits(5)(0), lane1.rd),
+                rs1_data = rs1b_ex_type.select1hot(lane1.rs1_data, *fwd),
+                rs2_data = rs2b_ex_type.select1hot(lane1.rs2_data, *fwd),
+                imm = lane1.imm,
+                pc = lane1.pc,
+                inst = lane1.inst,
+            )
 
-        log("DecoderImpl: rs_ex_type={}, rs1_data=0x{:x}, rs_2_ex_type={}, rs2_data=0x{:x}, rd={}", rs1_ex_type, rs1_data, rs2_ex_type, rs2_data, rd)
+        if rs1_ex_type is not None:
+            debug_log("DecoderImpl: rs_ex_type={}, rs1_data=0x{:x}, rs_2_ex_type={}, rs2_data=0x{:x}, rd={}", rs1_ex_type, rs1_data, rs2_ex_type, rs2_data, rd)
 
-        ctrl_signals = ExCtrlSignals.bundle(
+        ctrl_signals = ExCtrlFormat.bundle(
+            compact,
+            valid = ctrl.valid & ~if_nop,
             alu_op = alu_op,
+            md_op = ctrl.md_op,
             branch_type = branch_type,
             op1_type = ctrl.op1_type,
             op2_type = ctrl.op2_type,
@@ -173,12 +398,23 @@ class DecoderImpl(Downstream):
             is_halt = ctrl.is_halt,
             rs1_data = rs1_data,
             rs2_data = rs2_data,
+            inst = ctrl.inst,
         )
 
-        executor.async_called(
-            ctrl = ctrl_signals,
-            pc = ctrl.cur_pc,
-            rs1 = rs1_data,
-            rs2 = rs2_data,
-            imm = ctrl.imm,
-        )
\ No newline at end of file
+        if lane1 is None:
+            executor.async_called(
+                ctrl = ctrl_signals,
+                pc = ctrl.cur_pc,
+                rs1 = rs1_data,
+                rs2 = rs2_data,
+                imm = ctrl.imm,
+            )
+        else:
+            executor.async_called(
+                ctrl = ctrl_signals,
+                pc = ctrl.cur_pc,
+                rs1 = rs1_data,
+                rs2 = rs2_data,
+                imm = ctrl.imm,
+                lane1 = lane1_signals,
+            )
\ No newline at end of file
@@ -10,7 +10,7 @@ class Fetcher(Module):
         pc_reg = RegArray(Bits(32), 1, initializer=[0])
         last_pc_reg = RegArray(Bits(32), 1, initializer=[0])
         pc_addr = pc_reg[0].bitcast(Bits(32))
-        log("Fetcher: {}", pc_reg[0])
+        debug_log("Fetcher: {}", pc_reg[0])
         return pc_reg, last_pc_reg, pc_addr
 
 class FetcherImpl(Downstream):
@@ -26,29 +26,57 @@ class FetcherImpl(Downstream):
         is_stall : Value,           #决定是否保持当前状态的变量
         branch_target_reg : Array,  #存储可能存在的跳转指令的目标pc位置
         rubbish: Value,              #占位用，无实际意义
+        predictor = None,           #分支预测器（BranchPredictor），为 None 时始终预测 pc+4
+        id_redirect: Value = None,  #ID 阶段预测出与 next_pc 不同的目标时为 1
+        id_target: Value = None,    #ID 阶段预测的目标 pc
+        inst_cache = None,          #指令 cache（ICache），为 None 时直接从指令 SRAM 取指
+        dual_issue: bool = False,   #双发射：每周期取 pc 与 pc+4 两条，顺序执行时下一个 pc 为 pc+8
     ):
         valid_is_stall = is_stall.optional(Bits(1)(0))
         rubbish_val = rubbish.optional(Bits(32)(0))
 
         with Condition(valid_is_stall == Bits(1)(1)):
-            log("Stall in IF")
+            debug_log("Stall in IF")
         
         current_pc_addr = (valid_is_stall == Bits(1)(1)).select(last_pc_reg[0], pc_reg[0]).bitcast(Bits(32))
 
-        log("IF: Current PC=0x{:x}", current_pc_addr)
+        debug_log("IF: Current PC=0x{:x}", current_pc_addr)
+
+        #ID 阶段给出了新的预测目标，本周期直接改取目标地址（stall 时 ID 指令未被接收，不重定向）
+        if id_redirect is not None:
+            valid_id_redirect = id_redirect.optional(Bits(1)(0)) & ~valid_is_stall
+            id_target_val = id_target.optional(Bits(32)(0))
+            current_pc_addr = valid_id_redirect.select(id_target_val, current_pc_addr)
+            with Condition(valid_id_redirect == Bits(1)(1)):
+                debug_log("IF: Redirect from ID to 0x{:x}", id_target_val)
 
         #如果EX阶段得到了跳转指令的目标位置，就需要flush        
-        branch_target = branch_target_reg[0].bitcast(Bits(32))
-        current_pc_addr = (branch_target != Bits(32)(0)).select(branch_target, current_pc_addr)
-        with Condition(branch_target != Bits(32)(0)):
-            log("IF: Flush to 0x{:x}", branch_target)
+        ex_redirect = redirect_valid(branch_target_reg[0])
+        branch_target = redirect_target(branch_target_reg[0])
+        current_pc_addr = ex_redirect.select(branch_target, current_pc_addr)
+        with Condition(ex_redirect):
+            debug_log("IF: Flush to 0x{:x}", branch_target)
+
+        if predictor is None:
+            next_pc_addr = (current_pc_addr.bitcast(UInt(32)) + UInt(32)(4)).bitcast(Bits(32))
+        else:
+            next_pc_addr = predictor.predict(current_pc_addr)
 
-        next_pc_addr = (current_pc_addr.bitcast(UInt(32)) + UInt(32)(4)).bitcast(Bits(32))
+        if dual_issue:
+            #没有预测跳转时一次前进两条；ID 不能配对时再重定向回 pc+4
+            seq_pc_addr = (current_pc_addr.bitcast(UInt(32)) + UInt(32)(4)).bitcast(Bits(32))
+            pair_pc_addr = (current_pc_addr.bitcast(UInt(32)) + UInt(32)(8)).bitcast(Bits(32))
+            next_pc_addr = (next_pc_addr == seq_pc_addr).select(pair_pc_addr, next_pc_addr)
 
-        pc_reg[0] <= next_pc_addr
+        if inst_cache is None:
+            pc_reg[0] <= next_pc_addr
+        else:
+            #cache 未命中时保持当前 pc，直到填充完成后重新取指
+            advance = inst_cache.fetch(current_pc_addr, valid_is_stall)
+            pc_reg[0] <= advance.select(next_pc_addr, current_pc_addr)
         last_pc_reg[0] <= current_pc_addr
 
-        log(
+        debug_log(
             "IF: Next PC=0x{:x}  Current PC={:x}",
             next_pc_addr,
             current_pc_addr,
@@ -1,50 +1,66 @@
 from assassyn.frontend import *
 from .utils import *
 
+def extend_load(raw_data, addr, mem_width, mem_sign):
+    # 从读出的整字中按地址低两位取出字节 / 半字并做符号或零扩展
+    half_sel = addr[1:1].select(raw_data[16:31], raw_data[0:15])
+    byte_sel = addr[0:0].select(half_sel[8:15], half_sel[0:7])
+
+    pad_bit_8 = mem_sign.select(Bits(1)(0), byte_sel[7:7])
+    pad_bit_16 = mem_sign.select(Bits(1)(0), half_sel[15:15])
+
+    padding_8 = pad_bit_8.select(Bits(24)(0xFFFFFF), Bits(24)(0x00000000))
+    padding_16 = pad_bit_16.select(Bits(16)(0xFFFF), Bits(16)(0x0000))
+
+    byte_extended = concat(padding_8, byte_sel)
+    half_extended = concat(padding_16, half_sel)
+
+    return mem_width.select1hot(
+        byte_extended,
+        half_extended,
+        raw_data
+    )
+
 class MemoryAcess(Module):
-    def __init__(self):
-        super().__init__(
-            ports={
-                "ctrl": Port(MemCtrlSignals),
-                "alu_result": Port(Bits(32)),
-            }
-        )
+    def __init__(self, dual_issue=False, compact=False):
+        ports = {
+            "ctrl": Port(MemCtrlFormat.record(compact)),
+            "alu_result": Port(Bits(32)),
+        }
+        # 双发射时 lane 1 不访存，结果原样传给 WB
+        if dual_issue:
+            ports["lane1"] = Port(Lane1Signals)
+            ports["data1"] = Port(Bits(32))
+        super().__init__(ports=ports)
+        self.dual_issue = dual_issue
+        self.compact = compact
 
     @module.combinational
     def build(
         self,
         write_back: Module,
-        sram_dout: RegArray
+        sram_dout: RegArray,
+        store_buffer = None,    # 写缓冲，load 读出的数据需与缓冲中尚未写回的字节合并
     ):
-        ctrl, alu_result = self.pop_all_ports(True)
+        if self.dual_issue:
+            ctrl, alu_result, lane1, data1 = self.pop_all_ports(True)
+        else:
+            ctrl, alu_result = self.pop_all_ports(True)
+        ctrl = MemCtrlFormat.view(ctrl, self.compact)
         mem_op = ctrl.mem_op
         mem_width = ctrl.mem_width
         mem_sign = ctrl.mem_sign
 
         with Condition(mem_op == MemOp.LOAD):
-            log("Memory Access: LOAD at Address=0x{:x}, Width={}, Sign={}", alu_result, mem_width, mem_sign)
+            debug_log("Memory Access: LOAD at Address=0x{:x}, Width={}, Sign={}", alu_result, mem_width, mem_sign)
         with Condition(mem_op == MemOp.STORE):
-            log("Memory Access: STORE at Address=0x{:x}, Width={}, Sign={}", alu_result, mem_width, mem_sign)
+            debug_log("Memory Access: STORE at Address=0x{:x}, Width={}, Sign={}", alu_result, mem_width, mem_sign)
 
         raw_data = sram_dout[0].bitcast(Bits(32))
+        if store_buffer is not None:
+            raw_data = store_buffer.merge(raw_data)
 
-        half_sel = alu_result[1:1].select(raw_data[16:31], raw_data[0:15])
-        byte_sel = alu_result[0:0].select(half_sel[8:15], half_sel[0:7])
-
-        pad_bit_8 = mem_sign.select(Bits(1)(0), byte_sel[7:7])
-        pad_bit_16 = mem_sign.select(Bits(1)(0), half_sel[15:15])
-        
-        padding_8 = pad_bit_8.select(Bits(24)(0xFFFFFF), Bits(24)(0x00000000))
-        padding_16 = pad_bit_16.select(Bits(16)(0xFFFF), Bits(16)(0x0000))
-
-        byte_extended = concat(padding_8, byte_sel)
-        half_extended = concat(padding_16, half_sel)
-
-        load_res = mem_width.select1hot(
-            byte_extended,
-            half_extended,
-            raw_data
-        )
+        load_res = extend_load(raw_data, alu_result, mem_width, mem_sign)
 
         is_load = mem_op == MemOp.LOAD
         is_store = mem_op == MemOp.STORE
@@ -53,8 +69,16 @@ class MemoryAcess(Module):
         wb_ctrl = WbCtrlSignals.bundle(
             rd = ctrl.rd,
             is_halt = ctrl.is_halt,
+            retire = ctrl.retire,
+            pc = ctrl.pc,
+            inst = ctrl.inst,
+            mem_addr = (is_load | is_store).select(alu_result, Bits(32)(0)),
         )
 
+        if self.dual_issue:
+            write_back.async_called(ctrl = wb_ctrl, data = final_data, lane1 = lane1, data1 = data1)
+            return ctrl.rd, final_data, is_store, (lane1.rd, data1)
+
         write_back.async_called(ctrl = wb_ctrl, data = final_data)
 
         return ctrl.rd, final_data, is_store
\ No newline at end of file
@@ -1,28 +1,69 @@
 from assassyn.frontend import *
 from .utils import *
+from .trace import TRACE_FORMAT
+from .perf import trace_cycle
 
 class WriteBack(Module):
-    def __init__(self):
-        super().__init__(
-            ports={
-                "ctrl": Port(WbCtrlSignals),
-                "data": Port(Bits(32)),
-            }
-        )
+    def __init__(self, dual_issue=False):
+        ports = {
+            "ctrl": Port(WbCtrlSignals),
+            "data": Port(Bits(32)),
+        }
+        if dual_issue:
+            ports["lane1"] = Port(Lane1Signals)
+            ports["data1"] = Port(Bits(32))
+        super().__init__(ports=ports)
+        self.dual_issue = dual_issue
 
     @module.combinational
     def build(
         self,
         reg_file: RegArray,
+        stats = (),             # 在停机时输出统计信息的部件（需提供 report()）
+        perf = None,            # 性能计数器（PerfCounters），在此统计 instret
     ):
-        ctrl, data = self.pop_all_ports(True)
+        if self.dual_issue:
+            ctrl, data, lane1, data1 = self.pop_all_ports(True)
+        else:
+            ctrl, data = self.pop_all_ports(True)
         index = ctrl.rd
         wb_bypass_value = data
         with Condition(index != Bits(5)(0)):
-            log("WB: Write x{} <= 0x{:x}", index, data)
+            debug_log("WB: Write x{} <= 0x{:x}", index, data)
             reg_file[index] = data
+        if perf is not None:
+            if self.dual_issue:
+                perf.retire(ctrl.retire == Bits(1)(1), lane1.retire == Bits(1)(1))
+            else:
+                perf.retire(ctrl.retire == Bits(1)(1))
+        with Condition(ctrl.retire == Bits(1)(1)):
+            wdata = (index != Bits(5)(0)).select(data, Bits(32)(0))
+            trace_log(TRACE_FORMAT, trace_cycle(perf), ctrl.pc, ctrl.inst, index, wdata, ctrl.mem_addr)
+        if self.dual_issue:
+            # lane 1 的指令在程序顺序上紧跟 lane 0，提交记录排在后面；寄存器写由 RegFileWritePort 完成
+            with Condition(lane1.retire == Bits(1)(1)):
+                wdata1 = (lane1.rd != Bits(5)(0)).select(data1, Bits(32)(0))
+                trace_log(TRACE_FORMAT, trace_cycle(perf), lane1.pc, lane1.inst, lane1.rd, wdata1, Bits(32)(0))
         with Condition(ctrl.is_halt == Bits(1)(1)):
             log("WB: Halt signal received, finishing simulation.")
+            for unit in stats:
+                unit.report()
             finish()
 
+        if self.dual_issue:
+            return index, wb_bypass_value, (lane1.rd, data1)
         return index, wb_bypass_value
+
+class RegFileWritePort(Downstream):
+    # 寄存器堆的第二个写端口：双发射时 lane 1 与 lane 0 在同一周期写回
+    # 同一模块内对一个数组的多次写入共用一个端口，因此放在单独的 Downstream 中
+    def __init__(self):
+        super().__init__()
+
+    @downstream.combinational
+    def build(self, reg_file: RegArray, rd: Value, data: Value):
+        rd_val = rd.optional(Bits(5)(0))
+        data_val = data.optional(Bits(32)(0))
+        with Condition(rd_val != Bits(5)(0)):
+            debug_log("WB: Lane1 write x{} <= 0x{:x}", rd_val, data_val)
+            reg_file[rd_val] = data_val
@@ -1,5 +1,13 @@
 from assassyn.frontend import *
-from .utils import Rs1Type, Rs2Type
+from .utils import Rs1Type, Rs2Type, FwdType, debug_log
+
+def forward_type(addr, sources):
+    # sources 为 [(目的寄存器, FwdType)]，从老到新排列，越新的结果优先
+    sel = FwdType.NONE
+    nonzero = addr != Bits(5)(0)
+    for dest, fwd in sources:
+        sel = ((addr == dest) & nonzero).select(fwd, sel)
+    return sel
 
 class Bypass(Downstream):
     def __init__(self):
@@ -16,6 +24,16 @@ class Bypass(Downstream):
         mem_dest_addr: Value,
         mem_is_store: Value,
         wb_dest_addr: Value,
+        ex_md_stall: Value = None,   # EX 阶段乘除法单元忙
+        harvard: bool = False,
+        store_buffer = None,         # 写缓冲，仅哈佛模式
+        dcache = None,               # 数据 cache，仅哈佛模式
+        perf = None,                 # 性能计数器（PerfCounters），按原因统计 stall 周期
+        rs1b_addr: Value = None,     # 双发射：第二个译码槽的源寄存器（未配对时为 0）
+        rs2b_addr: Value = None,
+        ex_dest1_addr: Value = None, # 双发射：lane 1 在 EX / MEM / WB 的目的寄存器
+        mem_dest1_addr: Value = None,
+        wb_dest1_addr: Value = None,
     ):
         rs1_addr_val = rs1_addr.optional(Bits(5)(0))
         rs2_addr_val = rs2_addr.optional(Bits(5)(0))
@@ -26,7 +44,7 @@ class Bypass(Downstream):
         mem_is_store_val = mem_is_store.optional(Bits(1)(0))
         wb_dest_addr_val = wb_dest_addr.optional(Bits(5)(0))
 
-        log("Bypass: rs1={}, rs2={}, ex_dest={}, ex_is_load={}, ex_is_store={}, mem_dest={}, wb_dest={}", 
+        debug_log("Bypass: rs1={}, rs2={}, ex_dest={}, ex_is_load={}, ex_is_store={}, mem_dest={}, wb_dest={}", 
             rs1_addr_val,
             rs2_addr_val,
             ex_dest_addr_val,
@@ -42,8 +60,74 @@ class Bypass(Downstream):
         # 可能的 stall 情况
         # ex load, ex store, 本周期会占用 memory, 故而要 stall
         # mem store 本周期也要占用 memory, 也要 stall
+        # 哈佛模式下取指有独立的 icache，不存在取指与访存的结构冲突：
+        #   load 只在 ID 指令真正用到其 rd 时等一拍（load-use），数据下一拍从 MEM 经 mem_bypass 旁路
+        #   store 的读改写下一拍还要占用数据 SRAM，仍需 stall
+        #   启用写缓冲时 store 入队即完成，只在缓冲将满时 stall
+        #   启用数据 cache 时 store 命中单周期完成，不需要 stall；未命中由 EX 重放处理
+
+        dual_issue = rs1b_addr is not None
+
+        if harvard:
+            load_stall = ex_is_load_val & (
+                ((rs1_addr_val == ex_dest_addr_val) & (~rs1_is_zero)) |
+                ((rs2_addr_val == ex_dest_addr_val) & (~rs2_is_zero))
+            )
+            if dual_issue:
+                # lane 1 不执行 load，只需检查第二条指令是否用到 EX 中 load 的结果，相关时整对等待
+                rs1b_addr_val = rs1b_addr.optional(Bits(5)(0))
+                rs2b_addr_val = rs2b_addr.optional(Bits(5)(0))
+                load_stall = load_stall | (ex_is_load_val & (
+                    ((rs1b_addr_val == ex_dest_addr_val) & (rs1b_addr_val != Bits(5)(0))) |
+                    ((rs2b_addr_val == ex_dest_addr_val) & (rs2b_addr_val != Bits(5)(0)))
+                ))
+            if dcache is not None:
+                store_stall = Bits(1)(0)
+            elif store_buffer is not None:
+                store_stall = store_buffer.stall(ex_is_store_val)
+            else:
+                store_stall = ex_is_store_val
+            mem_store_stall = Bits(1)(0)
+        else:
+            load_stall = ex_is_load_val
+            store_stall = ex_is_store_val
+            mem_store_stall = mem_is_store_val
+
+        # 乘除法单元迭代期间 EX 不能接收新指令
+        md_stall = Bits(1)(0)
+        if ex_md_stall is not None:
+            md_stall = ex_md_stall.optional(Bits(1)(0))
+
+        is_stall = load_stall | store_stall | mem_store_stall | md_stall
+
+        if perf is not None:
+            perf.count("stall_load", load_stall)
+            perf.count("stall_store", store_stall)
+            perf.count("stall_mem_store", mem_store_stall)
+            perf.count("stall_muldiv", md_stall)
 
-        is_stall = ex_is_store_val | ex_is_load_val | mem_is_store_val
+        if dual_issue:
+            # 同一级中 lane 1 比 lane 0 新；两条配对的指令不会写同一个寄存器
+            sources = [
+                (wb_dest_addr_val, FwdType.WB),
+                (wb_dest1_addr.optional(Bits(5)(0)), FwdType.WB1),
+                (mem_dest_addr_val, FwdType.MEM),
+                (mem_dest1_addr.optional(Bits(5)(0)), FwdType.MEM1),
+                (ex_dest_addr_val, FwdType.EX),
+                (ex_dest1_addr.optional(Bits(5)(0)), FwdType.EX1),
+            ]
+            rs1_ex_type = forward_type(rs1_addr_val, sources)
+            rs2_ex_type = forward_type(rs2_addr_val, sources)
+            rs1b_ex_type = forward_type(rs1b_addr_val, sources)
+            rs2b_ex_type = forward_type(rs2b_addr_val, sources)
+            debug_log("Bypass Result: rs1_type={} rs2_type={} rs1b_type={} rs2b_type={} is_stall={}",
+                rs1_ex_type,
+                rs2_ex_type,
+                rs1b_ex_type,
+                rs2b_ex_type,
+                is_stall
+            )
+            return rs1_ex_type, rs2_ex_type, is_stall, rs1b_ex_type, rs2b_ex_type
 
         rs1_wb_type = ((rs1_addr_val == wb_dest_addr_val) & (~rs1_is_zero)).select(Rs1Type.WB, Rs1Type.NONE)
         rs1_mem_type = ((rs1_addr_val == mem_dest_addr_val) & (~rs1_is_zero)).select(Rs1Type.MEM, rs1_wb_type)
@@ -53,7 +137,7 @@ class Bypass(Downstream):
         rs2_mem_type = ((rs2_addr_val == mem_dest_addr_val) & (~rs2_is_zero)).select(Rs2Type.MEM, rs2_wb_type)
         rs2_ex_type = ((rs2_addr_val == ex_dest_addr_val) & (~rs2_is_zero)).select(Rs2Type.EX, rs2_mem_type)
 
-        log("Bypass Result: rs1_type={} rs2_type={} is_stall={}",
+        debug_log("Bypass Result: rs1_type={} rs2_type={} is_stall={}",
             rs1_ex_type,
             rs2_ex_type,
             is_stall
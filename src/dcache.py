@@ -0,0 +1,234 @@
+from assassyn.frontend import *
+from .utils import debug_log
+
+# 数据 cache（仅哈佛模式）：组相联，写回 + 写分配，替换策略可选 LRU / 随机，数据 SRAM 作为后备存储器
+# 地址划分：| tag | set (set_bits) | word (line_bits) | 00 |
+#
+# 时序：
+#   EX 阶段 hit(addr)：判断本次访存能否命中；未命中时 EX 把该指令作废并从它的 pc 重新取指（replay），
+#     流水线中的各级只有深度为 1 的 FIFO，无法把指令扣在 EX，借助已有的 flush 通路重放
+#   MemoryUser 中 build(...)：命中的 load 把字写入 dout，下一拍 MEM 读取（与 SRAM.dout 时序一致）；
+#     命中的 store 直接合并写入数据阵列并置 dirty，单周期完成
+#     未命中时启动缺失处理：替换行若为脏行先逐字写回，再等待 latency 拍后逐字读入新行
+#   填充期间 cache 阻塞，所有访存都按未命中处理（重放），直到填充完成
+# 统计：命中、未命中（按填充次数计）、写回行数
+
+class DCache:
+    def __init__(self, set_bits, way_bits, line_bits, latency, replacement="lru", mem_addr_bits=16, mem_map=None):
+        assert set_bits >= 1 and line_bits >= 1, "dcache needs at least 2 sets and 2 words per line"
+        assert latency < (1 << 16), "latency too large"
+        assert replacement in ("lru", "random"), f"unknown replacement policy {replacement}"
+        self.set_bits = set_bits
+        self.way_bits = way_bits
+        self.line_bits = line_bits
+        self.latency = latency
+        self.replacement = replacement
+        self.mem_addr_bits = mem_addr_bits
+        self.mem_map = mem_map   # 后备存储器的地址翻译（MemoryMap），为 None 时截取地址低 mem_addr_bits 位
+        self.tag_bits = 32 - 2 - line_bits - set_bits
+
+        sets = 1 << set_bits
+        ways = 1 << way_bits
+        lines = sets * ways
+        words = lines << line_bits
+        self.valid = RegArray(Bits(1), lines, initializer=[0] * lines)
+        self.dirty = RegArray(Bits(1), lines, initializer=[0] * lines)
+        self.tag = RegArray(Bits(self.tag_bits), lines, initializer=[0] * lines)
+        self.data = RegArray(Bits(32), words, initializer=[0] * words)
+
+        if way_bits > 0 and replacement == "lru":
+            # 每组一个打包的年龄向量，第 w 路的年龄占 [w*way_bits, (w+1)*way_bits)，0 为最近使用
+            init_age = sum(w << (w * way_bits) for w in range(ways))
+            self.age = RegArray(Bits(ways * way_bits), sets, initializer=[init_age] * sets)
+        if way_bits > 0 and replacement == "random":
+            self.lfsr = RegArray(Bits(16), 1, initializer=[0xACE1])
+
+        self.dout = RegArray(Bits(32), 1, initializer=[0])
+
+        # 缺失处理状态
+        self.fill_busy = RegArray(Bits(1), 1, initializer=[0])
+        self.fill_addr = RegArray(Bits(32), 1, initializer=[0])
+        self.fill_way = RegArray(Bits(max(way_bits, 1)), 1, initializer=[0])
+        self.fill_wait = RegArray(Bits(16), 1, initializer=[0])
+        self.fill_issue = RegArray(Bits(line_bits + 1), 1, initializer=[0])
+        self.fill_recv = RegArray(Bits(1), 1, initializer=[0])
+        self.fill_recv_idx = RegArray(Bits(line_bits), 1, initializer=[0])
+        self.wb_active = RegArray(Bits(1), 1, initializer=[0])
+        self.wb_addr = RegArray(Bits(32), 1, initializer=[0])
+        self.wb_idx = RegArray(Bits(line_bits), 1, initializer=[0])
+
+        self.hits = RegArray(Bits(32), 1, initializer=[0])
+        self.misses = RegArray(Bits(32), 1, initializer=[0])
+        self.writebacks = RegArray(Bits(32), 1, initializer=[0])
+
+    def _fields(self, addr):
+        lo = 2 + self.line_bits
+        return addr[2:lo - 1], addr[lo:lo + self.set_bits - 1], addr[lo + self.set_bits:31]
+
+    def _mem_index(self, addr):
+        if self.mem_map is not None:
+            return self.mem_map.translate(addr)
+        return (addr >> Bits(32)(2))[0:self.mem_addr_bits - 1]
+
+    def _line(self, way, set_idx):
+        if self.way_bits == 0:
+            return set_idx
+        return concat(way, set_idx)
+
+    def _lookup(self, addr):
+        word_idx, set_idx, tag = self._fields(addr)
+        hit = Bits(1)(0)
+        hit_way = Bits(max(self.way_bits, 1))(0)
+        for w in range(1 << self.way_bits):
+            way = Bits(max(self.way_bits, 1))(w)
+            line = self._line(way, set_idx)
+            way_hit = (self.valid[line] == Bits(1)(1)) & (self.tag[line] == tag)
+            hit = hit | way_hit
+            hit_way = way_hit.select(way, hit_way)
+        return hit & ~self.fill_busy[0], hit_way
+
+    def hit(self, addr):
+        hit, _ = self._lookup(addr)
+        return hit
+
+    def _victim(self, set_idx):
+        k = self.way_bits
+        if k == 0:
+            return Bits(1)(0)
+        if self.replacement == "random":
+            return self.lfsr[0][0:k - 1]
+        age = self.age[set_idx]
+        victim = Bits(k)(0)
+        for w in range(1 << k):
+            victim = (age[w * k:w * k + k - 1] == Bits(k)((1 << k) - 1)).select(Bits(k)(w), victim)
+        return victim
+
+    def _touch(self, set_idx, way):
+        # LRU：被访问的路年龄清零，比它年轻的路年龄加一
+        k = self.way_bits
+        age = self.age[set_idx]
+        way_age = Bits(k)(0)
+        for w in range(1 << k):
+            way_age = (way == Bits(k)(w)).select(age[w * k:w * k + k - 1], way_age)
+        fields = []
+        for w in range(1 << k):
+            cur = age[w * k:w * k + k - 1]
+            inc = (cur.bitcast(UInt(k)) + UInt(k)(1)).bitcast(Bits(k))
+            younger = cur.bitcast(UInt(k)) < way_age.bitcast(UInt(k))
+            fields.append((way == Bits(k)(w)).select(Bits(k)(0), younger.select(inc, cur)))
+        return concat(*reversed(fields))
+
+    def build(
+        self,
+        is_load: Value,
+        is_store: Value,
+        addr: Value,
+        wdata: Value,
+        width: Value,
+        mem: SRAM,
+    ):
+        L = self.line_bits
+        words = 1 << L
+        word_idx, set_idx, tag = self._fields(addr)
+        hit, hit_way = self._lookup(addr)
+        hit_line = self._line(hit_way, set_idx)
+        hit_word = self.data[concat(hit_line, word_idx)]
+
+        access = is_load | is_store
+        load_hit = is_load & hit
+        store_hit = is_store & hit
+
+        # ---------- 命中 ----------
+        with Condition(load_hit):
+            self.dout[0] <= hit_word
+
+        shamt = addr[0:1].concat(Bits(3)(0)).bitcast(UInt(5))
+        raw_mask = width.select1hot(
+            Bits(32)(0x000000FF),
+            Bits(32)(0x0000FFFF),
+            Bits(32)(0xFFFFFFFF),
+        )
+        shifted_mask = raw_mask << shamt
+        store_word = (hit_word & (~shifted_mask)) | ((wdata << shamt) & shifted_mask)
+
+        with Condition(access & hit):
+            self.hits[0] <= (self.hits[0].bitcast(UInt(32)) + UInt(32)(1)).bitcast(Bits(32))
+            if self.way_bits > 0 and self.replacement == "lru":
+                self.age[set_idx] = self._touch(set_idx, hit_way)
+
+        if self.way_bits > 0 and self.replacement == "random":
+            lfsr = self.lfsr[0]
+            feedback = lfsr[0:0] ^ lfsr[2:2] ^ lfsr[3:3] ^ lfsr[5:5]
+            self.lfsr[0] <= concat(feedback, lfsr[1:15])
+
+        # ---------- 缺失：选出替换行，脏行先写回 ----------
+        busy = self.fill_busy[0]
+        start = access & ~hit & ~busy
+        victim = self._victim(set_idx)
+        victim_line = self._line(victim, set_idx)
+        victim_dirty = (self.valid[victim_line] == Bits(1)(1)) & (self.dirty[victim_line] == Bits(1)(1))
+        line_base = concat(addr[2 + L:31], Bits(2 + L)(0))
+
+        _, fill_set, _ = self._fields(self.fill_addr[0])
+        fill_line = self._line(self.fill_way[0], fill_set)
+
+        with Condition(start):
+            debug_log("DCache: Miss at Addr=0x{:x}, refill line 0x{:x} dirty_victim={}", addr, line_base, victim_dirty)
+            self.fill_addr[0] <= line_base
+            self.fill_way[0] <= victim
+            self.wb_addr[0] <= concat(self.tag[victim_line], set_idx, Bits(2 + L)(0))
+            self.tag[victim_line] = tag
+            self.misses[0] <= (self.misses[0].bitcast(UInt(32)) + UInt(32)(1)).bitcast(Bits(32))
+
+        with Condition(start & victim_dirty):
+            self.writebacks[0] <= (self.writebacks[0].bitcast(UInt(32)) + UInt(32)(1)).bitcast(Bits(32))
+
+        # ---------- 写回 ----------
+        wb_active = self.wb_active[0]
+        wb_last = self.wb_idx[0] == Bits(L)(words - 1)
+        wb_inc = (self.wb_idx[0].bitcast(UInt(L)) + UInt(L)(1)).bitcast(Bits(L))
+        self.wb_active[0] <= start.select(victim_dirty, wb_active & ~wb_last)
+        self.wb_idx[0] <= start.select(Bits(L)(0), wb_active.select(wb_inc, self.wb_idx[0]))
+
+        # ---------- 填充：写回结束后等待 latency 拍，再逐字读入 ----------
+        filling = busy & ~wb_active
+        waiting = self.fill_wait[0] != Bits(16)(0)
+        issue = filling & ~waiting & (self.fill_issue[0].bitcast(UInt(L + 1)) < UInt(L + 1)(words))
+        recv = self.fill_recv[0]
+        done = recv & (self.fill_recv_idx[0] == Bits(L)(words - 1))
+
+        wait_dec = (self.fill_wait[0].bitcast(UInt(16)) - UInt(16)(1)).bitcast(Bits(16))
+        self.fill_wait[0] <= start.select(Bits(16)(self.latency), (filling & waiting).select(wait_dec, self.fill_wait[0]))
+        issue_inc = (self.fill_issue[0].bitcast(UInt(L + 1)) + UInt(L + 1)(1)).bitcast(Bits(L + 1))
+        self.fill_issue[0] <= start.select(Bits(L + 1)(0), issue.select(issue_inc, self.fill_issue[0]))
+        self.fill_recv[0] <= issue
+        self.fill_recv_idx[0] <= self.fill_issue[0][0:L - 1]
+        self.fill_busy[0] <= start | (busy & ~done)
+
+        # 同一阵列每周期只写一次：命中写与填充互斥（填充期间不会命中）
+        with Condition(start | done):
+            self.valid[start.select(victim_line, fill_line)] = done
+        with Condition(start | store_hit):
+            self.dirty[start.select(victim_line, hit_line)] = store_hit
+        with Condition(store_hit | recv):
+            self.data[store_hit.select(concat(hit_line, word_idx), concat(fill_line, self.fill_recv_idx[0]))] = \
+                store_hit.select(store_word, mem.dout[0])
+
+        # ---------- 后备存储器端口 ----------
+        wb_mem_addr = concat(self.wb_addr[0][2 + L:31], self.wb_idx[0], Bits(2)(0))
+        fill_mem_addr = concat(self.fill_addr[0][2 + L:31], self.fill_issue[0][0:L - 1], Bits(2)(0))
+        mem_addr = wb_active.select(wb_mem_addr, fill_mem_addr)
+        wb_data = self.data[concat(fill_line, self.wb_idx[0])]
+
+        with Condition(wb_active):
+            debug_log("DCache: Writeback Addr=0x{:x} Data=0x{:x}", wb_mem_addr, wb_data)
+
+        mem.build(
+            addr = self._mem_index(mem_addr),
+            wdata = wb_data,
+            we = wb_active,
+            re = ~wb_active,
+        )
+
+    def report(self):
+        log("DCache: hits={} misses={} writebacks={}", self.hits[0], self.misses[0], self.writebacks[0])
@@ -0,0 +1,143 @@
+from assassyn.frontend import *
+from .utils import debug_log
+
+# 指令 cache（仅哈佛模式）：组相联，轮转替换，哈佛模式的指令 SRAM 作为后备存储器
+# 地址划分：| tag | set (set_bits) | word (line_bits) | 00 |
+#
+# 时序：
+#   IF 阶段 fetch(pc)：组合地查找，命中时把指令写入 dout，下一拍 ID 读取（与 SRAM.dout 时序一致）；
+#     未命中时 dout 为 0（ID 按 NOP 处理），IF 保持 pc 重新取指
+#   MemoryUser 中 refill(pc, mem)：未命中且空闲时启动填充，等待 latency 拍后每拍读一个字，
+#     读出的字下一拍写入数据阵列，整行写完后置 valid
+# 统计：命中次数只计 ID 接收的取指，未命中次数按填充次数计
+
+class ICache:
+    def __init__(self, set_bits, way_bits, line_bits, latency, mem_addr_bits=16, mem_map=None):
+        assert set_bits >= 1 and line_bits >= 1, "icache needs at least 2 sets and 2 words per line"
+        assert latency < (1 << 16), "latency too large"
+        self.set_bits = set_bits
+        self.way_bits = way_bits
+        self.line_bits = line_bits
+        self.latency = latency
+        self.mem_addr_bits = mem_addr_bits
+        self.mem_map = mem_map   # 后备存储器的地址翻译（MemoryMap），为 None 时截取地址低 mem_addr_bits 位
+        self.tag_bits = 32 - 2 - line_bits - set_bits
+
+        lines = 1 << (set_bits + way_bits)
+        words = lines << line_bits
+        self.valid = RegArray(Bits(1), lines, initializer=[0] * lines)
+        self.tag = RegArray(Bits(self.tag_bits), lines, initializer=[0] * lines)
+        self.data = RegArray(Bits(32), words, initializer=[0] * words)
+        if way_bits > 0:
+            self.victim = RegArray(Bits(way_bits), 1 << set_bits, initializer=[0] * (1 << set_bits))
+
+        self.dout = RegArray(Bits(32), 1, initializer=[0])
+        # 上一次被 ID 接收的取指未命中，ID 中是占位的 NOP
+        self.last_miss = RegArray(Bits(1), 1, initializer=[0])
+
+        # 填充状态
+        self.fill_busy = RegArray(Bits(1), 1, initializer=[0])
+        self.fill_addr = RegArray(Bits(32), 1, initializer=[0])
+        self.fill_way = RegArray(Bits(max(way_bits, 1)), 1, initializer=[0])
+        self.fill_wait = RegArray(Bits(16), 1, initializer=[0])
+        self.fill_issue = RegArray(Bits(line_bits + 1), 1, initializer=[0])
+        self.fill_recv = RegArray(Bits(1), 1, initializer=[0])
+        self.fill_recv_idx = RegArray(Bits(line_bits), 1, initializer=[0])
+
+        self.hits = RegArray(Bits(32), 1, initializer=[0])
+        self.misses = RegArray(Bits(32), 1, initializer=[0])
+
+    def _fields(self, addr):
+        lo = 2 + self.line_bits
+        return addr[2:lo - 1], addr[lo:lo + self.set_bits - 1], addr[lo + self.set_bits:31]
+
+    def _line(self, way, set_idx):
+        if self.way_bits == 0:
+            return set_idx
+        return concat(way, set_idx)
+
+    def _mem_index(self, addr):
+        if self.mem_map is not None:
+            return self.mem_map.translate(addr)
+        return (addr >> Bits(32)(2))[0:self.mem_addr_bits - 1]
+
+    def lookup(self, pc):
+        word_idx, set_idx, tag = self._fields(pc)
+        hit = Bits(1)(0)
+        word = Bits(32)(0)
+        for w in range(1 << self.way_bits):
+            line = self._line(Bits(max(self.way_bits, 1))(w), set_idx)
+            way_hit = (self.valid[line] == Bits(1)(1)) & (self.tag[line] == tag)
+            hit = hit | way_hit
+            word = way_hit.select(self.data[concat(line, word_idx)], word)
+        return hit, word
+
+    def fetch(self, pc, is_stall):
+        # 返回本周期 IF 是否可以前进到下一个 pc
+        hit, word = self.lookup(pc)
+        self.dout[0] <= hit.select(word, Bits(32)(0))
+
+        # stall 时 ID 保持原指令、忽略本次取指：若 ID 中是未命中的占位 NOP，stall 结束后需重取
+        advance = is_stall.select(~self.last_miss[0], hit)
+        with Condition(~is_stall):
+            self.last_miss[0] <= ~hit
+        with Condition(hit & ~is_stall):
+            self.hits[0] <= (self.hits[0].bitcast(UInt(32)) + UInt(32)(1)).bitcast(Bits(32))
+        with Condition(~hit):
+            debug_log("ICache: Miss at PC=0x{:x}", pc)
+
+        return advance
+
+    def refill(self, pc, mem: SRAM):
+        L = self.line_bits
+        words = 1 << L
+        hit, _ = self.lookup(pc)
+        _, set_idx, tag = self._fields(pc)
+
+        busy = self.fill_busy[0]
+        start = ~hit & ~busy
+        waiting = self.fill_wait[0] != Bits(16)(0)
+        issue = busy & ~waiting & (self.fill_issue[0].bitcast(UInt(L + 1)) < UInt(L + 1)(words))
+        recv = self.fill_recv[0]
+        done = recv & (self.fill_recv_idx[0] == Bits(L)(words - 1))
+
+        victim = self.victim[set_idx] if self.way_bits > 0 else Bits(1)(0)
+        start_line = self._line(victim, set_idx)
+        _, fill_set, _ = self._fields(self.fill_addr[0])
+        fill_line = self._line(self.fill_way[0], fill_set)
+
+        # ---------- 启动填充：选出替换的路，先使其失效 ----------
+        with Condition(start):
+            debug_log("ICache: Refill line 0x{:x}", concat(pc[2 + L:31], Bits(2 + L)(0)))
+            self.fill_addr[0] <= concat(pc[2 + L:31], Bits(2 + L)(0))
+            self.fill_way[0] <= victim
+            self.tag[start_line] = tag
+            self.misses[0] <= (self.misses[0].bitcast(UInt(32)) + UInt(32)(1)).bitcast(Bits(32))
+            if self.way_bits > 0:
+                self.victim[set_idx] = (victim.bitcast(UInt(self.way_bits)) + UInt(self.way_bits)(1)).bitcast(Bits(self.way_bits))
+
+        with Condition(start | done):
+            self.valid[start.select(start_line, fill_line)] = done
+
+        # ---------- 后备存储器：等待 latency 拍后逐字读出 ----------
+        wait_dec = (self.fill_wait[0].bitcast(UInt(16)) - UInt(16)(1)).bitcast(Bits(16))
+        self.fill_wait[0] <= start.select(Bits(16)(self.latency), waiting.select(wait_dec, self.fill_wait[0]))
+        issue_inc = (self.fill_issue[0].bitcast(UInt(L + 1)) + UInt(L + 1)(1)).bitcast(Bits(L + 1))
+        self.fill_issue[0] <= start.select(Bits(L + 1)(0), issue.select(issue_inc, self.fill_issue[0]))
+        self.fill_recv[0] <= issue
+        self.fill_recv_idx[0] <= self.fill_issue[0][0:L - 1]
+        self.fill_busy[0] <= start | (busy & ~done)
+
+        with Condition(recv):
+            self.data[concat(fill_line, self.fill_recv_idx[0])] = mem.dout[0]
+
+        mem_addr = concat(self.fill_addr[0][2 + L:31], self.fill_issue[0][0:L - 1], Bits(2)(0))
+        mem.build(
+            addr = self._mem_index(mem_addr),
+            wdata = Bits(32)(0),
+            we = Bits(1)(0),
+            re = Bits(1)(1),
+        )
+
+    def report(self):
+        log("ICache: hits={} misses={}", self.hits[0], self.misses[0])
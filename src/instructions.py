@@ -1,26 +1,47 @@
 from .utils import *
 
+# 每项为 (名称, opcode, funct3, funct7, alu_op, op1_type, op2_type, mem_op,
+#        mem_width, mem_sign, if_wb, branch_type, imm_type)
+# funct3 / funct7 为 None 表示译码时不检查该字段
 instruction_table = [
     # RInst
-    ('add', OP_R_TYPE, 0x0, 0, ALUOp.ADD, Op1Type.RS1, Op2Type.RS2, MemOp.NONE,
+    ('add', OP_R_TYPE, 0x0, 0x00, ALUOp.ADD, Op1Type.RS1, Op2Type.RS2, MemOp.NONE,
      MemWidth.WORD, Bits(1)(0), IF_WB.YES, BranchType.NONE, ImmType.R),
-    ('sub', OP_R_TYPE, 0x0, 1, ALUOp.SUB, Op1Type.RS1, Op2Type.RS2, MemOp.NONE,
+    ('sub', OP_R_TYPE, 0x0, 0x20, ALUOp.SUB, Op1Type.RS1, Op2Type.RS2, MemOp.NONE,
      MemWidth.WORD, Bits(1)(0), IF_WB.YES, BranchType.NONE, ImmType.R),
-    ('sll', OP_R_TYPE, 0x1, 0, ALUOp.SLL, Op1Type.RS1, Op2Type.RS2, MemOp.NONE,
+    ('sll', OP_R_TYPE, 0x1, 0x00, ALUOp.SLL, Op1Type.RS1, Op2Type.RS2, MemOp.NONE,
      MemWidth.WORD, Bits(1)(0), IF_WB.YES, BranchType.NONE, ImmType.R),
-    ('slt', OP_R_TYPE, 0x2, 0, ALUOp.SLT, Op1Type.RS1, Op2Type.RS2, MemOp.NONE,
+    ('slt', OP_R_TYPE, 0x2, 0x00, ALUOp.SLT, Op1Type.RS1, Op2Type.RS2, MemOp.NONE,
      MemWidth.WORD, Bits(1)(0), IF_WB.YES, BranchType.NONE, ImmType.R),
-    ('sltu', OP_R_TYPE, 0x3, 0, ALUOp.SLTU, Op1Type.RS1, Op2Type.RS2, MemOp.NONE,
+    ('sltu', OP_R_TYPE, 0x3, 0x00, ALUOp.SLTU, Op1Type.RS1, Op2Type.RS2, MemOp.NONE,
      MemWidth.WORD, Bits(1)(0), IF_WB.YES, BranchType.NONE, ImmType.R),
-    ('xor', OP_R_TYPE, 0x4, 0, ALUOp.XOR, Op1Type.RS1, Op2Type.RS2, MemOp.NONE,
+    ('xor', OP_R_TYPE, 0x4, 0x00, ALUOp.XOR, Op1Type.RS1, Op2Type.RS2, MemOp.NONE,
      MemWidth.WORD, Bits(1)(0), IF_WB.YES, BranchType.NONE, ImmType.R),
-    ('srl', OP_R_TYPE, 0x5, 0, ALUOp.SRL, Op1Type.RS1, Op2Type.RS2, MemOp.NONE,
+    ('srl', OP_R_TYPE, 0x5, 0x00, ALUOp.SRL, Op1Type.RS1, Op2Type.RS2, MemOp.NONE,
      MemWidth.WORD, Bits(1)(0), IF_WB.YES, BranchType.NONE, ImmType.R),
-    ('sra', OP_R_TYPE, 0x5, 1, ALUOp.SRA, Op1Type.RS1, Op2Type.RS2, MemOp.NONE,
+    ('sra', OP_R_TYPE, 0x5, 0x20, ALUOp.SRA, Op1Type.RS1, Op2Type.RS2, MemOp.NONE,
      MemWidth.WORD, Bits(1)(0), IF_WB.YES, BranchType.NONE, ImmType.R),
-    ('or', OP_R_TYPE, 0x6, 0, ALUOp.OR, Op1Type.RS1, Op2Type.RS2, MemOp.NONE,
+    ('or', OP_R_TYPE, 0x6, 0x00, ALUOp.OR, Op1Type.RS1, Op2Type.RS2, MemOp.NONE,
      MemWidth.WORD, Bits(1)(0), IF_WB.YES, BranchType.NONE, ImmType.R),
-    ('and', OP_R_TYPE, 0x7, 0, ALUOp.AND, Op1Type.RS1, Op2Type.RS2, MemOp.NONE,
+    ('and', OP_R_TYPE, 0x7, 0x00, ALUOp.AND, Op1Type.RS1, Op2Type.RS2, MemOp.NONE,
+     MemWidth.WORD, Bits(1)(0), IF_WB.YES, BranchType.NONE, ImmType.R),
+
+    # RV32M
+    ('mul', OP_R_TYPE, 0x0, 0x01, ALUOp.MDU, Op1Type.RS1, Op2Type.RS2, MemOp.NONE,
+     MemWidth.WORD, Bits(1)(0), IF_WB.YES, BranchType.NONE, ImmType.R),
+    ('mulh', OP_R_TYPE, 0x1, 0x01, ALUOp.MDU, Op1Type.RS1, Op2Type.RS2, MemOp.NONE,
+     MemWidth.WORD, Bits(1)(0), IF_WB.YES, BranchType.NONE, ImmType.R),
+    ('mulhsu', OP_R_TYPE, 0x2, 0x01, ALUOp.MDU, Op1Type.RS1, Op2Type.RS2, MemOp.NONE,
+     MemWidth.WORD, Bits(1)(0), IF_WB.YES, BranchType.NONE, ImmType.R),
+    ('mulhu', OP_R_TYPE, 0x3, 0x01, ALUOp.MDU, Op1Type.RS1, Op2Type.RS2, MemOp.NONE,
+     MemWidth.WORD, Bits(1)(0), IF_WB.YES, BranchType.NONE, ImmType.R),
+    ('div', OP_R_TYPE, 0x4, 0x01, ALUOp.MDU, Op1Type.RS1, Op2Type.RS2, MemOp.NONE,
+     MemWidth.WORD, Bits(1)(0), IF_WB.YES, BranchType.NONE, ImmType.R),
+    ('divu', OP_R_TYPE, 0x5, 0x01, ALUOp.MDU, Op1Type.RS1, Op2Type.RS2, MemOp.NONE,
+     MemWidth.WORD, Bits(1)(0), IF_WB.YES, BranchType.NONE, ImmType.R),
+    ('rem', OP_R_TYPE, 0x6, 0x01, ALUOp.MDU, Op1Type.RS1, Op2Type.RS2, MemOp.NONE,
+     MemWidth.WORD, Bits(1)(0), IF_WB.YES, BranchType.NONE, ImmType.R),
+    ('remu', OP_R_TYPE, 0x7, 0x01, ALUOp.MDU, Op1Type.RS1, Op2Type.RS2, MemOp.NONE,
      MemWidth.WORD, Bits(1)(0), IF_WB.YES, BranchType.NONE, ImmType.R),
 
     # IInst(ALU)
@@ -38,9 +59,9 @@ instruction_table = [
      MemWidth.WORD, Bits(1)(0), IF_WB.YES, BranchType.NONE, ImmType.I),
     ('slli', OP_I_TYPE, 0x1, None, ALUOp.SLL, Op1Type.RS1, Op2Type.IMM, MemOp.NONE,
      MemWidth.WORD, Bits(1)(0), IF_WB.YES, BranchType.NONE, ImmType.I),
-    ('srli', OP_I_TYPE, 0x5, 0, ALUOp.SRL, Op1Type.RS1, Op2Type.IMM, MemOp.NONE,
+    ('srli', OP_I_TYPE, 0x5, 0x00, ALUOp.SRL, Op1Type.RS1, Op2Type.IMM, MemOp.NONE,
      MemWidth.WORD, Bits(1)(0), IF_WB.YES, BranchType.NONE, ImmType.I),
-    ('srai', OP_I_TYPE, 0x5, 1, ALUOp.SRA, Op1Type.RS1, Op2Type.IMM, MemOp.NONE,
+    ('srai', OP_I_TYPE, 0x5, 0x20, ALUOp.SRA, Op1Type.RS1, Op2Type.IMM, MemOp.NONE,
      MemWidth.WORD, Bits(1)(0), IF_WB.YES, BranchType.NONE, ImmType.I),
 
     # load instructions
@@ -94,8 +115,109 @@ instruction_table = [
      MemWidth.WORD, Bits(1)(0), IF_WB.YES, BranchType.NONE, ImmType.U),
 
     # 系统级指令
-    ('ecall', OP_SYSTEM, 0x0, 0, ALUOp.SYS, Op1Type.RS1, Op2Type.IMM, MemOp.NONE,
+    ('ecall', OP_SYSTEM, 0x0, 0x00, ALUOp.SYS, Op1Type.RS1, Op2Type.IMM, MemOp.NONE,
      MemWidth.WORD, Bits(1)(0), IF_WB.NO, BranchType.NONE, ImmType.I),
-    ('ebreak', OP_SYSTEM, 0x0, 0, ALUOp.SYS, Op1Type.RS1, Op2Type.IMM, MemOp.NONE,
+    ('ebreak', OP_SYSTEM, 0x0, 0x00, ALUOp.SYS, Op1Type.RS1, Op2Type.IMM, MemOp.NONE,
      MemWidth.WORD, Bits(1)(0), IF_WB.NO, BranchType.NONE, ImmType.I),
-]
\ No newline at end of file
+
+    # Zicntr / Zihpm：计数器只读，csrrs / csrrc 只执行读操作（csrr 即 csrrs rd, csr, x0）
+    ('csrrs', OP_SYSTEM, 0x2, None, ALUOp.CSR, Op1Type.ZERO, Op2Type.IMM, MemOp.NONE,
+     MemWidth.WORD, Bits(1)(0), IF_WB.YES, BranchType.NONE, ImmType.I),
+    ('csrrc', OP_SYSTEM, 0x3, None, ALUOp.CSR, Op1Type.ZERO, Op2Type.IMM, MemOp.NONE,
+     MemWidth.WORD, Bits(1)(0), IF_WB.YES, BranchType.NONE, ImmType.I),
+    ('csrrsi', OP_SYSTEM, 0x6, None, ALUOp.CSR, Op1Type.ZERO, Op2Type.IMM, MemOp.NONE,
+     MemWidth.WORD, Bits(1)(0), IF_WB.YES, BranchType.NONE, ImmType.I),
+    ('csrrci', OP_SYSTEM, 0x7, None, ALUOp.CSR, Op1Type.ZERO, Op2Type.IMM, MemOp.NONE,
+     MemWidth.WORD, Bits(1)(0), IF_WB.YES, BranchType.NONE, ImmType.I),
+]
+# 两级译码表：第一级按 opcode[6:2] 索引，第二级按 funct3 与 funct7 中区分同组指令的位索引
+# 每条指令的控制信号打包为一个控制字，字段自低位起依次排列；全 0 的控制字表示非法指令（imm_type 为 0）
+# (字段名, instruction_table 中的下标, 位宽)
+CTRL_FIELDS = (
+    ('alu_op', 4, 14),
+    ('op1_type', 5, 3),
+    ('op2_type', 6, 3),
+    ('mem_op', 7, 3),
+    ('mem_width', 8, 3),
+    ('mem_sign', 9, 1),
+    ('if_wb', 10, 2),
+    ('branch_type', 11, 9),
+    ('imm_type', 12, 6),
+)
+CTRL_WIDTH = sum(width for _, _, width in CTRL_FIELDS)
+
+def _value(const):
+    return const if isinstance(const, int) else const.value
+
+def control_word(entry):
+    word, shift = 0, 0
+    for _, idx, width in CTRL_FIELDS:
+        word |= _value(entry[idx]) << shift
+        shift += width
+    return word
+
+def _ctrl_slices():
+    slices, shift = {}, 0
+    for name, _, width in CTRL_FIELDS:
+        slices[name] = (shift, shift + width - 1)
+        shift += width
+    return slices
+
+# {字段名: (低位, 高位)}，硬件上按切片从控制字中取出各字段
+CTRL_SLICES = _ctrl_slices()
+
+class DecodeGroup:
+    # 同一 opcode 的指令：第二级下标为 funct3（若组内有指令检查它）拼上 f7_bits 对应的 funct7 位（低位在前）
+    # f7_bits 只取组内 funct7 取值不同的位，其余位对检查 funct7 的指令必须等于 f7_rest，由 strict 标记
+    def __init__(self, entries):
+        self.use_funct3 = any(entry[2] is not None for entry in entries)
+        funct7s = [entry[3] for entry in entries if entry[3] is not None]
+        self.f7_bits = [b for b in range(7) if len({(f >> b) & 1 for f in funct7s}) > 1]
+        self.f7_mask = 0x7F & ~sum(1 << b for b in self.f7_bits)
+        self.f7_rest = funct7s[0] & self.f7_mask if funct7s else 0
+        f3_width = 3 if self.use_funct3 else 0
+
+        size = 1 << (f3_width + len(self.f7_bits))
+        self.words = [0] * size
+        self.strict = [0] * size
+        for entry in entries:
+            word = control_word(entry)
+            for key in range(size):
+                if entry[2] is not None and key & 0x7 != entry[2]:
+                    continue
+                if entry[3] is not None and key >> f3_width != self._gather(entry[3]):
+                    continue
+                leaf = (word, int(entry[3] is not None))
+                if self.words[key] and (self.words[key], self.strict[key]) != leaf:
+                    raise ValueError(f"ambiguous decode table entry '{entry[0]}'")
+                self.words[key], self.strict[key] = leaf
+
+    def _gather(self, funct7):
+        return sum(((funct7 >> b) & 1) << i for i, b in enumerate(self.f7_bits))
+
+    def key(self, funct3, funct7):
+        key = self._gather(funct7)
+        return (key << 3 | funct3) if self.use_funct3 else key
+
+    def lookup(self, funct3, funct7):
+        key = self.key(funct3, funct7)
+        if self.strict[key] and funct7 & self.f7_mask != self.f7_rest:
+            return 0
+        return self.words[key]
+
+def _build_decode_table():
+    groups = {}
+    for entry in instruction_table:
+        groups.setdefault(_value(entry[1]), []).append(entry)
+    return {opcode >> 2: DecodeGroup(entries) for opcode, entries in groups.items()}
+
+decode_table = _build_decode_table()
+
+def decode_control(inst):
+    # 软件上按与硬件相同的两级表查出指令字的控制字，非法指令返回 0
+    if inst & 0x3 != 0x3:
+        return 0
+    group = decode_table.get((inst >> 2) & 0x1F)
+    if group is None:
+        return 0
+    return group.lookup((inst >> 12) & 0x7, inst >> 25)
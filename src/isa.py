@@ -0,0 +1,107 @@
+# 与硬件无关的 RV32IM 编码常量（纯 Python，不依赖 assassyn）
+# ISS、映像工具等软件侧代码从这里取常量；utils.py / perf.py 中的硬件常量由这里的整数构造
+# ENCODINGS 与 instructions.py 的 instruction_table 逐项对应，由 decode_table_test 检查两者一致
+
+OPCODE_R_TYPE = 0b0110011
+OPCODE_I_TYPE = 0b0010011
+OPCODE_LOAD = 0b0000011
+OPCODE_STORE = 0b0100011
+OPCODE_BRANCH = 0b1100011
+OPCODE_JAL = 0b1101111
+OPCODE_JALR = 0b1100111
+OPCODE_LUI = 0b0110111
+OPCODE_AUIPC = 0b0010111
+OPCODE_SYSTEM = 0b1110011
+
+# 立即数格式，独热编码与 utils.ImmType 相同
+IMM_R = 0b000001
+IMM_I = 0b000010
+IMM_S = 0b000100
+IMM_B = 0b001000
+IMM_U = 0b010000
+IMM_J = 0b100000
+
+# 停机指令：ecall / ebreak / 0xFE000FA3（sb x0, -1(x0)，写 0xFFFFFFFF）
+HALT_INSTS = (0x00000073, 0x00100073, 0xFE000FA3)
+
+NOP_INST = 0x00000013
+
+# 计数器 CSR（Zicntr / Zihpm），高 32 位的地址为低 32 位加 CSR_HIGH_OFFSET
+CSR_CYCLE = 0xC00
+CSR_TIME = 0xC01
+CSR_INSTRET = 0xC02
+CSR_HPMCOUNTER3 = 0xC03
+CSR_HIGH_OFFSET = 0x80
+
+# 每项为 (名称, opcode, funct3, funct7, 立即数格式, 是否写回 rd)
+# funct3 / funct7 为 None 表示译码时不检查该字段
+ENCODINGS = [
+    # RInst
+    ('add', OPCODE_R_TYPE, 0x0, 0x00, IMM_R, True),
+    ('sub', OPCODE_R_TYPE, 0x0, 0x20, IMM_R, True),
+    ('sll', OPCODE_R_TYPE, 0x1, 0x00, IMM_R, True),
+    ('slt', OPCODE_R_TYPE, 0x2, 0x00, IMM_R, True),
+    ('sltu', OPCODE_R_TYPE, 0x3, 0x00, IMM_R, True),
+    ('xor', OPCODE_R_TYPE, 0x4, 0x00, IMM_R, True),
+    ('srl', OPCODE_R_TYPE, 0x5, 0x00, IMM_R, True),
+    ('sra', OPCODE_R_TYPE, 0x5, 0x20, IMM_R, True),
+    ('or', OPCODE_R_TYPE, 0x6, 0x00, IMM_R, True),
+    ('and', OPCODE_R_TYPE, 0x7, 0x00, IMM_R, True),
+
+    # M 扩展
+    ('mul', OPCODE_R_TYPE, 0x0, 0x01, IMM_R, True),
+    ('mulh', OPCODE_R_TYPE, 0x1, 0x01, IMM_R, True),
+    ('mulhsu', OPCODE_R_TYPE, 0x2, 0x01, IMM_R, True),
+    ('mulhu', OPCODE_R_TYPE, 0x3, 0x01, IMM_R, True),
+    ('div', OPCODE_R_TYPE, 0x4, 0x01, IMM_R, True),
+    ('divu', OPCODE_R_TYPE, 0x5, 0x01, IMM_R, True),
+    ('rem', OPCODE_R_TYPE, 0x6, 0x01, IMM_R, True),
+    ('remu', OPCODE_R_TYPE, 0x7, 0x01, IMM_R, True),
+
+    # IInst
+    ('addi', OPCODE_I_TYPE, 0x0, None, IMM_I, True),
+    ('slti', OPCODE_I_TYPE, 0x2, None, IMM_I, True),
+    ('sltiu', OPCODE_I_TYPE, 0x3, None, IMM_I, True),
+    ('xori', OPCODE_I_TYPE, 0x4, None, IMM_I, True),
+    ('ori', OPCODE_I_TYPE, 0x6, None, IMM_I, True),
+    ('andi', OPCODE_I_TYPE, 0x7, None, IMM_I, True),
+    ('slli', OPCODE_I_TYPE, 0x1, None, IMM_I, True),
+    ('srli', OPCODE_I_TYPE, 0x5, 0x00, IMM_I, True),
+    ('srai', OPCODE_I_TYPE, 0x5, 0x20, IMM_I, True),
+
+    # Load
+    ('lb', OPCODE_LOAD, 0x0, None, IMM_I, True),
+    ('lh', OPCODE_LOAD, 0x1, None, IMM_I, True),
+    ('lw', OPCODE_LOAD, 0x2, None, IMM_I, True),
+    ('lbu', OPCODE_LOAD, 0x4, None, IMM_I, True),
+    ('lhu', OPCODE_LOAD, 0x5, None, IMM_I, True),
+
+    # Store
+    ('sb', OPCODE_STORE, 0x0, None, IMM_S, False),
+    ('sh', OPCODE_STORE, 0x1, None, IMM_S, False),
+    ('sw', OPCODE_STORE, 0x2, None, IMM_S, False),
+
+    # BInst
+    ('beq', OPCODE_BRANCH, 0x0, None, IMM_B, False),
+    ('bne', OPCODE_BRANCH, 0x1, None, IMM_B, False),
+    ('blt', OPCODE_BRANCH, 0x4, None, IMM_B, False),
+    ('bge', OPCODE_BRANCH, 0x5, None, IMM_B, False),
+    ('bltu', OPCODE_BRANCH, 0x6, None, IMM_B, False),
+    ('bgeu', OPCODE_BRANCH, 0x7, None, IMM_B, False),
+
+    # 跳转与高位立即数
+    ('jal', OPCODE_JAL, None, None, IMM_J, True),
+    ('jalr', OPCODE_JALR, 0x0, None, IMM_I, True),
+    ('lui', OPCODE_LUI, None, None, IMM_U, True),
+    ('auipc', OPCODE_AUIPC, None, None, IMM_U, True),
+
+    # 系统级指令
+    ('ecall', OPCODE_SYSTEM, 0x0, 0x00, IMM_I, False),
+    ('ebreak', OPCODE_SYSTEM, 0x0, 0x00, IMM_I, False),
+
+    # Zicntr / Zihpm
+    ('csrrs', OPCODE_SYSTEM, 0x2, None, IMM_I, True),
+    ('csrrc', OPCODE_SYSTEM, 0x3, None, IMM_I, True),
+    ('csrrsi', OPCODE_SYSTEM, 0x6, None, IMM_I, True),
+    ('csrrci', OPCODE_SYSTEM, 0x7, None, IMM_I, True),
+]
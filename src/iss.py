@@ -0,0 +1,367 @@
+import sys
+import json
+import argparse
+from array import array
+
+from .isa import ENCODINGS, HALT_INSTS, NOP_INST, OPCODE_I_TYPE, IMM_R, IMM_I, IMM_S, IMM_B, IMM_U, IMM_J
+from .isa import CSR_CYCLE, CSR_TIME, CSR_INSTRET, CSR_HIGH_OFFSET
+from .memory_map import MemoryMap, read_word_image
+from .trace import read_commit_trace, first_mismatch
+
+# 纯 Python 指令集模拟器（golden model），用于与 CPU 的提交记录（COMMIT，见 trace.py）做差分比对
+# 只依赖 isa.py / memory_map.py / trace.py 的软件部分，不需要 assassyn
+# 译码按 isa.ENCODINGS（与 instruction_table 一致）建立 (opcode, funct3, funct7) 查找表
+# 每个 PC 第一次执行时译码并编译为一个闭包（处理函数），rd / rs1 / imm / 下一条 PC 等都在闭包里预先算好，
+#   之后执行该 PC 只需查一次 {pc: 处理函数} 并调用，处理函数返回下一条 PC
+#   程序与数据共用一块存储器时，store 使被写字上已编译的处理函数失效（自修改代码）
+# 内存为按字寻址的 array('I')，与 SRAM 一样按 MemoryMap 翻译地址（默认取 (addr >> 2) 的低 depth_log 位）；寄存器堆为长度 32 的 list
+#   稠密映射时 load / store 在处理函数中直接截取地址低位，不经过 MemoryMap.index
+# 停机条件与 ID 阶段一致：ecall / ebreak / 0xFE000FA3；指令字 0 视为 NOP
+# 计数器 CSR：ISS 没有时序，cycle / time 按每周期退休一条计算（与 instret 相同），hpmcounter 读出 0
+# 哈佛模式的数据存储器（workload.data）单独传入；稀疏映射时按与 CPU 相同的 MemoryMap 翻译地址
+# 用法：python -m src.iss <workload.exe> [raw.log] [--data workload.data] [--regions JSON] [--pc ADDR]
+#   给出 raw.log 时报告写寄存器的提交记录中第一处分歧；COMMIT 在 log_level="trace" 起输出，
+#   顺序流水线、双发射（lane 1）与乱序后端（ROB）格式相同
+
+MASK32 = 0xFFFFFFFF
+
+def _signed(x):
+    return x - (1 << 32) if x & 0x80000000 else x
+
+def _sext(x, bits):
+    sign = 1 << (bits - 1)
+    return ((x & (sign - 1)) - (x & sign)) & MASK32
+
+def _imm_i(inst):
+    return _sext(inst >> 20, 12)
+
+def _imm_s(inst):
+    return _sext(((inst >> 25) << 5) | ((inst >> 7) & 0x1F), 12)
+
+def _imm_b(inst):
+    imm = (((inst >> 31) & 1) << 12) | (((inst >> 7) & 1) << 11) | (((inst >> 25) & 0x3F) << 5) | (((inst >> 8) & 0xF) << 1)
+    return _sext(imm, 13)
+
+def _imm_u(inst):
+    return inst & 0xFFFFF000
+
+def _imm_j(inst):
+    imm = (((inst >> 31) & 1) << 20) | (((inst >> 12) & 0xFF) << 12) | (((inst >> 20) & 1) << 11) | (((inst >> 21) & 0x3FF) << 1)
+    return _sext(imm, 21)
+
+# 按立即数格式（utils.ImmType 的独热编码）索引，predecode.py 也用它生成预译码映像
+IMM_DECODERS = {
+    IMM_R: lambda inst: 0,
+    IMM_I: _imm_i,
+    IMM_S: _imm_s,
+    IMM_B: _imm_b,
+    IMM_U: _imm_u,
+    IMM_J: _imm_j,
+}
+
+def _build_decode_map():
+    # {(opcode, funct3, funct7): (名称, imm 译码函数, 是否写回)}，None 表示不检查该字段
+    decode_map = {}
+    for name, opcode, funct3, funct7, imm_type, writes_back in ENCODINGS:
+        decode_map.setdefault((opcode, funct3, funct7), (name, IMM_DECODERS[imm_type], writes_back))
+    return decode_map
+
+def _div(a, b):
+    if b == 0:
+        return MASK32
+    a, b = _signed(a), _signed(b)
+    if a == -(1 << 31) and b == -1:
+        return a & MASK32
+    q = abs(a) // abs(b)
+    return (q if (a < 0) == (b < 0) else -q) & MASK32
+
+def _rem(a, b):
+    if b == 0:
+        return a
+    sa, sb = _signed(a), _signed(b)
+    if sa == -(1 << 31) and sb == -1:
+        return 0
+    r = abs(sa) % abs(sb)
+    return (-r if sa < 0 else r) & MASK32
+
+# 寄存器-寄存器 / 寄存器-立即数运算，操作数均为 32 位无符号整数
+ALU = {
+    'add': lambda a, b: (a + b) & MASK32,
+    'sub': lambda a, b: (a - b) & MASK32,
+    'sll': lambda a, b: (a << (b & 0x1F)) & MASK32,
+    'slt': lambda a, b: int(_signed(a) < _signed(b)),
+    'sltu': lambda a, b: int(a < b),
+    'xor': lambda a, b: a ^ b,
+    'srl': lambda a, b: a >> (b & 0x1F),
+    'sra': lambda a, b: (_signed(a) >> (b & 0x1F)) & MASK32,
+    'or': lambda a, b: a | b,
+    'and': lambda a, b: a & b,
+    'mul': lambda a, b: (a * b) & MASK32,
+    'mulh': lambda a, b: ((_signed(a) * _signed(b)) >> 32) & MASK32,
+    'mulhsu': lambda a, b: ((_signed(a) * b) >> 32) & MASK32,
+    'mulhu': lambda a, b: (a * b) >> 32,
+    'div': _div,
+    'divu': lambda a, b: a // b if b else MASK32,
+    'rem': _rem,
+    'remu': lambda a, b: a % b if b else a,
+}
+for _name in ('add', 'slt', 'sltu', 'xor', 'or', 'and', 'sll', 'srl', 'sra'):
+    ALU[_name + 'i'] = ALU[_name]
+
+BRANCH = {
+    'beq': lambda a, b: a == b,
+    'bne': lambda a, b: a != b,
+    'blt': lambda a, b: _signed(a) < _signed(b),
+    'bge': lambda a, b: _signed(a) >= _signed(b),
+    'bltu': lambda a, b: a < b,
+    'bgeu': lambda a, b: a >= b,
+}
+
+# load: (字节数, 是否符号扩展)；store: 字节数
+LOAD = {'lb': (1, True), 'lh': (2, True), 'lw': (4, False), 'lbu': (1, False), 'lhu': (2, False)}
+STORE = {'sb': 1, 'sh': 2, 'sw': 4}
+
+
+DECODE_MAP = _build_decode_map()
+
+def decode(inst):
+    # 返回 (名称, rd, rs1, rs2, imm)；不写回的指令 rd 为 0，无法识别时名称为 None
+    opcode = inst & 0x7F
+    funct3 = (inst >> 12) & 0x7
+    funct7 = inst >> 25
+    hit = (
+        DECODE_MAP.get((opcode, funct3, funct7))
+        or DECODE_MAP.get((opcode, funct3, None))
+        or DECODE_MAP.get((opcode, None, None))
+    )
+    if hit is None:
+        return None, 0, 0, 0, 0
+    name, imm_decoder, writes_back = hit
+    rd = (inst >> 7) & 0x1F if writes_back else 0
+    return name, rd, (inst >> 15) & 0x1F, (inst >> 20) & 0x1F, imm_decoder(inst)
+
+
+def load_image(path, depth_log=16, mem_map=None):
+    # workload.exe / workload.data：每行一个 32 位十六进制字，"//" 之后为注释
+    # mem_map 为 MemoryMap 时映像为它紧凑排布后的内容（即 load_test_case 写出的文件），长度为其字数
+    words = mem_map.words if mem_map is not None else 1 << depth_log
+    mem = array('I', bytes(4 * words))
+    image = array('I')
+    image.frombytes(read_word_image(path))
+    n = min(len(image), len(mem))
+    mem[:n] = image[:n]
+    return mem
+
+
+class _Trap(Exception):
+    # 需要 run() 循环本身处理的指令从处理函数中抛出：停机（参数为 None）与读计数器（参数为 (rd, csr, 下一条 PC)）
+    pass
+
+
+class ISS:
+    # mem 为取指用的程序存储器；data_mem 为哈佛模式的数据存储器（workload.data），为 None 时与程序共用 mem
+    # mem_map 与 CPU 的 build_cpu(mem_regions=...) 一致时按同样的方式翻译地址，越界访问报错；为 None 时截取低 depth_log 位
+    def __init__(self, mem, depth_log=16, pc=0, data_mem=None, mem_map=None):
+        self.mem = mem
+        self.data_mem = mem if data_mem is None else data_mem
+        self.mem_map = mem_map if mem_map is not None else MemoryMap.dense_map(depth_log)
+        self.regs = [0] * 32
+        self.pc = pc
+        self.instret = 0
+        self.halted = False
+        self.code = {}
+        self.writes = []
+
+    def locate(self, addr, pc):
+        index = self.mem_map.index(addr)
+        if index is None:
+            raise ValueError(f"Unmapped access at 0x{addr:x} (PC=0x{pc:x})")
+        return index
+
+    def read_csr(self, csr, instret):
+        value = {CSR_CYCLE: instret, CSR_TIME: instret, CSR_INSTRET: instret}.get(csr & ~CSR_HIGH_OFFSET, 0)
+        return value >> 32 if csr & CSR_HIGH_OFFSET else value & MASK32
+
+    def compile(self, pc):
+        # 译码 pc 处的指令，返回执行它的处理函数（无参数，返回下一条 PC），并记入 self.code
+        inst = self.mem[self.locate(pc, pc)]
+        if inst in HALT_INSTS:
+            def handler():
+                raise _Trap(None)
+            self.code[pc] = handler
+            return handler
+
+        name, rd, rs1, rs2, imm = decode(inst or NOP_INST)
+        if name is None:
+            raise ValueError(f"Unknown instruction 0x{inst:08x} at PC=0x{pc:x}")
+
+        regs, dmem, append, locate = self.regs, self.data_mem, self.writes.append, self.locate
+        code = self.code
+        shared = dmem is self.mem
+        dense = self.mem_map.dense
+        mask = (1 << self.mem_map.depth_log) - 1
+        npc = (pc + 4) & MASK32
+
+        if name in ALU:
+            op = ALU[name]
+            use_imm = (inst & 0x7F) == OPCODE_I_TYPE
+            if rd == 0:
+                def handler():
+                    return npc
+            elif name == 'addi':
+                # 最常见的两条运算指令不经过 ALU 函数调用
+                def handler():
+                    value = regs[rd] = (regs[rs1] + imm) & MASK32
+                    append((pc, rd, value))
+                    return npc
+            elif name == 'add':
+                def handler():
+                    value = regs[rd] = (regs[rs1] + regs[rs2]) & MASK32
+                    append((pc, rd, value))
+                    return npc
+            elif use_imm:
+                def handler():
+                    value = regs[rd] = op(regs[rs1], imm)
+                    append((pc, rd, value))
+                    return npc
+            else:
+                def handler():
+                    value = regs[rd] = op(regs[rs1], regs[rs2])
+                    append((pc, rd, value))
+                    return npc
+
+        elif name in BRANCH:
+            target = (pc + imm) & MASK32
+            if name == 'beq':
+                def handler():
+                    return target if regs[rs1] == regs[rs2] else npc
+            elif name == 'bne':
+                def handler():
+                    return target if regs[rs1] != regs[rs2] else npc
+            else:
+                op = BRANCH[name]
+                def handler():
+                    return target if op(regs[rs1], regs[rs2]) else npc
+
+        elif name in LOAD:
+            size, signed = LOAD[name]
+            value_mask = (1 << (size << 3)) - 1
+            sign = (1 << ((size << 3) - 1)) if signed else 0
+            extend = MASK32 ^ value_mask
+            def handler():
+                addr = (regs[rs1] + imm) & MASK32
+                value = (dmem[(addr >> 2) & mask if dense else locate(addr, pc)] >> ((addr & 3) << 3)) & value_mask
+                if value & sign:
+                    value |= extend
+                if rd:
+                    regs[rd] = value
+                    append((pc, rd, value))
+                return npc
+
+        elif name in STORE:
+            size_mask = (1 << (STORE[name] << 3)) - 1
+            def handler():
+                addr = (regs[rs1] + imm) & MASK32
+                index = (addr >> 2) & mask if dense else locate(addr, pc)
+                shift = (addr & 3) << 3
+                field = size_mask << shift
+                dmem[index] = (dmem[index] & ~field & MASK32) | ((regs[rs2] << shift) & field)
+                if shared:
+                    code.pop(addr & ~3, None)
+                return npc
+
+        elif name == 'jal':
+            target = (pc + imm) & MASK32
+            def handler():
+                if rd:
+                    regs[rd] = npc
+                    append((pc, rd, npc))
+                return target
+
+        elif name == 'jalr':
+            def handler():
+                target = (regs[rs1] + imm) & ~1 & MASK32
+                if rd:
+                    regs[rd] = npc
+                    append((pc, rd, npc))
+                return target
+
+        elif name in ('lui', 'auipc'):
+            value = imm if name == 'lui' else (pc + imm) & MASK32
+            def handler():
+                if rd:
+                    regs[rd] = value
+                    append((pc, rd, value))
+                return npc
+
+        elif name.startswith('csr'):
+            csr = imm & 0xFFF
+            def handler():
+                raise _Trap((rd, csr, npc))
+
+        else:
+            def handler():
+                return npc
+
+        code[pc] = handler
+        return handler
+
+    def run(self, max_insts=None):
+        # 执行到停机（或 max_insts 条），返回退休的写回记录 [(pc, rd, value)]
+        # 内层循环只做 {pc: 处理函数} 查找与调用；停机与读计数器以 _Trap 跳出，在外层处理后继续
+        get, compile, regs, writes = self.code.get, self.compile, self.regs, self.writes
+        pc = self.pc
+        limit = (1 << 62) if max_insts is None else max_insts
+        count = 0
+        while count < limit:
+            try:
+                for count in range(count, limit):
+                    pc = (get(pc) or compile(pc))()
+                count = limit
+            except _Trap as trap:
+                if trap.args[0] is None:
+                    self.halted = True
+                    break
+                rd, csr, next_pc = trap.args[0]
+                if rd:
+                    value = regs[rd] = self.read_csr(csr, self.instret + count)
+                    writes.append((pc, rd, value))
+                pc = next_pc
+                count += 1
+
+        self.pc = pc
+        self.instret += count
+        trace = writes[:]
+        writes.clear()
+        return trace
+
+
+def commit_writes(records):
+    # 提交记录中写寄存器（rd 非 0）的部分 [(pc, rd, value)]，与 ISS.run() 的返回值一一对应（生成器）
+    return ((r.pc, r.rd, r.wdata) for r in records if r.rd != 0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Golden ISS, optionally diffed against a CPU commit trace")
+    parser.add_argument("exe", help="program image (workload.exe)")
+    parser.add_argument("log", nargs="?", help="CPU log built with log_level trace or debug")
+    parser.add_argument("--data", help="Harvard data image (workload.data); defaults to the program image")
+    parser.add_argument("--regions", help="mem_regions as JSON, e.g. [[0, 1024], [3072, 1024]]")
+    parser.add_argument("--depth-log", type=int, default=16)
+    parser.add_argument("--pc", type=lambda x: int(x, 0), default=0)
+    args = parser.parse_args()
+
+    mem_map = MemoryMap(json.loads(args.regions)) if args.regions else None
+    mem = load_image(args.exe, args.depth_log, mem_map)
+    data_mem = load_image(args.data, args.depth_log, mem_map) if args.data else None
+    iss = ISS(mem, args.depth_log, args.pc, data_mem, mem_map)
+    golden = iss.run()
+    print(f"ISS: retired {iss.instret} instructions, {len(golden)} writes, halted={iss.halted}")
+    if args.log:
+        diff = first_mismatch(golden, commit_writes(read_commit_trace(args.log)))
+        if diff is None:
+            print("ISS: commit trace matches")
+        else:
+            i, expected, actual = diff
+            print(f"ISS: first divergence at write #{i}: expected {expected}, got {actual}")
+            sys.exit(1)
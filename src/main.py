@@ -1,7 +1,13 @@
 import os
+import sys
+import json
 import shutil
+import hashlib
+import subprocess
+from itertools import chain
 
 from assassyn.frontend import *
+from .utils import debug_log, set_log_level, pipeline_register_bits, REDIRECT_WIDTH
 from assassyn.backend import elaborate, config
 from assassyn import utils
 
@@ -9,14 +15,34 @@ from .IF import Fetcher, FetcherImpl
 from .ID import Decoder, DecoderImpl
 from .EX import Executor
 from .MA import MemoryAcess
-from .WB import WriteBack
+from .WB import WriteBack, RegFileWritePort
 from .bypass import Bypass
+from .ooo import OoOCore, ReorderBuffer, ReservationStation, LoadStoreQueue, RenameTable
 from .memory_user import MemoryUser
+from .predictor import BranchPredictor, ReturnAddressStack
+from .muldiv import MulDivUnit
+from .store_buffer import StoreBuffer
+from .icache import ICache
+from .dcache import DCache
+from .perf import PerfCounters, parse_summary, SUMMARY_TAG
+from .memory_map import MemoryMap, read_word_image, write_word_image
+from .predecode import PREDECODE_WIDTH, write_predecoded_image
+from workloads.convert_hex import load_segments
+from .trace import parse_commit_lines, first_mismatch
 
 current_path = os.path.dirname(os.path.abspath(__file__))
 workspace = os.path.join(current_path, ".workspace")
-
-def load_test_case(case_name, source_subdir="workloads"):
+# 编译缓存，load_test_case 会清空 workspace，因此放在 workspace 之外
+sim_cache = os.path.join(current_path, ".sim_cache")
+
+def load_test_case(case_name, source_subdir="workloads", workspace_dir=workspace, mem_regions=None, extra_regions=(), predecode=False, depth_log=16):
+    # 程序映像：<case>.elf（按段地址装入）或 <case>.exe（从地址 0 开始的纯十六进制字）
+    # 数据映像：<case>.data 为纯十六进制字时作为哈佛模式数据存储器的初始内容（从地址 0 开始），
+    #   为 verilog hex（以 @ 开头，即 .exe 的来源）时忽略，数据存储器与程序使用同一映像
+    # mem_regions 为 None 时按原来的稠密布局输出，映像必须落在 2^depth_log 字以内；为区间列表时按 MemoryMap 紧凑排布；
+    #   为 "auto" 时按实际用到的段加上 extra_regions 建立区间，extra_regions 必须给出栈所在的区间
+    # predecode=True 时额外输出预译码的程序映像 workload.pre（见 predecode.py），供 build_cpu(predecode=True) 使用
+    # 返回实际使用的区间列表（稠密布局时为 None），供 build_cpu(mem_regions=...) 使用
 
     current_file_path = os.path.abspath(__file__)
     src_dir = os.path.dirname(current_file_path)
@@ -24,8 +50,6 @@ def load_test_case(case_name, source_subdir="workloads"):
 
     source_dir = os.path.join(project_root, source_subdir)
 
-    workspace_dir = os.path.join(src_dir, ".workspace")
-
     print(f"[*] Source Dir: {source_dir}")
     print(f"[*] Workspace : {workspace_dir}")
 
@@ -33,83 +57,292 @@ def load_test_case(case_name, source_subdir="workloads"):
         shutil.rmtree(workspace_dir)
     os.makedirs(workspace_dir)
 
+    src_elf = os.path.join(source_dir, f"{case_name}.elf")
     src_exe = os.path.join(source_dir, f"{case_name}.exe")
+    src_data = os.path.join(source_dir, f"{case_name}.data")
 
     dst_exe = os.path.join(workspace_dir, f"workload.exe")
-    # dst_mem = os.path.join(workspace_dir, f"workload.data")
-
-    print(f"!!! SRC: {src_exe}, DST: {dst_exe}")
-
-    if os.path.exists(src_exe):
-        shutil.copy(src_exe, dst_exe)
-        print(f"  -> Copied Instruction: {case_name}.exe ==> workload.exe")
+    dst_mem = os.path.join(workspace_dir, f"workload.data")
+
+    if os.path.exists(src_elf):
+        segments = load_segments(src_elf)
+        print(f"  -> Loaded ELF: {case_name}.elf, {len(segments)} segments")
+    elif os.path.exists(src_exe):
+        segments = {0: read_word_image(src_exe)}
+        print(f"  -> Loaded Instruction: {case_name}.exe")
     else:
         raise FileNotFoundError(f"Test case not found: {src_exe}")
 
-    # with open(dst_mem, "w") as f:
-    #    pass
+    data_segments = segments
+    if os.path.exists(src_data):
+        with open(src_data) as f:
+            is_verilog_hex = f.readline().startswith("@")
+        if not is_verilog_hex:
+            data_segments = {0: read_word_image(src_data)}
+            print(f"  -> Loaded Data: {case_name}.data")
+
+    # 程序与数据两块存储器共用同一套地址翻译，区间取两者的并集
+    used = list(segments.items()) + list(data_segments.items())
+    if mem_regions == "auto":
+        # 栈不在任何段里，地址也只能由调用方给出（如 multiply 的 SP=0x1000），不给出时栈访问会越界
+        if not extra_regions:
+            raise ValueError('mem_regions="auto" requires extra_regions to cover the stack, e.g. [(0xC00, 0x400)]')
+        mem_regions = MemoryMap.from_segments(used, extra=extra_regions).to_json()
+    if mem_regions is None:
+        # 稠密布局：映像从地址 0 连续排布，与直接截取地址低位的 SRAM 一致
+        # 超出 SRAM 的映像（如链接到 0x80000000 的 ELF）会被截断地址回绕，也会分配巨大的缓冲区，直接拒绝
+        end = max(addr + len(seg) for addr, seg in used)
+        if end > 4 << depth_log:
+            raise ValueError(
+                f"{case_name}: image ends at 0x{end:x}, beyond the dense {4 << depth_log}-byte SRAM; "
+                f"use mem_regions=\"auto\" (with extra_regions for the stack) for sparse images"
+            )
+        layout = MemoryMap([(0, end)])
+    else:
+        layout = MemoryMap(mem_regions)
+
+    program = layout.pack(segments)
+    write_word_image(dst_exe, program)
+    write_word_image(dst_mem, layout.pack(data_segments))
+    print(f"  -> Wrote {dst_exe} and {dst_mem} ({layout.words} words)")
+    if predecode:
+        dst_pre = os.path.join(workspace_dir, f"workload.pre")
+        write_predecoded_image(dst_pre, program)
+        print(f"  -> Wrote {dst_pre} ({PREDECODE_WIDTH}-bit words)")
+    return mem_regions
 
 class Driver(Module):
     def __init__(self):
         super().__init__(ports={})
     
     @module.combinational
-    def build(self, fetcher: Module):
-        log("Driver!")
+    def build(self, fetcher: Module, perf: PerfCounters = None):
+        debug_log("Driver!")
+        if perf is not None:
+            perf.tick()
         fetcher.async_called()
 
-def build_cpu(depth_log):
+def build_cpu(
+    depth_log,
+    harvard=False,
+    predictor_bits=0,
+    ras_bits=0,
+    early_jump=False,
+    static_branch=False,
+    mul_bits_per_cycle=8,
+    div_bits_per_cycle=1,
+    store_buffer_bits=0,
+    icache_set_bits=0,
+    icache_way_bits=0,
+    icache_line_bits=2,
+    imem_latency=0,
+    dcache_set_bits=0,
+    dcache_way_bits=0,
+    dcache_line_bits=2,
+    dcache_replacement="lru",
+    dmem_latency=0,
+    log_level="debug",
+    workspace_dir=workspace,
+    mem_regions=None,
+    dual_issue=False,
+    ooo_rob_bits=0,
+    ooo_rs_bits=2,
+    ooo_lsq_bits=2,
+    predecode=False,
+    compact_ctrl=False,
+):
+    # harvard=True 时指令与数据使用两块独立的 SRAM（均由 workload 镜像初始化），
+    # 取指不再与 load/store 争用同一个端口
+    # predictor_bits > 0 时在 IF 阶段启用 2^predictor_bits 项的 BTB + BHT 分支预测器
+    # ras_bits > 0 时在 ID 阶段启用 2^ras_bits 项的返回地址栈
+    # early_jump=True 时 jal 在 ID 阶段重定向；static_branch=True 时向后的条件分支在 ID 阶段预测为跳转
+    # mul_bits_per_cycle / div_bits_per_cycle 为乘除法单元每周期处理的位数，决定 RV32M 指令的延迟
+    # store_buffer_bits > 0 时启用 2^store_buffer_bits 项写缓冲（需 harvard=True），store 不再 stall 流水线
+    # icache_set_bits > 0 时在取指前加入指令 cache（需 harvard=True）：2^icache_set_bits 组、2^icache_way_bits 路、
+    # 每行 2^icache_line_bits 个字，指令 SRAM 作为后备存储器，每次填充先等待 imem_latency 拍
+    # dcache_set_bits > 0 时加入写回、写分配的数据 cache（需 harvard=True，不能与写缓冲同时使用），
+    # dcache_replacement 为 "lru" 或 "random"，数据 SRAM 作为后备存储器，每次填充先等待 dmem_latency 拍
+    # log_level="perf" 时不生成调试日志，只保留停机与统计输出，显著加快仿真；各级别见 utils.LOG_LEVELS
+    # workspace_dir 为 workload 镜像所在目录，镜像路径会写进模拟器；为 "" 时写入相对路径 workload.exe 等，
+    # 由运行时的工作目录决定读哪份镜像（编译缓存按这种方式编译，见 shared_build_args）
+    # mem_regions 为 [(基址, 字节数)] 时 SRAM 只容纳这些区间（见 memory_map.py），depth_log 不再使用；
+    # 为 None 时为 2^depth_log 字的稠密 SRAM。哈佛模式下数据 SRAM 由 workload.data 初始化
+    # dual_issue=True 时为顺序双发射（需 harvard=True，不能与指令 cache / 返回地址栈 / ID 阶段预测同时使用）：
+    # 两个指令存储体同时读出 pc 与 pc+4，第二条为普通 ALU 指令且与第一条无相关时一同发射，
+    # 由 EX 中的第二个 ALU 执行，寄存器堆为 4 读 2 写
+    # ooo_rob_bits > 0 时使用乱序后端（见 ooo.py，需 harvard=True，不能与双发射 / 写缓冲 / 数据 cache 同时使用）：
+    # 2^ooo_rob_bits 项 ROB、2^ooo_rs_bits 项保留站、2^ooo_lsq_bits 项访存队列
+    # predecode=True 时指令 SRAM 由预译码映像 workload.pre 初始化（需 harvard=True，不能与指令 cache / 双发射同时使用），
+    # 每项带有控制字、立即数与分支标志，ID 不再查译码表
+    # compact_ctrl=True 时 ID->EX、EX->MEM 的级间记录中独热字段改为二进制编号，由 EX / MEM 在读出后译回独热码
+    set_log_level(log_level)
     sys_name = "rv32i_cpu"
     sys = SysBuilder(sys_name)
 
-    ram_path = os.path.join(workspace, f"workload.exe")
+    ram_path = os.path.join(workspace_dir, f"workload.exe")
+    data_path = os.path.join(workspace_dir, f"workload.data")
+    pre_path = os.path.join(workspace_dir, f"workload.pre")
     print("!!! RAM Path: ", ram_path)
+    reg_bits = pipeline_register_bits(compact_ctrl, dual_issue)
+    print("!!! Pipeline register bits:", ", ".join(f"{stage}={bits}" for stage, bits in reg_bits.items()),
+          f"(total {sum(reg_bits.values())})")
+
+    mem_map = MemoryMap.dense_map(depth_log) if mem_regions is None else MemoryMap(mem_regions)
 
     with sys:
-        cache = SRAM(width=32, depth=1 << depth_log, init_file=ram_path)
+        cache = SRAM(width=32, depth=1 << mem_map.depth_log, init_file=data_path if harvard else ram_path)
         cache.name = "cache"
 
+        icache = None
+        if predecode:
+            assert harvard, "predecode requires harvard=True"
+            assert icache_set_bits == 0 and not dual_issue, "predecode does not support icache or dual issue"
+            icache = SRAM(width=PREDECODE_WIDTH, depth=1 << mem_map.depth_log, init_file=pre_path)
+            icache.name = "icache"
+        elif harvard:
+            icache = SRAM(width=32, depth=1 << mem_map.depth_log, init_file=ram_path)
+            icache.name = "icache"
+
+        icache1 = None
+        if dual_issue:
+            assert harvard, "dual issue requires harvard=True"
+            assert icache_set_bits == 0, "dual issue does not support icache"
+            assert ras_bits == 0 and not early_jump and not static_branch, \
+                "dual issue does not support ID-stage prediction"
+            icache1 = SRAM(width=32, depth=1 << mem_map.depth_log, init_file=ram_path)
+            icache1.name = "icache1"
+
         reg_file = RegArray(Bits(32), 32)
 
-        branch_target = RegArray(Bits(32), 1)
+        branch_target = RegArray(Bits(REDIRECT_WIDTH), 1)
+
+        predictor = BranchPredictor(predictor_bits) if predictor_bits > 0 else None
+        ras = ReturnAddressStack(ras_bits) if ras_bits > 0 else None
+        muldiv = MulDivUnit(mul_bits_per_cycle, div_bits_per_cycle)
+        store_buffer = None
+        if store_buffer_bits > 0:
+            assert harvard, "store buffer requires harvard=True"
+            store_buffer = StoreBuffer(store_buffer_bits)
+        inst_cache = None
+        if icache_set_bits > 0:
+            assert harvard, "icache requires harvard=True"
+            inst_cache = ICache(icache_set_bits, icache_way_bits, icache_line_bits, imem_latency, mem_map=mem_map)
+        dcache = None
+        if dcache_set_bits > 0:
+            assert harvard, "dcache requires harvard=True"
+            assert store_buffer is None, "dcache and store buffer are mutually exclusive"
+            dcache = DCache(
+                dcache_set_bits, dcache_way_bits, dcache_line_bits, dmem_latency,
+                replacement=dcache_replacement, mem_map=mem_map,
+            )
+        ooo = ooo_rob_bits > 0
+        if ooo:
+            assert harvard, "out-of-order backend requires harvard=True"
+            assert not dual_issue, "out-of-order backend and dual issue are mutually exclusive"
+            assert store_buffer is None and dcache is None, "out-of-order backend does not support store buffer or dcache"
+            rob = ReorderBuffer(ooo_rob_bits)
+            rs = ReservationStation(ooo_rs_bits, ooo_rob_bits)
+            lsq = LoadStoreQueue(ooo_lsq_bits, ooo_rob_bits)
+            rat = RenameTable(ooo_rob_bits)
+        # cycle / instret / hpmcounter，供程序用 csrr 读取，停机时输出 PERF_SUMMARY
+        perf = PerfCounters()
+        stats = [unit for unit in (inst_cache, dcache, perf) if unit is not None]
 
         driver = Driver()
         fetcher = Fetcher()
         fetcher_impl = FetcherImpl()
         decoder = Decoder()
         decoder_impl = DecoderImpl()
-        executor = Executor()
-        memory_access = MemoryAcess()
-        write_back = WriteBack()
-        bypass = Bypass()
         memory_user = MemoryUser()
 
-        wb_rd, wb_bypass_data = write_back.build(reg_file = reg_file)
-
-        mem_rd, mem_bypass_data, mem_is_store = memory_access.build(
-            write_back = write_back, sram_dout = cache.dout
-        )
-
-        ex_rd, ex_bypass_data, ex_is_store, ex_is_load, ex_width, ex_rs2 = executor.build(
-            memory_access = memory_access,
-            branch_target = branch_target
-        )
-
-        pre_ctrl, rs1, rs2 = decoder.build(
-            icache_dout=cache.dout,
+        id_out = decoder.build(
+            icache_dout=inst_cache.dout if inst_cache is not None else (icache if harvard else cache).dout,
             reg_file=reg_file,
+            ras=ras,
+            early_jump=early_jump,
+            static_branch=static_branch,
+            icache1_dout=icache1.dout if dual_issue else None,
+            predecode=predecode,
         )
-
-        rs1_sel, rs2_sel, is_stall = bypass.build(
-            rs1_addr = rs1,
-            rs2_addr = rs2,
-            ex_dest_addr = ex_rd,
-            ex_is_load = ex_is_load,
-            ex_is_store = ex_is_store,
-            mem_dest_addr = mem_rd,
-            mem_is_store = mem_is_store,
-            wb_dest_addr = wb_rd,
-        )
+        pre_ctrl, rs1, rs2, id_redirect, id_target = id_out[:5]
+        lane1, rs1b, rs2b = id_out[5] if dual_issue else (None, None, None)
+
+        if ooo:
+            # 乱序后端直接驱动存储器端口，ID 不做旁路，stall 只来自 ROB / RS / LSQ 占满
+            executor = OoOCore(compact_ctrl)
+            is_stall, mem_req_addr, ex_is_load, ex_is_store, ex_rs2, ex_width = executor.build(
+                rob = rob,
+                rs = rs,
+                lsq = lsq,
+                rat = rat,
+                reg_file = reg_file,
+                branch_target = branch_target,
+                muldiv = muldiv,
+                sram_dout = cache.dout,
+                predictor = predictor,
+                perf = perf,
+                stats = stats,
+            )
+            rs1_sel = rs2_sel = rs1b_sel = rs2b_sel = None
+            ex_is_halt = ex_redirect = None
+            ex_bypass_data = mem_bypass_data = wb_bypass_data = None
+            ex_data1 = mem_data1 = wb_data1 = None
+        else:
+            executor = Executor(dual_issue, compact_ctrl)
+            memory_access = MemoryAcess(dual_issue, compact_ctrl)
+            write_back = WriteBack(dual_issue)
+            bypass = Bypass()
+
+            # 双发射时各级额外返回 lane 1 的 (目的寄存器, 结果)，未启用时为 (None, None)
+            wb_out = write_back.build(reg_file = reg_file, stats = stats, perf = perf)
+            wb_rd, wb_bypass_data = wb_out[:2]
+            wb_rd1, wb_data1 = wb_out[2] if dual_issue else (None, None)
+            if dual_issue:
+                RegFileWritePort().build(reg_file = reg_file, rd = wb_rd1, data = wb_data1)
+
+            mem_out = memory_access.build(
+                write_back = write_back,
+                sram_dout = dcache.dout if dcache is not None else cache.dout,
+                store_buffer = store_buffer,
+            )
+            mem_rd, mem_bypass_data, mem_is_store = mem_out[:3]
+            mem_rd1, mem_data1 = mem_out[3] if dual_issue else (None, None)
+
+            ex_out = executor.build(
+                memory_access = memory_access,
+                branch_target = branch_target,
+                muldiv = muldiv,
+                predictor = predictor,
+                dcache = dcache,
+                perf = perf,
+            )
+            ex_rd, ex_bypass_data, ex_is_store, ex_is_load, ex_width, ex_rs2, ex_md_stall, ex_is_halt, ex_redirect = ex_out[:9]
+            ex_rd1, ex_data1 = ex_out[9] if dual_issue else (None, None)
+
+            bypass_out = bypass.build(
+                rs1_addr = rs1,
+                rs2_addr = rs2,
+                ex_dest_addr = ex_rd,
+                ex_is_load = ex_is_load,
+                ex_is_store = ex_is_store,
+                mem_dest_addr = mem_rd,
+                mem_is_store = mem_is_store,
+                wb_dest_addr = wb_rd,
+                ex_md_stall = ex_md_stall,
+                harvard = harvard,
+                store_buffer = store_buffer,
+                dcache = dcache,
+                perf = perf,
+                rs1b_addr = rs1b,
+                rs2b_addr = rs2b,
+                ex_dest1_addr = ex_rd1,
+                mem_dest1_addr = mem_rd1,
+                wb_dest1_addr = wb_rd1,
+            )
+            rs1_sel, rs2_sel, is_stall = bypass_out[:3]
+            rs1b_sel, rs2b_sel = bypass_out[3:] if dual_issue else (None, None)
+
+            mem_req_addr = ex_bypass_data # alu_res, 这里也是旁路传来的内存地址
 
         decoder_impl.build(
             ctrl = pre_ctrl,
@@ -121,6 +354,16 @@ def build_cpu(depth_log):
             mem_bypass = mem_bypass_data,
             wb_bypass = wb_bypass_data,
             branch_target_reg = branch_target,
+            ras = ras,
+            ex_redirect = ex_redirect,
+            perf = perf,
+            lane1 = lane1,
+            rs1b_ex_type = rs1b_sel,
+            rs2b_ex_type = rs2b_sel,
+            ex_bypass1 = ex_data1,
+            mem_bypass1 = mem_data1,
+            wb_bypass1 = wb_data1,
+            compact = compact_ctrl,
         )
 
         pc_reg, last_pc_reg, rubbish = fetcher.build()
@@ -130,47 +373,98 @@ def build_cpu(depth_log):
             decoder = decoder,
             is_stall = is_stall,
             branch_target_reg = branch_target,
-            rubbish=rubbish
+            rubbish=rubbish,
+            predictor=predictor,
+            id_redirect=id_redirect,
+            id_target=id_target,
+            inst_cache=inst_cache,
+            dual_issue=dual_issue,
         )
 
         memory_user.build(
             if_addr = if_addr, # fetcher 阶段的 pc
-            mem_addr = ex_bypass_data, # alu_res, 这里也是旁路传来的内存地址
+            mem_addr = mem_req_addr,
             ex_is_load = ex_is_load,
             ex_is_store = ex_is_store,
+            ex_is_halt = ex_is_halt,
             wdata = ex_rs2,
             width = ex_width,
             sram = cache,
+            icache = icache,
+            store_buffer = store_buffer,
+            inst_cache = inst_cache,
+            dcache = dcache,
+            mem_map = mem_map,
+            strict_map = not ooo,
+            icache1 = icache1,
+            icache_width = PREDECODE_WIDTH if predecode else 32,
         )
 
         driver.build(
-            fetcher = fetcher
+            fetcher = fetcher,
+            perf = perf,
         )
     
     return sys
 
-if __name__ == "__main__":
-
-    load_test_case("array_test1")
-
-    sys_builder = build_cpu(depth_log=16)
-
-    circ_path = os.path.join(workspace, f"circ.txt")
-    with open(circ_path, "w") as f:
-        print(sys_builder, file=f)
-
-    print(f"🚀 Compiling system: {sys_builder.name}...")
-    
-    cfg = config(
-        verilog=True,
+def write_perf_report(reports, path):
+    # reports: {"simulator": raw_log, "verilator": raw_log}
+    summary = {name: parse_summary(raw) for name, raw in reports.items()}
+    with open(path, "w") as f:
+        json.dump(summary, f, indent=2)
+    for name, perf in summary.items():
+        if perf is None:
+            print(f"[perf] {name}: no PERF_SUMMARY found")
+        else:
+            print(f"[perf] {name}: cycles={perf['cycles']} instret={perf['instret']} cpi={perf['cpi']}")
+    return summary
+
+def sim_config(verilog=True):
+    return config(
+        verilog=verilog,
         sim_threshold=100000,
         resource_base="",
         idle_threshold=100000,
     )
-    simulator_path, verilog_path = elaborate(sys_builder, **cfg)
 
-    print(simulator_path)
-    print(verilog_path)
+def build_key(build_args, verilog=True):
+    # 设计只由 build_cpu 的参数和 src 下的源码决定；workload 只是 SRAM 的初始化文件，
+    # 模拟器与 Verilog 都在运行时从工作目录下的 workload.exe 读取，workload 及其所在目录都不参与哈希
+    h = hashlib.sha256()
+    h.update(json.dumps({"build_args": build_args, "verilog": verilog}, sort_keys=True).encode())
+    for name in sorted(os.listdir(current_path)):
+        if name.endswith(".py"):
+            with open(os.path.join(current_path, name), "rb") as f:
+                h.update(name.encode())
+                h.update(f.read())
+    return h.hexdigest()[:16]
+
+def shared_build_args(build_args, mem_regions=None):
+    # 编译缓存使用的参数：镜像按相对路径读取，同一配置的所有 workload、所有并行任务共用一次编译
+    return dict(build_args, workspace_dir="", mem_regions=mem_regions)
+
+def get_cached_build(build_args, verilog=True):
+    # 同一配置只 elaborate + 编译一次，之后直接复用缓存中的模拟器与 Verilog
+    key = build_key(build_args, verilog)
+    entry_dir = os.path.join(sim_cache, key)
+    manifest_path = os.path.join(entry_dir, "manifest.json")
+
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+        if os.path.exists(manifest["binary"]):
+            print(f"[cache] Reusing build {key}")
+            return manifest
+
+    print(f"[cache] Building {key}...")
+    sys_builder = build_cpu(**build_args)
+
+    os.makedirs(entry_dir, exist_ok=True)
+    with open(os.path.join(entry_dir, "circ.txt"), "w") as f:
+        print(sys_builder, file=f)
+
+    print(f"🚀 Compiling system: {sys_builder.name}...")
+    simulator_path, verilog_path = elaborate(sys_builder, **sim_config(verilog))
 
     try:
         binary_path = utils.build_simulator(simulator_path)
@@ -179,17 +473,115 @@ if __name__ == "__main__":
         print(f"Simulator build failed: {e}")
         raise e
 
+    # elaborate 的输出目录按系统名命名，不同配置会互相覆盖，所以把产物拷进缓存目录
+    cached_binary = os.path.join(entry_dir, "simulator")
+    shutil.copy2(binary_path, cached_binary)
+    cached_verilog = None
+    if verilog:
+        cached_verilog = os.path.join(entry_dir, "verilog")
+        shutil.copytree(verilog_path, cached_verilog, dirs_exist_ok=True)
+
+    manifest = {
+        "key": key,
+        "build_args": build_args,
+        "binary": cached_binary,
+        "verilog": cached_verilog,
+    }
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+IMAGE_FILES = ("workload.exe", "workload.data", "workload.pre")
+
+def start_simulator(binary_path, cwd):
+    # 与 utils.run_simulator 运行同一个二进制，但显式指定工作目录（从 cwd 读取镜像），输出按行流式读取
+    return subprocess.Popen([binary_path], cwd=cwd, stdout=subprocess.PIPE, text=True)
+
+def start_verilator(verilog_path, cwd):
+    # 与 utils.run_verilator 相同，在 Verilog 目录下运行 tb.py，镜像也从那里读取：
+    # 把缓存的 Verilog 拷到 cwd/verilog 并放入本次的镜像，缓存目录保持不变，可供多个任务同时使用
+    local_path = os.path.join(cwd, "verilog")
+    shutil.copytree(verilog_path, local_path, dirs_exist_ok=True)
+    for name in IMAGE_FILES:
+        if os.path.exists(os.path.join(cwd, name)):
+            shutil.copy2(os.path.join(cwd, name), local_path)
+    return subprocess.Popen([sys.executable, "tb.py"], cwd=local_path, stdout=subprocess.PIPE, text=True)
+
+def tee_lines(stream, path, summary_lines):
+    # 逐行写入日志文件并原样产出；PERF_SUMMARY 行另存到 summary_lines，整份日志不留在内存中
+    with open(path, "w") as f:
+        for line in stream:
+            f.write(line)
+            if SUMMARY_TAG in line:
+                summary_lines.append(line)
+            yield line
+
+def run_workload(case_name, build_args, verilog=True, workspace_dir=workspace):
+    # 换上新的内存镜像后直接运行缓存的二进制
+    # build_args 中 mem_regions="auto" 时按 workload 实际用到的段确定区间
+    # 返回 (日志路径, 性能统计, 比对结果)；两个后端的日志写在 workspace_dir 下
+    build_args = dict(build_args)
+    mem_regions = load_test_case(
+        case_name, workspace_dir=workspace_dir,
+        mem_regions=build_args.get("mem_regions"),
+        extra_regions=build_args.pop("extra_regions", ()),
+        predecode=build_args.get("predecode", False),
+        depth_log=build_args.get("depth_log", 16),
+    )
+    manifest = get_cached_build(shared_build_args(build_args, mem_regions), verilog)
+
+    # 两个后端是同时运行的子进程，都以 workspace_dir 为工作目录读取镜像；
+    # 边读两边的输出边比对提交记录，发现第一处不一致即停止两个后端
     print("Running simulator...")
+    procs = {"simulator": start_simulator(manifest["binary"], workspace_dir)}
+    if manifest["verilog"] is not None:
+        print("Running verilator...")
+        procs["verilator"] = start_verilator(manifest["verilog"], workspace_dir)
+
+    log_names = {"simulator": "raw.log", "verilator": "verilalog_raw.log"}
+    logs = {name: os.path.join(workspace_dir, log_names[name]) for name in procs}
+    summary_lines = {name: [] for name in procs}
+    streams = {name: tee_lines(proc.stdout, logs[name], summary_lines[name]) for name, proc in procs.items()}
+    try:
+        mismatch = compare_backends(streams)
+        if mismatch is None or mismatch == "skipped":
+            # 比对没有读完的部分（只有模拟器、或没有提交记录）照常写入日志
+            for lines in streams.values():
+                for _ in lines:
+                    pass
+    finally:
+        for name, proc in procs.items():
+            streams[name].close()
+            if proc.poll() is None:
+                proc.kill()
+            proc.wait()
+
+    reports = {name: "".join(lines) for name, lines in summary_lines.items()}
+    summary = write_perf_report(reports, os.path.join(workspace_dir, f"perf_report.json"))
+    return logs, summary, mismatch
+
+def compare_backends(streams):
+    # streams: {"simulator": 行迭代器, "verilator": 行迭代器}，按提交记录逐条比对，需以 log_level="trace" 或 "debug" 构建
+    # 只读到第一处不一致为止；返回 None 表示一致（或没有运行 Verilator）；
+    # 任一方没有提交记录时无从比对，返回 "skipped"，不算通过
+    if "verilator" not in streams:
+        return None
+    sim = parse_commit_lines(streams["simulator"])
+    veri = parse_commit_lines(streams["verilator"])
+    sim_first, veri_first = next(sim, None), next(veri, None)
+    if sim_first is None or veri_first is None:
+        print("[cosim] skipped: no COMMIT records to compare; rebuild with log_level=\"trace\"")
+        return "skipped"
+    mismatch = first_mismatch(chain([sim_first], sim), chain([veri_first], veri))
+    if mismatch is None:
+        print("[cosim] simulator and verilator commit traces match")
+    else:
+        i, a, b = mismatch
+        print(f"[cosim] first mismatch at commit #{i}: simulator={a} verilator={b}")
+    return mismatch
 
-    raw = utils.run_simulator(binary_path = binary_path)
-    log_path = os.path.join(workspace, f"raw.log")
-    with open(log_path, "w") as f:
-        print(raw, file=f)
+if __name__ == "__main__":
 
-    print("Running verilator...")
-    raw = utils.run_verilator(verilog_path)
-    log_path = os.path.join(workspace, f"verilalog_raw.log")
-    with open(log_path, "w") as f:
-        print(raw, file=f)
+    run_workload("array_test1", {"depth_log": 16})
 
-    print("Done.")
\ No newline at end of file
+    print("Done.")
@@ -0,0 +1,114 @@
+import math
+from array import array
+
+# 稀疏地址空间：把若干地址区间紧凑地排布进同一块 SRAM，SRAM 只按实际用到的大小分配
+# 区间为 (基址, 字节数)，都按字对齐；按基址排序后依次占用 SRAM 的连续下标
+#   translate(addr) : 硬件上把字节地址翻译为 SRAM 下标，每个区间一个比较器；不在任何区间内的地址映射到下标 0
+#   contains(addr)  : 地址是否落在某个区间内，访存端口据此报告越界访问，避免静默地访问下标 0
+#   pack(segments)  : 软件上把 {地址: bytes} 的分段映像按同样的排布打包为 SRAM 初始化字序列
+#   index(addr)     : 软件上与 translate 相同的翻译（供 ISS 使用），不在任何区间内时返回 None
+# dense(depth_log) 为原来的行为：一个从 0 开始的 2^depth_log 字区间，直接截取地址低位，不生成比较器
+# 只有硬件翻译（lookup）用到 assassyn，在其中导入；ISS 与映像工具只用软件部分，不依赖 assassyn
+
+def _align(regions):
+    aligned = []
+    for base, size in sorted(regions):
+        start = base & ~0x3
+        end = (base + size + 3) & ~0x3
+        if aligned and start <= aligned[-1][1]:
+            # 重叠或相邻的区间合并
+            aligned[-1][1] = max(aligned[-1][1], end)
+        else:
+            aligned.append([start, end])
+    return [(start, end - start) for start, end in aligned]
+
+class MemoryMap:
+    def __init__(self, regions, dense=False):
+        assert regions, "memory map needs at least one region"
+        self.dense = dense
+        self.regions = []
+        offset = 0
+        for base, size in _align(regions):
+            self.regions.append((base, size >> 2, offset))
+            offset += size >> 2
+        self.words = offset
+        self.depth_log = max(1, math.ceil(math.log2(offset)))
+
+    @classmethod
+    def dense_map(cls, depth_log):
+        return cls([(0, 4 << depth_log)], dense=True)
+
+    @classmethod
+    def from_segments(cls, segments, granule=256, extra=()):
+        # segments 为 [(地址, bytes)]，按实际占用的范围建立映射，每段向外扩展到 granule 字节对齐
+        # extra 为额外的 (基址, 字节数) 区间（如栈）
+        regions = []
+        for addr, seg in segments:
+            start = addr - addr % granule
+            end = addr + len(seg)
+            end += -end % granule
+            regions.append((start, end - start))
+        return cls(regions + list(extra))
+
+    def to_json(self):
+        # 供 build_cpu 的参数与编译缓存的键使用
+        return [[base, words << 2] for base, words, _ in self.regions]
+
+    def lookup(self, addr):
+        # 返回 (SRAM 下标, 是否落在某个区间内)；稠密布局直接截取低位，总是命中
+        from assassyn.frontend import Bits, UInt
+        if self.dense:
+            return (addr >> Bits(32)(2))[0:self.depth_log - 1], Bits(1)(1)
+        word = addr[2:31].bitcast(UInt(30))
+        index = Bits(self.depth_log)(0)
+        hit = Bits(1)(0)
+        for base, words, offset in self.regions:
+            base_word = base >> 2
+            in_range = (word >= UInt(30)(base_word)) & (word < UInt(30)(base_word + words))
+            local = (word - UInt(30)(base_word) + UInt(30)(offset)).bitcast(Bits(30))
+            index = in_range.select(local[0:self.depth_log - 1], index)
+            hit = hit | in_range
+        return index, hit
+
+    def translate(self, addr):
+        return self.lookup(addr)[0]
+
+    def contains(self, addr):
+        return self.lookup(addr)[1]
+
+    def index(self, addr):
+        if self.dense:
+            return (addr >> 2) & ((1 << self.depth_log) - 1)
+        for base, words, offset in self.regions:
+            if base <= addr < base + (words << 2):
+                return offset + ((addr - base) >> 2)
+        return None
+
+    def pack(self, segments):
+        # 返回 SRAM 初始化用的 array('I')，长度为实际用到的字数
+        image = bytearray(self.words << 2)
+        for addr, seg in segments.items():
+            for base, words, offset in self.regions:
+                lo = max(addr, base)
+                hi = min(addr + len(seg), base + (words << 2))
+                if lo < hi:
+                    dst = (offset << 2) + lo - base
+                    image[dst:dst + hi - lo] = seg[lo - addr:hi - addr]
+        packed = array('I')
+        packed.frombytes(bytes(image))
+        return packed
+
+
+def read_word_image(path):
+    # 读取 .exe / 纯十六进制 .data：每行一个 32 位字，"//" 之后为注释，返回从地址 0 开始的 bytes
+    words = array('I')
+    with open(path) as f:
+        for line in f:
+            word = line.split("//", 1)[0].strip()
+            if word:
+                words.append(int(word, 16))
+    return words.tobytes()
+
+def write_word_image(path, words):
+    with open(path, "w") as f:
+        f.write(("%08x\n" * len(words)) % tuple(words))
@@ -1,4 +1,9 @@
 from assassyn.frontend import *
+from .utils import debug_log
+from .store_buffer import StoreBuffer
+from .icache import ICache
+from .dcache import DCache
+from .memory_map import MemoryMap
 
 class MemoryUser(Downstream):
     def __init__(self):
@@ -13,52 +18,136 @@ class MemoryUser(Downstream):
         ex_is_store: Value,
         wdata: Value,
         width: Value,
-        sram: SRAM
+        sram: SRAM,
+        icache: SRAM = None,        # 哈佛模式下的独立指令存储器，为 None 时取指与访存共用 sram
+        store_buffer: StoreBuffer = None,   # 写缓冲，仅哈佛模式可用
+        inst_cache: ICache = None,          # 指令 cache，此时 icache 作为其后备存储器
+        dcache: DCache = None,              # 数据 cache，此时 sram 作为其后备存储器
+        mem_map: MemoryMap = None,          # 地址到 SRAM 下标的翻译，为 None 时截取地址低 16 位
+        icache1: SRAM = None,               # 双发射模式的第二个指令存储体，读取 pc+4 处的指令
+        icache_width: int = 32,             # 指令存储器位宽，预译码时为宽字
+        strict_map: bool = True,            # 访存地址不在 mem_map 的任何区间内时停机（乱序后端的访存可能是错误路径，只报告）
+        ex_is_halt: Value = None,           # EX 中的指令为停机指令，停机用的 sb x0, -1(x0) 不做越界检查
     ):
+        if mem_map is None:
+            mem_map = MemoryMap.dense_map(16)
+
         if_addr_val = if_addr.optional(Bits(32)(0))
         mem_addr_val = mem_addr.optional(Bits(32)(0))
         ex_is_load_val = ex_is_load.optional(Bits(1)(0))
         ex_is_store_val = ex_is_store.optional(Bits(1)(0))
         wdata_val = wdata.optional(Bits(32)(0))
         width_val = width.optional(Bits(3)(1))
+        ex_is_halt_val = ex_is_halt.optional(Bits(1)(0)) if ex_is_halt is not None else Bits(1)(0)
+
+        # 稀疏映射下越界的访存会落到下标 0，把它报告出来而不是静默地读写错误的数据
+        # 停机指令 0xFE000FA3 写 0xFFFFFFFF，不在任何区间内；它要留给 WriteBack 停机并输出统计
+        if not mem_map.dense:
+            unmapped = (ex_is_load_val | ex_is_store_val) & ~mem_map.contains(mem_addr_val) & ~ex_is_halt_val
+            with Condition(unmapped):
+                log("MemoryUser: Unmapped data access at 0x{:x}", mem_addr_val)
+                if strict_map:
+                    finish()
+
+        if dcache is not None:
+            assert icache is not None, "dcache requires harvard mode"
+            # 访存全部由 cache 处理，数据 SRAM 只用于缺失时的写回与填充
+            dcache.build(
+                is_load = ex_is_load_val,
+                is_store = ex_is_store_val,
+                addr = mem_addr_val,
+                wdata = wdata_val,
+                width = width_val,
+                mem = sram,
+            )
+        elif store_buffer is not None:
+            assert icache is not None, "store buffer requires harvard mode"
+            # store 直接入队，数据 SRAM 优先服务 load，空闲时写回缓冲队头
+            store_buffer.forward(ex_is_load_val, mem_addr_val)
+            we, sb_word, sb_wdata = store_buffer.update(
+                enq = ex_is_store_val,
+                addr = mem_addr_val,
+                wdata = wdata_val,
+                width = width_val,
+                port_free = ~ex_is_load_val,
+                sram_dout = sram.dout[0],
+            )
+            final_addr = ex_is_load_val.select(mem_addr_val, concat(sb_word, Bits(2)(0)))
+            sram_trunc_addr = mem_map.translate(final_addr)
+
+            debug_log("MemoryUser: Addr=0x{:x} WData=0x{:x} WE={} RE={}", final_addr, sb_wdata, we, ~we)
+            sram.build(
+                addr = sram_trunc_addr,
+                wdata = sb_wdata,
+                we = we,
+                re = ~we,
+            )
+        else:
+            need_write = RegArray(Bits(1), 1, initializer=[0])
+            write_addr = RegArray(Bits(32), 1, initializer=[0])
+            write_data = RegArray(Bits(32), 1, initializer=[0])
+            write_width = RegArray(Bits(3), 1, initializer=[0])
+
+            need_refresh = ex_is_store_val & ~need_write[0]
+            need_write[0] <= need_refresh.select(Bits(1)(1), Bits(1)(0))
+            write_addr[0] <= need_refresh.select(mem_addr_val, Bits(32)(0))
+            write_data[0] <= need_refresh.select(wdata_val, Bits(32)(0))
+            write_width[0] <= need_refresh.select(width_val, Bits(3)(1))
 
-        need_write = RegArray(Bits(1), 1, initializer=[0])
-        write_addr = RegArray(Bits(32), 1, initializer=[0])
-        write_data = RegArray(Bits(32), 1, initializer=[0])
-        write_width = RegArray(Bits(3), 1, initializer=[0])
+            we = need_write[0]
+            re = ~we
+            final_mem_addr = we.select(write_addr[0], mem_addr_val)
+            is_from_ex = ex_is_load_val | ex_is_store_val | we
+            if icache is None:
+                final_addr = is_from_ex.select(final_mem_addr, if_addr_val)
+            else:
+                # 取指走 icache，数据 SRAM 只服务访存
+                final_addr = final_mem_addr
 
-        need_refresh = ex_is_store_val & ~need_write[0]
-        need_write[0] <= need_refresh.select(Bits(1)(1), Bits(1)(0))
-        write_addr[0] <= need_refresh.select(mem_addr_val, Bits(32)(0))
-        write_data[0] <= need_refresh.select(wdata_val, Bits(32)(0))
-        write_width[0] <= need_refresh.select(width_val, Bits(3)(1))
+            final_wdata = we.select(write_data[0], Bits(32)(0))
+            final_width = we.select(write_width[0], Bits(3)(1))
+            # 默认为 1 防止 select1hot 报错
 
-        we = need_write[0]
-        re = ~we
-        final_mem_addr = we.select(write_addr[0], mem_addr_val)
-        is_from_ex = ex_is_load_val | ex_is_store_val | we
-        final_addr = is_from_ex.select(final_mem_addr, if_addr_val)
+            shamt = final_mem_addr[0:1].concat(Bits(3)(0)).bitcast(UInt(5))
+            raw_mask = final_width.select1hot(
+                Bits(32)(0x000000FF),
+                Bits(32)(0x0000FFFF),
+                Bits(32)(0xFFFFFFFF),
+            )
+            shifted_mask = raw_mask << shamt
+            shifted_data = final_wdata << shamt
+            sram_wdata = (sram.dout[0] & (~shifted_mask)) | (shifted_data & shifted_mask)
 
-        final_wdata = we.select(write_data[0], Bits(32)(0))
-        final_width = we.select(write_width[0], Bits(3)(1))
-        # 默认为 1 防止 select1hot 报错
+            sram_trunc_addr = mem_map.translate(final_addr)
 
-        shamt = final_mem_addr[0:1].concat(Bits(3)(0)).bitcast(UInt(5))
-        raw_mask = final_width.select1hot(
-            Bits(32)(0x000000FF),
-            Bits(32)(0x0000FFFF),
-            Bits(32)(0xFFFFFFFF),
-        )
-        shifted_mask = raw_mask << shamt
-        shifted_data = final_wdata << shamt
-        sram_wdata = (sram.dout[0] & (~shifted_mask)) | (shifted_data & shifted_mask)
+            debug_log("MemoryUser: Addr=0x{:x} WData=0x{:x} WE={} RE={}", final_addr, sram_wdata, we, re)
+            sram.build(
+                addr = sram_trunc_addr,
+                wdata = sram_wdata,
+                we = we,
+                re = re,
+            )
 
-        sram_trunc_addr = (final_addr >> Bits(32)(2))[0:15]
+        if inst_cache is not None:
+            assert icache is not None, "icache requires harvard mode"
+            inst_cache.refill(if_addr_val, icache)
+        elif icache is not None:
+            icache_trunc_addr = mem_map.translate(if_addr_val)
+            debug_log("MemoryUser: IAddr=0x{:x}", if_addr_val)
+            icache.build(
+                addr = icache_trunc_addr,
+                wdata = Bits(icache_width)(0),
+                we = Bits(1)(0),
+                re = Bits(1)(1),
+            )
 
-        log("MemoryUser: Addr=0x{:x} WData=0x{:x} WE={} RE={}", final_addr, sram_wdata, we, re)
-        sram.build(
-            addr = sram_trunc_addr,
-            wdata = sram_wdata,
-            we = we,
-            re = re,
-        )
+        if icache1 is not None:
+            assert inst_cache is None and icache is not None, "dual issue requires harvard mode without icache"
+            # 两个存储体内容相同，同一周期分别读出 pc 与 pc+4，相当于一次 64 位取指
+            if_addr1 = (if_addr_val.bitcast(UInt(32)) + UInt(32)(4)).bitcast(Bits(32))
+            icache1.build(
+                addr = mem_map.translate(if_addr1),
+                wdata = Bits(32)(0),
+                we = Bits(1)(0),
+                re = Bits(1)(1),
+            )
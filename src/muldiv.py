@@ -0,0 +1,130 @@
+from assassyn.frontend import *
+from .utils import MulDivOp, debug_log
+
+# RV32M 乘除法单元，挂在 EX 阶段
+# 乘法：移位相加，每周期处理 mul_bits_per_cycle 位乘数
+# 除法：恢复余数除法，每周期产生 div_bits_per_cycle 位商
+# 有符号运算先取绝对值，结束时再按符号取反
+#
+# 时序：第 t 周期 EX 收到乘除法指令（start），锁存操作数，该指令以 rd=0 继续流向 MEM/WB；
+# 之后每周期迭代一次，最后一次迭代（cnt == 1）的周期组合地给出结果（done），
+# 由 EX 把结果和 rd 插入到当拍的气泡中。忙碌期间通过 stall 让 ID 保持不动，
+# 因此 done 那一拍 EX 中一定是气泡。
+
+def negate(value, width):
+    return ((~value).bitcast(UInt(width)) + UInt(width)(1)).bitcast(Bits(width))
+
+class MulDivUnit:
+    def __init__(self, mul_bits_per_cycle=8, div_bits_per_cycle=1):
+        assert 32 % mul_bits_per_cycle == 0, "mul_bits_per_cycle must divide 32"
+        assert 32 % div_bits_per_cycle == 0, "div_bits_per_cycle must divide 32"
+        self.mul_bits = mul_bits_per_cycle
+        self.div_bits = div_bits_per_cycle
+
+    def build(
+        self,
+        start: Value,       # 本周期 EX 中是有效的乘除法指令
+        op: Value,          # MulDivOp（funct3）
+        rs1: Value,
+        rs2: Value,
+        rd: Value,
+    ):
+        cnt = RegArray(Bits(6), 1, initializer=[0])
+        md_op = RegArray(Bits(3), 1, initializer=[0])
+        md_rd = RegArray(Bits(5), 1, initializer=[0])
+        md_neg = RegArray(Bits(1), 1, initializer=[0])          # 乘积 / 商需要取反
+        md_rem_neg = RegArray(Bits(1), 1, initializer=[0])      # 余数需要取反
+        md_div_zero = RegArray(Bits(1), 1, initializer=[0])
+        md_dividend = RegArray(Bits(32), 1, initializer=[0])    # 除零时余数为被除数
+
+        mul_acc = RegArray(Bits(64), 1, initializer=[0])
+        mul_mcand = RegArray(Bits(64), 1, initializer=[0])
+        mul_mplier = RegArray(Bits(32), 1, initializer=[0])
+
+        div_rem = RegArray(Bits(33), 1, initializer=[0])
+        div_quo = RegArray(Bits(32), 1, initializer=[0])
+        div_divisor = RegArray(Bits(32), 1, initializer=[0])
+
+        busy = cnt[0] != Bits(6)(0)
+        done = cnt[0] == Bits(6)(1)
+
+        # ---------- 启动：操作数预处理 ----------
+        is_div = op[2:2] == Bits(1)(1)
+        mul_a_signed = (op == MulDivOp.MULH) | (op == MulDivOp.MULHSU)
+        mul_b_signed = op == MulDivOp.MULH
+        div_signed = op[0:0] == Bits(1)(0)
+        a_signed = is_div.select(div_signed, mul_a_signed)
+        b_signed = is_div.select(div_signed, mul_b_signed)
+
+        a_neg = a_signed & (rs1[31:31] == Bits(1)(1))
+        b_neg = b_signed & (rs2[31:31] == Bits(1)(1))
+        a_abs = a_neg.select(negate(rs1, 32), rs1)
+        b_abs = b_neg.select(negate(rs2, 32), rs2)
+
+        mul_iters = 32 // self.mul_bits
+        div_iters = 32 // self.div_bits
+        start_cnt = is_div.select(Bits(6)(div_iters), Bits(6)(mul_iters))
+
+        # ---------- 乘法迭代 ----------
+        k = self.mul_bits
+        acc = mul_acc[0]
+        mcand = mul_mcand[0]
+        mplier = mul_mplier[0]
+        for i in range(k):
+            shifted = mcand if i == 0 else concat(mcand[0:63 - i], Bits(i)(0))
+            partial = mplier[i:i].select(shifted, Bits(64)(0))
+            acc = (acc.bitcast(UInt(64)) + partial.bitcast(UInt(64))).bitcast(Bits(64))
+        mcand_next = concat(mcand[0:63 - k], Bits(k)(0))
+        mplier_next = Bits(32)(0) if k == 32 else concat(Bits(k)(0), mplier[k:31])
+
+        # ---------- 除法迭代 ----------
+        rem = div_rem[0]
+        quo = div_quo[0]
+        divisor = concat(Bits(1)(0), div_divisor[0])
+        for _ in range(self.div_bits):
+            rem_shifted = concat(rem[0:31], quo[31:31])
+            ge = rem_shifted.bitcast(UInt(33)) >= divisor.bitcast(UInt(33))
+            rem_sub = (rem_shifted.bitcast(UInt(33)) - divisor.bitcast(UInt(33))).bitcast(Bits(33))
+            rem = ge.select(rem_sub, rem_shifted)
+            quo = concat(quo[0:30], ge.select(Bits(1)(1), Bits(1)(0)))
+
+        # ---------- 状态更新 ----------
+        cnt_dec = (cnt[0].bitcast(UInt(6)) - UInt(6)(1)).bitcast(Bits(6))
+        cnt[0] <= start.select(start_cnt, busy.select(cnt_dec, Bits(6)(0)))
+
+        with Condition(start):
+            debug_log("MDU: Start op={} rs1=0x{:x} rs2=0x{:x} rd={}", op, rs1, rs2, rd)
+            md_op[0] <= op
+            md_rd[0] <= rd
+            md_neg[0] <= a_neg ^ b_neg
+            md_rem_neg[0] <= a_neg
+            md_div_zero[0] <= is_div & (rs2 == Bits(32)(0))
+            md_dividend[0] <= rs1
+
+        with Condition(start | busy):
+            mul_acc[0] <= start.select(Bits(64)(0), acc)
+            mul_mcand[0] <= start.select(concat(Bits(32)(0), a_abs), mcand_next)
+            mul_mplier[0] <= start.select(b_abs, mplier_next)
+            div_rem[0] <= start.select(Bits(33)(0), rem)
+            div_quo[0] <= start.select(a_abs, quo)
+            div_divisor[0] <= start.select(b_abs, div_divisor[0])
+
+        # ---------- 结果（最后一次迭代的组合输出） ----------
+        product = md_neg[0].select(negate(acc, 64), acc)
+        mul_res = (md_op[0] == MulDivOp.MUL).select(product[0:31], product[32:63])
+
+        quotient = md_neg[0].select(negate(quo, 32), quo)
+        remainder = md_rem_neg[0].select(negate(rem[0:31], 32), rem[0:31])
+        quotient = md_div_zero[0].select(Bits(32)(0xFFFFFFFF), quotient)
+        remainder = md_div_zero[0].select(md_dividend[0], remainder)
+        div_res = md_op[0][1:1].select(remainder, quotient)
+
+        result = md_op[0][2:2].select(div_res, mul_res)
+
+        with Condition(done):
+            debug_log("MDU: Done rd={} result=0x{:x}", md_rd[0], result)
+
+        # start 当拍以及还剩不止一次迭代时都需要 ID 保持
+        stall = start | (busy & ~done)
+
+        return done, md_rd[0], result, stall
@@ -0,0 +1,480 @@
+from assassyn.frontend import *
+from .utils import ALUOp, BranchType, ExCtrlFormat, MemOp, Op1Type, Op2Type, debug_log, trace_log
+from .utils import redirect_word, redirect_valid
+from .EX import alu, resolve_branch
+from .MA import extend_load
+from .trace import TRACE_FORMAT, REDIRECT_FORMAT
+from .perf import trace_cycle
+
+# 乱序后端（build_cpu(ooo_rob_bits > 0)）：替代 Executor / MemoryAcess / WriteBack 三级，沿用 ID 的译码结果与 EX 的 ALU
+#   重命名表（RenameTable）：每个架构寄存器记录是否有未提交的写者及其在 ROB 中的编号（tag），派遣时据此取操作数
+#   保留站（ReservationStation）：非访存指令在此等待操作数，每周期选出一条就绪的 ALU 指令执行，
+#     乘除法指令在 MulDivUnit 空闲时启动；多条就绪时按表项下标固定优先
+#   访存队列（LoadStoreQueue）：访存指令按程序顺序排队，队头 load 基址就绪即发出，数据下一拍返回；
+#     store 在提交时才写存储器，load 不会越过更老的 store，但后面的非访存指令可以越过等待中的 load
+#   重排序缓冲（ReorderBuffer）：每周期按程序顺序提交一条，写寄存器堆、输出提交记录、训练分支预测器；
+#     分支预测失败在提交时处理：清空所有结构，通过 branch_target 重定向取指（与顺序流水线相同的冲刷通路）
+# 结果总线三条：ALU、乘除法、load，等待中的操作数与 ROB 都按 tag 在总线上匹配，相关指令可以背靠背执行
+# 状态在 build_cpu 顶层创建，OoOCore 每周期依次完成提交、执行、派遣
+# 时序：DecoderImpl 第 t 拍发出的指令第 t+1 拍到达，因此任一结构剩余不足两项时让 ID stall
+
+def _inc(value, bits):
+    return (value.bitcast(UInt(bits)) + UInt(bits)(1)).bitcast(Bits(bits))
+
+def _dec(value, bits):
+    return (value.bitcast(UInt(bits)) - UInt(bits)(1)).bitcast(Bits(bits))
+
+def _regs(width, depth):
+    # 每项一个寄存器：同一周期可能有多个来源写不同的项
+    return [RegArray(Bits(width), 1, initializer=[0]) for _ in range(depth)]
+
+def pick(regs, idx, bits):
+    value = regs[0][0]
+    for i in range(1, len(regs)):
+        value = (idx == Bits(bits)(i)).select(regs[i][0], value)
+    return value
+
+def snoop(buses, tag, ready, value):
+    # buses 为 [(valid, tag, value)]，尚未就绪的操作数在总线上匹配到自己的 tag 时取走结果
+    for bus_valid, bus_tag, bus_value in buses:
+        hit = ~ready & bus_valid & (bus_tag == tag)
+        value = hit.select(bus_value, value)
+        ready = ready | hit
+    return ready, value
+
+def occupancy(count, bits, depth):
+    # 剩余不足两项
+    return count.bitcast(UInt(bits)) >= UInt(bits)(depth - 1)
+
+
+class RenameTable:
+    def __init__(self, tag_bits):
+        self.tag_bits = tag_bits
+        self.busy = _regs(1, 32)
+        self.tag = _regs(tag_bits, 32)
+
+    def lookup(self, idx):
+        return pick(self.busy, idx, 5), pick(self.tag, idx, 5)
+
+    def update(self, set_rd, set_tag, clear_rd, clear_tag, flush):
+        # set_rd / clear_rd 为 0 表示本周期没有派遣 / 提交写寄存器的指令
+        # 提交只在映射仍指向该指令时清除；同一周期派遣的新映射优先
+        for r in range(1, 32):
+            is_set = set_rd == Bits(5)(r)
+            is_clear = (clear_rd == Bits(5)(r)) & (self.tag[r][0] == clear_tag)
+            self.busy[r][0] <= ~flush & (is_set | ((self.busy[r][0] == Bits(1)(1)) & ~is_clear))
+            with Condition(is_set):
+                self.tag[r][0] <= set_tag
+
+
+class ReorderBuffer:
+    def __init__(self, bits):
+        assert 1 <= bits <= 5, "ROB tag must fit in the MulDivUnit rd field"
+        self.bits = bits
+        depth = 1 << bits
+        self.depth = depth
+        self.head = RegArray(Bits(bits), 1, initializer=[0])
+        self.tail = RegArray(Bits(bits), 1, initializer=[0])
+        self.count = RegArray(Bits(bits + 1), 1, initializer=[0])
+
+        # 派遣时按 tail 写入
+        self.rd = RegArray(Bits(5), depth, initializer=[0] * depth)
+        self.pc = RegArray(Bits(32), depth, initializer=[0] * depth)
+        self.inst = RegArray(Bits(32), depth, initializer=[0] * depth)
+        self.is_halt = RegArray(Bits(1), depth, initializer=[0] * depth)
+        self.mem_op = RegArray(Bits(3), depth, initializer=[0] * depth)
+        self.is_branch = RegArray(Bits(1), depth, initializer=[0] * depth)
+        self.train = RegArray(Bits(1), depth, initializer=[0] * depth)     # 提交时训练预测器（分支与 jal）
+
+        # ALU 执行时按 tag 写入，只对分支有意义
+        self.mispredict = RegArray(Bits(1), depth, initializer=[0] * depth)
+        self.next_pc = RegArray(Bits(32), depth, initializer=[0] * depth)
+        self.taken = RegArray(Bits(1), depth, initializer=[0] * depth)
+        self.calc_target = RegArray(Bits(32), depth, initializer=[0] * depth)
+        # load 数据返回时写入，供提交记录使用
+        self.mem_addr = RegArray(Bits(32), depth, initializer=[0] * depth)
+
+        # 三条结果总线都可能写入
+        self.done = _regs(1, depth)
+        self.value = _regs(32, depth)
+
+    def stall(self):
+        return occupancy(self.count[0], self.bits + 1, self.depth)
+
+    def update(self, alloc, commit, buses, flush):
+        n = self.bits
+        tail = self.tail[0]
+        for i in range(self.depth):
+            is_alloc = alloc & (tail == Bits(n)(i))
+            done, value = snoop(buses, Bits(n)(i), self.done[i][0] == Bits(1)(1), self.value[i][0])
+            self.done[i][0] <= ~is_alloc & done
+            self.value[i][0] <= value
+
+        self.tail[0] <= flush.select(Bits(n)(0), alloc.select(_inc(tail, n), tail))
+        self.head[0] <= flush.select(Bits(n)(0), commit.select(_inc(self.head[0], n), self.head[0]))
+        count_next = (alloc ^ commit).select(
+            alloc.select(_inc(self.count[0], n + 1), _dec(self.count[0], n + 1)),
+            self.count[0],
+        )
+        self.count[0] <= flush.select(Bits(n + 1)(0), count_next)
+
+
+class ReservationStation:
+    def __init__(self, bits, tag_bits):
+        assert bits >= 1, "reservation station needs at least 2 entries"
+        self.bits = bits
+        depth = 1 << bits
+        self.depth = depth
+        self.tag_bits = tag_bits
+
+        self.valid = _regs(1, depth)
+        self.src1_ready = _regs(1, depth)
+        self.src1_value = _regs(32, depth)
+        self.src2_ready = _regs(1, depth)
+        self.src2_value = _regs(32, depth)
+
+        # 派遣时写入空闲项
+        self.src1_tag = RegArray(Bits(tag_bits), depth, initializer=[0] * depth)
+        self.src2_tag = RegArray(Bits(tag_bits), depth, initializer=[0] * depth)
+        self.tag = RegArray(Bits(tag_bits), depth, initializer=[0] * depth)
+        self.alu_op = RegArray(Bits(14), depth, initializer=[0] * depth)
+        self.md_op = RegArray(Bits(3), depth, initializer=[0] * depth)
+        self.branch_type = RegArray(Bits(9), depth, initializer=[0] * depth)
+        self.op1_type = RegArray(Bits(3), depth, initializer=[0] * depth)
+        self.op2_type = RegArray(Bits(3), depth, initializer=[0] * depth)
+        self.pc = RegArray(Bits(32), depth, initializer=[0] * depth)
+        self.imm = RegArray(Bits(32), depth, initializer=[0] * depth)
+        self.predicted_pc = RegArray(Bits(32), depth, initializer=[0] * depth)
+
+    def stall(self):
+        used = UInt(self.bits + 1)(0)
+        for valid in self.valid:
+            used = (used + valid[0].select(UInt(self.bits + 1)(1), UInt(self.bits + 1)(0))).bitcast(UInt(self.bits + 1))
+        return occupancy(used, self.bits + 1, self.depth)
+
+    def select(self, want):
+        # want(i) 给出第 i 项是否参与竞争，返回 (是否选中, 下标)，下标小者优先
+        n = self.bits
+        grant = Bits(1)(0)
+        idx = Bits(n)(0)
+        for i in reversed(range(self.depth)):
+            ready = (self.valid[i][0] & self.src1_ready[i][0] & self.src2_ready[i][0]) == Bits(1)(1)
+            cand = ready & want(i)
+            idx = cand.select(Bits(n)(i), idx)
+            grant = grant | cand
+        return grant, idx
+
+    def operands(self, idx):
+        n = self.bits
+        src1 = pick(self.src1_value, idx, n)
+        src2 = pick(self.src2_value, idx, n)
+        op1 = self.op1_type[idx].select1hot(src1, self.pc[idx], Bits(32)(0))
+        op2 = self.op2_type[idx].select1hot(src2, self.imm[idx], Bits(32)(4))
+        return src1, op1, op2
+
+    def free_slot(self):
+        n = self.bits
+        slot = Bits(n)(0)
+        for i in reversed(range(self.depth)):
+            slot = (self.valid[i][0] == Bits(1)(0)).select(Bits(n)(i), slot)
+        return slot
+
+    def update(self, alloc, ctrl, pc, imm, tag, src1, src2, issued, buses, flush):
+        # src1 / src2 为派遣指令的 (ready, tag, value)；issued 为本周期发出的 [(是否发出, 下标)]
+        n = self.bits
+        slot = self.free_slot()
+        with Condition(alloc):
+            self.src1_tag[slot] = src1[1]
+            self.src2_tag[slot] = src2[1]
+            self.tag[slot] = tag
+            self.alu_op[slot] = ctrl.alu_op
+            self.md_op[slot] = ctrl.md_op
+            self.branch_type[slot] = ctrl.branch_type
+            self.op1_type[slot] = ctrl.op1_type
+            self.op2_type[slot] = ctrl.op2_type
+            self.pc[slot] = pc
+            self.imm[slot] = imm
+            self.predicted_pc[slot] = ctrl.predicted_pc
+            debug_log("RS: Dispatch pc=0x{:x} into slot {} tag={}", pc, slot, tag)
+
+        for i in range(self.depth):
+            is_alloc = alloc & (slot == Bits(n)(i))
+            is_issued = Bits(1)(0)
+            for grant, idx in issued:
+                is_issued = is_issued | (grant & (idx == Bits(n)(i)))
+            ready1, value1 = snoop(buses, self.src1_tag[i], self.src1_ready[i][0] == Bits(1)(1), self.src1_value[i][0])
+            ready2, value2 = snoop(buses, self.src2_tag[i], self.src2_ready[i][0] == Bits(1)(1), self.src2_value[i][0])
+            self.valid[i][0] <= ~flush & (is_alloc | ((self.valid[i][0] == Bits(1)(1)) & ~is_issued))
+            self.src1_ready[i][0] <= is_alloc.select(src1[0], ready1)
+            self.src1_value[i][0] <= is_alloc.select(src1[2], value1)
+            self.src2_ready[i][0] <= is_alloc.select(src2[0], ready2)
+            self.src2_value[i][0] <= is_alloc.select(src2[2], value2)
+
+
+class LoadStoreQueue:
+    def __init__(self, bits, tag_bits):
+        assert bits >= 1, "load/store queue needs at least 2 entries"
+        self.bits = bits
+        depth = 1 << bits
+        self.depth = depth
+        self.head = RegArray(Bits(bits), 1, initializer=[0])
+        self.tail = RegArray(Bits(bits), 1, initializer=[0])
+        self.count = RegArray(Bits(bits + 1), 1, initializer=[0])
+
+        self.base_ready = _regs(1, depth)
+        self.base_value = _regs(32, depth)
+        self.data_ready = _regs(1, depth)
+        self.data_value = _regs(32, depth)
+
+        self.is_store = RegArray(Bits(1), depth, initializer=[0] * depth)
+        self.width = RegArray(Bits(3), depth, initializer=[0] * depth)
+        self.sign = RegArray(Bits(1), depth, initializer=[0] * depth)
+        self.imm = RegArray(Bits(32), depth, initializer=[0] * depth)
+        self.tag = RegArray(Bits(tag_bits), depth, initializer=[0] * depth)
+        self.base_tag = RegArray(Bits(tag_bits), depth, initializer=[0] * depth)
+        self.data_tag = RegArray(Bits(tag_bits), depth, initializer=[0] * depth)
+
+        # 已发出、数据下一拍返回的 load
+        self.load_valid = RegArray(Bits(1), 1, initializer=[0])
+        self.load_tag = RegArray(Bits(tag_bits), 1, initializer=[0])
+        self.load_addr = RegArray(Bits(32), 1, initializer=[0])
+        self.load_width = RegArray(Bits(3), 1, initializer=[1])
+        self.load_sign = RegArray(Bits(1), 1, initializer=[0])
+        # 上一拍提交了 store，本拍存储器端口在写回合并后的字
+        self.store_busy = RegArray(Bits(1), 1, initializer=[0])
+
+    def stall(self):
+        return occupancy(self.count[0], self.bits + 1, self.depth)
+
+    def peek(self):
+        # 队头的 (非空, 是 store, 基址就绪, 数据就绪, 地址, store 数据)
+        n = self.bits
+        head = self.head[0]
+        has_head = self.count[0] != Bits(n + 1)(0)
+        base = pick(self.base_value, head, n)
+        addr = (base.bitcast(Int(32)) + self.imm[head].bitcast(Int(32))).bitcast(Bits(32))
+        return (
+            has_head,
+            self.is_store[head] == Bits(1)(1),
+            pick(self.base_ready, head, n) == Bits(1)(1),
+            pick(self.data_ready, head, n) == Bits(1)(1),
+            addr,
+            pick(self.data_value, head, n),
+        )
+
+    def load_result(self, sram_dout):
+        data = extend_load(sram_dout[0].bitcast(Bits(32)), self.load_addr[0], self.load_width[0], self.load_sign[0])
+        return self.load_valid[0] == Bits(1)(1), self.load_tag[0], data
+
+    def update(self, alloc, ctrl, imm, tag, base, data, load_issue, store_commit, addr, buses, flush):
+        # base / data 为派遣指令的 (ready, tag, value)
+        n = self.bits
+        tail = self.tail[0]
+        head = self.head[0]
+        with Condition(alloc):
+            self.is_store[tail] = ctrl.mem_op == MemOp.STORE
+            self.width[tail] = ctrl.mem_width
+            self.sign[tail] = ctrl.mem_sign
+            self.imm[tail] = imm
+            self.tag[tail] = tag
+            self.base_tag[tail] = base[1]
+            self.data_tag[tail] = data[1]
+
+        for i in range(self.depth):
+            is_alloc = alloc & (tail == Bits(n)(i))
+            ready1, value1 = snoop(buses, self.base_tag[i], self.base_ready[i][0] == Bits(1)(1), self.base_value[i][0])
+            ready2, value2 = snoop(buses, self.data_tag[i], self.data_ready[i][0] == Bits(1)(1), self.data_value[i][0])
+            self.base_ready[i][0] <= is_alloc.select(base[0], ready1)
+            self.base_value[i][0] <= is_alloc.select(base[2], value1)
+            self.data_ready[i][0] <= is_alloc.select(data[0], ready2)
+            self.data_value[i][0] <= is_alloc.select(data[2], value2)
+
+        deq = load_issue | store_commit
+        self.tail[0] <= flush.select(Bits(n)(0), alloc.select(_inc(tail, n), tail))
+        self.head[0] <= flush.select(Bits(n)(0), deq.select(_inc(head, n), head))
+        count_next = (alloc ^ deq).select(
+            alloc.select(_inc(self.count[0], n + 1), _dec(self.count[0], n + 1)),
+            self.count[0],
+        )
+        self.count[0] <= flush.select(Bits(n + 1)(0), count_next)
+
+        self.load_valid[0] <= load_issue
+        with Condition(load_issue):
+            self.load_tag[0] <= self.tag[head]
+            self.load_addr[0] <= addr
+            self.load_width[0] <= self.width[head]
+            self.load_sign[0] <= self.sign[head]
+        self.store_busy[0] <= store_commit
+
+
+class OoOCore(Module):
+    def __init__(self, compact=False):
+        super().__init__(
+            ports={
+                "ctrl": Port(ExCtrlFormat.record(compact)),
+                "pc": Port(Bits(32)),
+                "rs1": Port(Bits(32)),
+                "rs2": Port(Bits(32)),
+                "imm": Port(Bits(32))
+            }
+        )
+        self.compact = compact
+
+    @module.combinational
+    def build(
+        self,
+        rob: ReorderBuffer,
+        rs: ReservationStation,
+        lsq: LoadStoreQueue,
+        rat: RenameTable,
+        reg_file: Array,
+        branch_target: Array,
+        muldiv,                     # MulDivUnit，rd 字段用来传递 ROB tag
+        sram_dout: Array,           # 数据 SRAM 的读出端口，load 发出后下一拍读取
+        predictor = None,
+        perf = None,
+        stats = (),                 # 在停机时输出统计信息的部件（需提供 report()）
+    ):
+        # rs1 / rs2 是 ID 阶段读出的值，可能已被更老的指令改写，派遣时按重命名表重新读取
+        ctrl, pc, _, _, imm = self.pop_all_ports(True)
+        ctrl = ExCtrlFormat.view(ctrl, self.compact)
+        n = rob.bits
+        head = rob.head[0]
+
+        # ---------- 提交 ----------
+        has_head = rob.count[0] != Bits(n + 1)(0)
+        head_mem_op = rob.mem_op[head]
+        head_is_store = head_mem_op == MemOp.STORE
+        head_is_load = head_mem_op == MemOp.LOAD
+        lsq_has, lsq_is_store, base_ready, data_ready, lsq_addr, lsq_data = lsq.peek()
+        # store 到达 ROB 队头时一定也在 LSQ 队头，操作数就绪且存储器端口空闲即可提交
+        store_ready = lsq_has & lsq_is_store & base_ready & data_ready & (lsq.store_busy[0] == Bits(1)(0))
+        commit = has_head & head_is_store.select(store_ready, pick(rob.done, head, n) == Bits(1)(1))
+        store_commit = commit & head_is_store
+        flush = commit & (rob.is_branch[head] == Bits(1)(1)) & (rob.mispredict[head] == Bits(1)(1))
+
+        head_rd = commit.select(rob.rd[head], Bits(5)(0))
+        head_value = pick(rob.value, head, n)
+        with Condition(head_rd != Bits(5)(0)):
+            reg_file[head_rd] = head_value
+
+        if perf is not None:
+            perf.retire(commit)
+            perf.count("branch_mispredict", flush)
+            perf.count("store", store_commit)
+
+        mem_addr = head_is_store.select(lsq_addr, head_is_load.select(rob.mem_addr[head], Bits(32)(0)))
+        with Condition(commit):
+            wdata = (head_rd != Bits(5)(0)).select(head_value, Bits(32)(0))
+            debug_log("ROB: Commit tag={} pc=0x{:x} rd=x{} value=0x{:x}", head, rob.pc[head], head_rd, wdata)
+            trace_log(TRACE_FORMAT, trace_cycle(perf), rob.pc[head], rob.inst[head], head_rd, wdata, mem_addr)
+
+        if predictor is not None:
+            with Condition(commit & (rob.train[head] == Bits(1)(1))):
+                predictor.update(rob.pc[head], rob.taken[head] == Bits(1)(1), rob.calc_target[head])
+
+        with Condition(flush):
+            debug_log("ROB: Branch mispredict at PC=0x{:x}, flush to 0x{:x}", rob.pc[head], rob.next_pc[head])
+            trace_log(REDIRECT_FORMAT, trace_cycle(perf), rob.pc[head], Bits(1)(0))
+        branch_target[0] = redirect_word(flush, rob.next_pc[head])
+
+        with Condition(commit & (rob.is_halt[head] == Bits(1)(1))):
+            log("WB: Halt signal received, finishing simulation.")
+            for unit in stats:
+                unit.report()
+            finish()
+
+        # ---------- 执行 ----------
+        alu_grant, alu_idx = rs.select(lambda i: rs.alu_op[i] != ALUOp.MDU)
+        alu_tag = rs.tag[alu_idx]
+        alu_src1, alu_op1, alu_op2 = rs.operands(alu_idx)
+        alu_imm = rs.imm[alu_idx]
+        alu_pc = rs.pc[alu_idx]
+        alu_predicted = rs.predicted_pc[alu_idx]
+        alu_res = alu(
+            rs.alu_op[alu_idx], alu_op1, alu_op2,
+            perf.read(alu_imm[0:11]) if perf is not None else Bits(32)(0),
+        )
+        _, _, is_taken, calc_target, next_pc = resolve_branch(
+            rs.branch_type[alu_idx], alu_res, alu_pc, alu_src1, alu_imm, alu_predicted,
+        )
+        with Condition(alu_grant):
+            debug_log("RS: Issue tag={} pc=0x{:x} result=0x{:x}", alu_tag, alu_pc, alu_res)
+            rob.mispredict[alu_tag] = next_pc != alu_predicted
+            rob.next_pc[alu_tag] = next_pc
+            rob.taken[alu_tag] = is_taken
+            rob.calc_target[alu_tag] = calc_target
+
+        # 乘除法单元同一时间只处理一条；冲刷时正在计算的结果作废，但仍需等它完成
+        md_busy = RegArray(Bits(1), 1, initializer=[0])
+        md_kill = RegArray(Bits(1), 1, initializer=[0])
+        md_idle = md_busy[0] == Bits(1)(0)
+        md_grant, md_idx = rs.select(lambda i: (rs.alu_op[i] == ALUOp.MDU) & md_idle)
+        md_start = md_grant & ~flush
+        _, md_op1, md_op2 = rs.operands(md_idx)
+        md_tag = rs.tag[md_idx]
+        md_done, md_rd, md_result, _ = muldiv.build(
+            start = md_start,
+            op = rs.md_op[md_idx],
+            rs1 = md_op1,
+            rs2 = md_op2,
+            rd = md_tag if n == 5 else concat(Bits(5 - n)(0), md_tag),
+        )
+        md_busy[0] <= md_start | (~md_idle & ~md_done)
+        md_kill[0] <= ~md_idle & ~md_done & (flush | (md_kill[0] == Bits(1)(1)))
+
+        load_valid, load_tag, load_data = lsq.load_result(sram_dout)
+        with Condition(load_valid):
+            rob.mem_addr[load_tag] = lsq.load_addr[0]
+
+        buses = [
+            (alu_grant, alu_tag, alu_res),
+            (md_done & (md_kill[0] == Bits(1)(0)), md_rd[0:n - 1], md_result),
+            (load_valid, load_tag, load_data),
+        ]
+
+        # ---------- 派遣 ----------
+        # 与 EX 相同：branch_target 有效说明本拍到达的指令在错误路径上
+        is_flush = redirect_valid(branch_target[0])
+        dispatch = ctrl.valid & ~is_flush & ~flush
+        is_mem = ctrl.mem_op != MemOp.NONE
+        tag = rob.tail[0]
+
+        def source(uses, field):
+            idx = uses.select(field, Bits(5)(0))
+            busy, src_tag = rat.lookup(idx)
+            is_busy = busy == Bits(1)(1)
+            ready = ~is_busy | (pick(rob.done, src_tag, n) == Bits(1)(1))
+            value = is_busy.select(pick(rob.value, src_tag, n), reg_file[idx])
+            ready, value = snoop(buses, src_tag, ready, value)
+            return ready, src_tag, value
+
+        src1 = source((ctrl.op1_type == Op1Type.RS1) | (ctrl.branch_type == BranchType.JALR), ctrl.inst[15:19])
+        src2 = source((ctrl.op2_type == Op2Type.RS2) | (ctrl.mem_op == MemOp.STORE), ctrl.inst[20:24])
+
+        with Condition(dispatch):
+            rob.rd[tag] = ctrl.rd
+            rob.pc[tag] = pc
+            rob.inst[tag] = ctrl.inst
+            rob.is_halt[tag] = ctrl.is_halt
+            rob.mem_op[tag] = ctrl.mem_op
+            rob.is_branch[tag] = ctrl.branch_type != BranchType.NONE
+            rob.train[tag] = (ctrl.branch_type != BranchType.NONE) & (ctrl.branch_type != BranchType.JALR)
+            debug_log("ROB: Dispatch tag={} pc=0x{:x}", tag, pc)
+
+        load_issue = lsq_has & ~lsq_is_store & base_ready & (lsq.store_busy[0] == Bits(1)(0)) & ~flush
+        if perf is not None:
+            perf.count("load", load_issue)
+
+        rob.update(dispatch, commit, buses, flush)
+        rs.update(
+            dispatch & ~is_mem, ctrl, pc, imm, tag, src1, src2,
+            [(alu_grant, alu_idx), (md_start, md_idx)], buses, flush,
+        )
+        lsq.update(dispatch & is_mem, ctrl, imm, tag, src1, src2, load_issue, store_commit, lsq_addr, buses, flush)
+        rat.update(dispatch.select(ctrl.rd, Bits(5)(0)), tag, head_rd, head, flush)
+
+        is_stall = rob.stall() | rs.stall() | lsq.stall()
+
+        # 交给 MemoryUser 的访存请求：队头 load 发出，或 store 提交
+        return is_stall, lsq_addr, load_issue, store_commit, lsq_data, lsq.width[lsq.head[0]]
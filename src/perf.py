@@ -0,0 +1,87 @@
+from assassyn.frontend import *
+
+# 硬件性能计数器（Zicntr / Zihpm），程序通过 csrr 读取
+# 计数器均为 64 位，低 32 位在 0xC00 + i，高 32 位在 0xC80 + i；只读，csrrs/csrrc 的写入被忽略
+#   cycle    (0xC00) : Driver 每周期加一，time (0xC01) 为其别名
+#   instret  (0xC02) : WriteBack 收到有效（retire=1）的指令时加一，双发射时两条流水线都计入
+#   hpmcounter3..    : 见 HPM_EVENTS，由 Executor（分支预测失败 / load / store）、Bypass（各类 stall）和 DecoderImpl（冲刷）累加
+# 同一周期可能同时满足多种 stall 原因，每种原因各自计数
+# 停机时 WriteBack 调用 report() 输出一行 PERF_SUMMARY，main.py 用 parse_summary() 解析后写入 JSON 报告
+
+from .isa import CSR_CYCLE, CSR_TIME, CSR_INSTRET, CSR_HPMCOUNTER3, CSR_HIGH_OFFSET
+
+HPM_EVENTS = [
+    "branch_mispredict",    # hpmcounter3
+    "stall_load",           # hpmcounter4：EX 中 load 引起的 stall（哈佛模式下仅 load-use）
+    "stall_store",          # hpmcounter5：EX 中 store 引起的 stall（含写缓冲将满）
+    "stall_mem_store",      # hpmcounter6：MEM 中 store 写周期引起的 stall（非哈佛模式）
+    "stall_muldiv",         # hpmcounter7：乘除法单元忙
+    "load",                 # hpmcounter8：执行的 load 条数
+    "store",                # hpmcounter9：执行的 store 条数
+    "flush",                # hpmcounter10：ID 中指令被 EX 的跳转 / 重放冲刷的周期
+]
+
+SUMMARY_TAG = "PERF_SUMMARY:"
+
+def increment(counter):
+    return (counter[0].bitcast(UInt(64)) + UInt(64)(1)).bitcast(Bits(64))
+
+def trace_cycle(perf):
+    # 结构化 trace 中的周期号，未接入性能计数器时为 0
+    return perf.cycle[0][0:31] if perf is not None else Bits(32)(0)
+
+class PerfCounters:
+    def __init__(self):
+        self.cycle = RegArray(Bits(64), 1, initializer=[0])
+        self.instret = RegArray(Bits(64), 1, initializer=[0])
+        self.hpm = {name: RegArray(Bits(64), 1, initializer=[0]) for name in HPM_EVENTS}
+
+    def csr_map(self):
+        counters = [(CSR_CYCLE, self.cycle), (CSR_TIME, self.cycle), (CSR_INSTRET, self.instret)]
+        for i, name in enumerate(HPM_EVENTS):
+            counters.append((CSR_HPMCOUNTER3 + i, self.hpm[name]))
+        return counters
+
+    def tick(self):
+        self.cycle[0] <= increment(self.cycle)
+
+    def retire(self, *conds):
+        if len(conds) == 1:
+            with Condition(conds[0]):
+                self.instret[0] <= increment(self.instret)
+            return
+        # 双发射时每周期可能退休多条，按满足条件的个数累加
+        count = UInt(64)(0)
+        for cond in conds:
+            count = (count + cond.select(UInt(64)(1), UInt(64)(0))).bitcast(UInt(64))
+        self.instret[0] <= (self.instret[0].bitcast(UInt(64)) + count).bitcast(Bits(64))
+
+    def count(self, name, cond):
+        counter = self.hpm[name]
+        with Condition(cond):
+            counter[0] <= increment(counter)
+
+    def read(self, csr_addr):
+        # 未实现的 CSR 读出 0
+        value = Bits(32)(0)
+        for addr, counter in self.csr_map():
+            value = (csr_addr == Bits(12)(addr)).select(counter[0][0:31], value)
+            value = (csr_addr == Bits(12)(addr + CSR_HIGH_OFFSET)).select(counter[0][32:63], value)
+        return value
+
+    def report(self):
+        fields = ["cycles", "instret"] + HPM_EVENTS
+        values = [self.cycle[0], self.instret[0]] + [self.hpm[name][0] for name in HPM_EVENTS]
+        log(SUMMARY_TAG + " " + " ".join(f"{name}={{}}" for name in fields), *values)
+
+
+def parse_summary(raw):
+    # 取日志中最后一行 PERF_SUMMARY，返回 {名称: 数值}，并补充 cpi
+    summary = None
+    for line in raw.splitlines():
+        if SUMMARY_TAG in line:
+            fields = line.split(SUMMARY_TAG, 1)[1].split()
+            summary = {k: int(v) for k, v in (field.split("=") for field in fields)}
+    if summary is not None:
+        summary["cpi"] = summary["cycles"] / summary["instret"] if summary["instret"] else None
+    return summary
@@ -0,0 +1,42 @@
+from .instructions import decode_control, CTRL_SLICES, CTRL_WIDTH
+from .iss import IMM_DECODERS
+from .utils import BranchType
+
+# 预译码指令存储器：装载映像时在 Python 里把每个指令字展开为更宽的字存进指令 SRAM，
+# ID 直接取出控制字与立即数，不必每周期重新查译码表、拼接五种立即数
+# 宽字自低位起依次为：
+#   [0:31]   原指令字（rd / rs1 / rs2 / funct3 仍从这里取）
+#   [32:63]  按指令格式选好并符号扩展的立即数
+#   [64:..]  两级译码表给出的控制字（见 instructions.py 的 CTRL_FIELDS），非法指令为 0
+#   最高位   分支 / 跳转标志（条件分支、jal、jalr），不必经过完整译码即可识别控制转移指令
+
+INST_SLICE = (0, 31)
+IMM_SLICE = (32, 63)
+CTRL_SLICE = (64, 64 + CTRL_WIDTH - 1)
+CTI_BIT = 64 + CTRL_WIDTH
+PREDECODE_WIDTH = CTI_BIT + 1
+
+NOP_INST = 0x00000013
+
+def predecode(inst):
+    ctrl = decode_control(inst)
+    lo, hi = CTRL_SLICES['imm_type']
+    imm_type = (ctrl >> lo) & ((1 << (hi - lo + 1)) - 1)
+    imm = IMM_DECODERS[imm_type](inst) if imm_type in IMM_DECODERS else 0
+    lo, hi = CTRL_SLICES['branch_type']
+    is_cti = ctrl != 0 and (ctrl >> lo) & ((1 << (hi - lo + 1)) - 1) != BranchType.NONE.value
+    return inst | imm << IMM_SLICE[0] | ctrl << CTRL_SLICE[0] | int(is_cti) << CTI_BIT
+
+# ID 中取到 0（第一条指令 / 无效地址）时替换为 addi x0, x0, 0，与未预译码时一致
+NOP_WORD = predecode(NOP_INST)
+
+def predecode_image(words):
+    # 映像中大量重复的字（0、常用指令）只译码一次
+    cache = {}
+    return [cache[w] if w in cache else cache.setdefault(w, predecode(w)) for w in words]
+
+def write_predecoded_image(path, words):
+    digits = (PREDECODE_WIDTH + 3) // 4
+    line = f"%0{digits}x\n"
+    with open(path, "w") as f:
+        f.write((line * len(words)) % tuple(predecode_image(words)))
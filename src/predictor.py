@@ -0,0 +1,82 @@
+from assassyn.frontend import *
+from .utils import debug_log
+
+# 分支预测器：直接映射 BTB + 2 位饱和计数器 BHT
+# 状态寄存器在 build_cpu 顶层创建，IF 阶段只读（predict），EX 阶段在分支解析后训练（update）
+
+class BranchPredictor:
+    def __init__(self, index_bits):
+        self.index_bits = index_bits
+        entries = 1 << index_bits
+
+        self.btb_valid = RegArray(Bits(1), entries, initializer=[0] * entries)
+        self.btb_tag = RegArray(Bits(32), entries, initializer=[0] * entries)
+        self.btb_target = RegArray(Bits(32), entries, initializer=[0] * entries)
+        # 计数器初值为 1（弱不跳转），第一次跳转后即预测跳转
+        self.bht = RegArray(Bits(2), entries, initializer=[1] * entries)
+
+    def index(self, pc):
+        # pc 低两位恒为 0，从第 2 位开始取索引
+        return pc[2:2 + self.index_bits - 1]
+
+    def predict(self, pc):
+        idx = self.index(pc)
+        hit = (self.btb_valid[idx] == Bits(1)(1)) & (self.btb_tag[idx] == pc)
+        taken = hit & (self.bht[idx][1:1] == Bits(1)(1))
+        fallthrough = (pc.bitcast(UInt(32)) + UInt(32)(4)).bitcast(Bits(32))
+        predicted_pc = taken.select(self.btb_target[idx], fallthrough)
+
+        with Condition(taken):
+            debug_log("BP: Predict taken at PC=0x{:x} -> 0x{:x}", pc, predicted_pc)
+
+        return predicted_pc
+
+    def update(self, pc, is_taken, target):
+        idx = self.index(pc)
+        counter = self.bht[idx]
+
+        inc = (counter == Bits(2)(3)).select(
+            counter, (counter.bitcast(UInt(2)) + UInt(2)(1)).bitcast(Bits(2))
+        )
+        dec = (counter == Bits(2)(0)).select(
+            counter, (counter.bitcast(UInt(2)) - UInt(2)(1)).bitcast(Bits(2))
+        )
+        self.bht[idx] = is_taken.select(inc, dec)
+
+        # 只有跳转的分支才需要记录目标地址
+        with Condition(is_taken):
+            self.btb_valid[idx] = Bits(1)(1)
+            self.btb_tag[idx] = pc
+            self.btb_target[idx] = target
+
+        debug_log("BP: Update PC=0x{:x} taken={} target=0x{:x}", pc, is_taken, target)
+
+
+# 返回地址栈：ID 阶段识别出调用时压入 pc+4，识别出返回时弹出并作为预测目标
+# 栈满时循环覆盖最旧的项，预测错误由 EX 阶段照常纠正
+
+class ReturnAddressStack:
+    def __init__(self, depth_bits):
+        self.depth_bits = depth_bits
+        depth = 1 << depth_bits
+
+        self.stack = RegArray(Bits(32), depth, initializer=[0] * depth)
+        self.sp = RegArray(Bits(depth_bits), 1, initializer=[0])
+
+    def top(self):
+        n = self.depth_bits
+        top_idx = (self.sp[0].bitcast(UInt(n)) - UInt(n)(1)).bitcast(Bits(n))
+        return self.stack[top_idx]
+
+    def update(self, push, pop, push_addr):
+        n = self.depth_bits
+        sp = self.sp[0]
+        sp_inc = (sp.bitcast(UInt(n)) + UInt(n)(1)).bitcast(Bits(n))
+        sp_dec = (sp.bitcast(UInt(n)) - UInt(n)(1)).bitcast(Bits(n))
+
+        with Condition(push):
+            self.stack[sp] = push_addr
+            debug_log("RAS: Push 0x{:x}", push_addr)
+
+        with Condition(push | pop):
+            self.sp[0] = push.select(sp_inc, sp_dec)
@@ -0,0 +1,125 @@
+import re
+import sys
+import argparse
+from bisect import bisect_right
+from collections import defaultdict
+
+from .trace import read_trace, TRACE_TAG, PIPE_TAG, REDIRECT_TAG, CommitRecord, PipeRecord
+
+# 热点 PC 分析：读取 log_level="profile" 或 "debug" 的仿真日志（"trace" 不输出每周期的 PIPE 记录），按 PC 和函数统计
+#   cycles      : 指令停留在 ID 的周期数（含 stall）；被冲刷的错误路径周期记到引起重定向的指令上
+#   insts       : 提交次数（COMMIT 记录）
+#   stalls      : 在 ID 被 stall 的周期数
+#   mispredicts : 分支预测失败次数（REDIRECT 且 replay=0）
+#   replays     : 数据 cache 未命中重放次数（REDIRECT 且 replay=1）
+# 双发射时 PIPE 只给出 lane 0 的 pc：与之配对的 lane 1 指令只计 insts，周期计在 lane 0 的指令上
+# 函数名取自 objdump 的 .dump 反汇编（"00001044 <main>:"），PC 归属于不大于它的最近符号
+# 用法：python -m src.profiler raw.log workloads/array_test1.dump [--top N]
+
+SYMBOL_LINE = re.compile(r"^([0-9a-fA-F]+) <(.+)>:$")
+INST_LINE = re.compile(r"^\s*([0-9a-fA-F]+):\s+([0-9a-fA-F]+)\s+(.*)$")
+
+FIELDS = ("cycles", "insts", "stalls", "mispredicts", "replays")
+
+
+def load_symbols(dump_path):
+    # 返回 (按地址排序的 [(地址, 符号)], {pc: 反汇编文本})
+    symbols = []
+    disasm = {}
+    with open(dump_path) as f:
+        for line in f:
+            line = line.rstrip()
+            m = SYMBOL_LINE.match(line)
+            if m:
+                symbols.append((int(m.group(1), 16), m.group(2)))
+                continue
+            m = INST_LINE.match(line)
+            if m:
+                disasm[int(m.group(1), 16)] = " ".join(m.group(3).split())
+    symbols.sort()
+    return symbols, disasm
+
+def symbol_of(symbols, addrs, pc):
+    i = bisect_right(addrs, pc) - 1
+    return symbols[i][1] if i >= 0 else "?"
+
+
+def profile(records):
+    # records: parse_lines / read_trace 产生的记录流，返回 {pc: {字段: 计数}}
+    stats = defaultdict(lambda: dict.fromkeys(FIELDS, 0))
+    flush_owner = None
+    for r in records:
+        if isinstance(r, PipeRecord):
+            if r.flush:
+                # 冲刷周期记到最近一次重定向的指令上
+                if flush_owner is not None:
+                    stats[flush_owner]["cycles"] += 1
+                continue
+            entry = stats[r.pc]
+            entry["cycles"] += 1
+            entry["stalls"] += r.stall
+        elif isinstance(r, CommitRecord):
+            stats[r.pc]["insts"] += 1
+        else:
+            flush_owner = r.pc
+            stats[r.pc]["replays" if r.replay else "mispredicts"] += 1
+    return stats
+
+def by_function(stats, symbols):
+    addrs = [addr for addr, _ in symbols]
+    funcs = defaultdict(lambda: dict.fromkeys(FIELDS, 0))
+    for pc, entry in stats.items():
+        func = funcs[symbol_of(symbols, addrs, pc)]
+        for field in FIELDS:
+            func[field] += entry[field]
+    return funcs
+
+
+def print_table(title, rows, total_cycles, label_width=28):
+    print(title)
+    print(f"{'':<{label_width}} {'cycles':>10} {'%':>6} {'insts':>10} {'cpi':>6} {'stalls':>8} {'mispred':>8} {'replay':>7}")
+    for label, entry in rows:
+        share = 100.0 * entry["cycles"] / total_cycles if total_cycles else 0.0
+        cpi = f"{entry['cycles'] / entry['insts']:.2f}" if entry["insts"] else "-"
+        print(
+            f"{label:<{label_width}} {entry['cycles']:>10} {share:>6.1f} {entry['insts']:>10} {cpi:>6} "
+            f"{entry['stalls']:>8} {entry['mispredicts']:>8} {entry['replays']:>7}"
+        )
+    print()
+
+def report(stats, symbols, disasm, top=20):
+    total_cycles = sum(entry["cycles"] for entry in stats.values())
+    funcs = by_function(stats, symbols)
+    print_table(
+        "Per function:",
+        sorted(funcs.items(), key=lambda kv: kv[1]["cycles"], reverse=True),
+        total_cycles,
+    )
+    addrs = [addr for addr, _ in symbols]
+    hot = sorted(stats.items(), key=lambda kv: kv[1]["cycles"], reverse=True)[:top]
+    print_table(
+        f"Top {top} PCs:",
+        [(f"{pc:8x} {symbol_of(symbols, addrs, pc)}", entry) for pc, entry in hot],
+        total_cycles,
+    )
+    for pc, _ in hot:
+        print(f"  {pc:8x}: {disasm.get(pc, '?')}")
+    lane1 = sum(1 for entry in stats.values() if entry["insts"] and not entry["cycles"])
+    if lane1:
+        print(f"\nNote: {lane1} PCs committed without ID cycles (dual-issue lane 1); "
+              f"their cycles are counted on the paired lane-0 PC")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-PC / per-function cycle attribution")
+    parser.add_argument("log", help="simulator log built with log_level profile or debug")
+    parser.add_argument("dump", help="objdump disassembly of the workload")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    symbols, disasm = load_symbols(args.dump)
+    stats = profile(read_trace(args.log, (PIPE_TAG, TRACE_TAG, REDIRECT_TAG)))
+    if not stats:
+        print("No PIPE / COMMIT records found; rebuild with log_level=\"profile\"")
+        sys.exit(1)
+    report(stats, symbols, disasm, args.top)
@@ -0,0 +1,99 @@
+import os
+import sys
+import time
+import argparse
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+from .main import run_workload, get_cached_build, shared_build_args
+
+# 并行回归：workloads/ 下的每个 .exe 和 tests/ 下的每个 *_test.py 作为一个任务，放进进程池执行
+# 每个任务使用 .regress/<任务名> 作为独立的工作目录（workload 镜像、日志），互不覆盖；
+# 所有 workload 共用同一次编译（镜像按相对路径读取，见 main.shared_build_args），由主进程在分发任务前完成
+# 用法：python -m src.regress [-j N] [--no-verilog] [--log-level perf|trace|profile|debug]
+# 运行 Verilator 时默认 log_level="trace"，按提交记录比对两个后端；--no-verilog 时默认 "perf"
+
+current_path = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_path)
+regress_root = os.path.join(current_path, ".regress")
+
+def discover_jobs():
+    jobs = []
+    for name in sorted(os.listdir(os.path.join(project_root, "workloads"))):
+        if name.endswith(".exe"):
+            jobs.append(("workload", name[:-len(".exe")]))
+    for name in sorted(os.listdir(os.path.join(project_root, "tests"))):
+        if name.endswith("_test.py"):
+            jobs.append(("test", name[:-len(".py")]))
+    return jobs
+
+def run_job(kind, name, build_args, verilog):
+    job_dir = os.path.join(regress_root, f"{kind}-{name}")
+    os.makedirs(job_dir, exist_ok=True)
+    result = {"kind": kind, "name": name, "passed": False, "cycles": None, "error": None}
+    start = time.time()
+    try:
+        if kind == "workload":
+            logs, summary, mismatch = run_workload(
+                name, build_args, verilog=verilog, workspace_dir=os.path.join(job_dir, "workspace"),
+            )
+            sim = summary["simulator"]
+            # 能输出 PERF_SUMMARY 说明程序正常停机；同时跑了 verilator 时两者周期数与提交记录必须一致，
+            # 没有提交记录可比对（mismatch 为 "skipped"）时不算通过
+            result["passed"] = mismatch is None and sim is not None and all(
+                perf is not None and perf["cycles"] == sim["cycles"] for perf in summary.values()
+            )
+            if sim is not None:
+                result["cycles"] = sim["cycles"]
+        else:
+            proc = subprocess.run(
+                [sys.executable, os.path.join(project_root, "tests", f"{name}.py")],
+                cwd=job_dir,
+                capture_output=True,
+                text=True,
+            )
+            with open(os.path.join(job_dir, "output.log"), "w") as f:
+                f.write(proc.stdout)
+                f.write(proc.stderr)
+            result["passed"] = proc.returncode == 0
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.time() - start
+    return result
+
+def print_table(results):
+    print(f"{'job':<32} {'status':<6} {'cycles':>10} {'time(s)':>8}")
+    for r in results:
+        status = "PASS" if r["passed"] else "FAIL"
+        cycles = "-" if r["cycles"] is None else str(r["cycles"])
+        print(f"{r['kind'] + ':' + r['name']:<32} {status:<6} {cycles:>10} {r['seconds']:>8.1f}")
+        if r["error"] is not None:
+            print(f"    {r['error']}")
+    passed = sum(r["passed"] for r in results)
+    print(f"{passed}/{len(results)} passed")
+
+def main():
+    parser = argparse.ArgumentParser(description="Run all workloads and unit tests in parallel")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count())
+    parser.add_argument("--no-verilog", action="store_true")
+    parser.add_argument("--log-level", default=None, choices=["perf", "trace", "profile", "debug"])
+    parser.add_argument("--depth-log", type=int, default=16)
+    args = parser.parse_args()
+
+    log_level = args.log_level
+    if log_level is None:
+        log_level = "perf" if args.no_verilog else "trace"
+    build_args = {"depth_log": args.depth_log, "log_level": log_level}
+    jobs = discover_jobs()
+    # 先在主进程里编译（或命中缓存），避免多个任务同时 elaborate 同一配置
+    if any(kind == "workload" for kind, _ in jobs):
+        get_cached_build(shared_build_args(build_args), not args.no_verilog)
+    with ProcessPoolExecutor(max_workers=args.jobs) as pool:
+        futures = [pool.submit(run_job, kind, name, build_args, not args.no_verilog) for kind, name in jobs]
+        results = [future.result() for future in futures]
+
+    print_table(results)
+    return 0 if all(r["passed"] for r in results) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
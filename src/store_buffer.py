@@ -0,0 +1,128 @@
+from assassyn.frontend import *
+from .utils import debug_log
+
+# 写缓冲（仅哈佛模式）：store 在 EX 阶段入队即完成，数据 SRAM 端口空闲（本周期没有 load）时按 FIFO 顺序写回
+# 每项记录字地址、已移到对应字节通道的数据以及 4 位字节掩码
+#   整字写直接写回；部分写先读出原字（一拍），下一拍合并后写回
+# load 在 EX 阶段查询缓冲，按从旧到新的顺序逐字节合并命中项，结果寄存一拍后由 MEM 阶段与 SRAM 读出值合并
+# 状态寄存器在 build_cpu 顶层创建，MemoryUser 负责入队 / 写回 / 查询，MEM 阶段合并，Bypass 在缓冲将满时 stall
+
+def expand_byte_mask(mask):
+    # 4 位字节掩码扩展为 32 位位掩码
+    return concat(
+        mask[3:3].select(Bits(8)(0xFF), Bits(8)(0)),
+        mask[2:2].select(Bits(8)(0xFF), Bits(8)(0)),
+        mask[1:1].select(Bits(8)(0xFF), Bits(8)(0)),
+        mask[0:0].select(Bits(8)(0xFF), Bits(8)(0)),
+    )
+
+class StoreBuffer:
+    def __init__(self, depth_bits):
+        assert depth_bits >= 1, "store buffer needs at least 2 entries"
+        self.depth_bits = depth_bits
+        depth = 1 << depth_bits
+
+        self.addr = RegArray(Bits(30), depth, initializer=[0] * depth)
+        self.data = RegArray(Bits(32), depth, initializer=[0] * depth)
+        self.mask = RegArray(Bits(4), depth, initializer=[0] * depth)
+        self.head = RegArray(Bits(depth_bits), 1, initializer=[0])
+        self.tail = RegArray(Bits(depth_bits), 1, initializer=[0])
+        self.count = RegArray(Bits(depth_bits + 1), 1, initializer=[0])
+
+        # 部分写的读改写：上一拍已读出队头所在字 / 合并结果已锁存（读出后被 load 抢占端口时）
+        self.read_pending = RegArray(Bits(1), 1, initializer=[0])
+        self.head_ready = RegArray(Bits(1), 1, initializer=[0])
+        self.head_merged = RegArray(Bits(32), 1, initializer=[0])
+
+        # 供 MEM 阶段使用的 load 前递结果
+        self.fwd_mask = RegArray(Bits(4), 1, initializer=[0])
+        self.fwd_data = RegArray(Bits(32), 1, initializer=[0])
+
+    def stall(self, ex_is_store):
+        # 已满，或 EX 中的 store 入队后只剩一项以下时，ID 中的指令不能进入 EX
+        n = self.depth_bits
+        depth = 1 << n
+        count = self.count[0].bitcast(UInt(n + 1))
+        full = count >= UInt(n + 1)(depth)
+        near_full = count >= UInt(n + 1)(depth - 1)
+        return full | (ex_is_store & near_full)
+
+    def forward(self, is_load, addr):
+        n = self.depth_bits
+        depth = 1 << n
+        word = addr[2:31]
+        count = self.count[0].bitcast(UInt(n + 1))
+
+        fwd_mask = Bits(4)(0)
+        fwd_bytes = [Bits(8)(0)] * 4
+        # 从队头（最旧）到队尾（最新），新的覆盖旧的
+        for j in range(depth):
+            slot = (self.head[0].bitcast(UInt(n)) + UInt(n)(j)).bitcast(Bits(n))
+            live = UInt(n + 1)(j) < count
+            hit = live & (self.addr[slot] == word)
+            mask = self.mask[slot]
+            data = self.data[slot]
+            for b in range(4):
+                take = hit & (mask[b:b] == Bits(1)(1))
+                fwd_bytes[b] = take.select(data[8 * b:8 * b + 7], fwd_bytes[b])
+            fwd_mask = fwd_mask | hit.select(mask, Bits(4)(0))
+
+        fwd_mask = is_load.select(fwd_mask, Bits(4)(0))
+        self.fwd_mask[0] <= fwd_mask
+        self.fwd_data[0] <= concat(fwd_bytes[3], fwd_bytes[2], fwd_bytes[1], fwd_bytes[0])
+
+        with Condition(fwd_mask != Bits(4)(0)):
+            debug_log("SB: Forward Addr=0x{:x} Mask={}", addr, fwd_mask)
+
+    def merge(self, raw_data):
+        mask32 = expand_byte_mask(self.fwd_mask[0])
+        return (raw_data & ~mask32) | (self.fwd_data[0] & mask32)
+
+    def update(self, enq, addr, wdata, width, port_free, sram_dout):
+        # 返回本周期写回所需的 (we, 字地址, 写数据)；we 为 0 时 addr 用于读队头所在字
+        n = self.depth_bits
+        has_head = self.count[0] != Bits(n + 1)(0)
+        head = self.head[0]
+        head_data = self.data[head]
+        head_mask = self.mask[head]
+        head_full = head_mask == Bits(4)(0xF)
+        head_mask32 = expand_byte_mask(head_mask)
+        merged_now = (sram_dout & ~head_mask32) | (head_data & head_mask32)
+
+        pending = self.read_pending[0]
+        ready = self.head_ready[0]
+        do_write = port_free & has_head & (head_full | ready | pending)
+        do_read = port_free & has_head & ~head_full & ~ready & ~pending
+        write_data = head_full.select(head_data, ready.select(self.head_merged[0], merged_now))
+
+        # 读出的原字在下一拍到达；若该拍端口被 load 占用则先锁存合并结果
+        latch = pending & ~do_write
+        with Condition(latch):
+            self.head_merged[0] <= merged_now
+        self.head_ready[0] <= (ready | latch) & ~do_write
+        self.read_pending[0] <= do_read
+
+        # ---------- 入队 ----------
+        shamt = addr[0:1].concat(Bits(3)(0)).bitcast(UInt(5))
+        raw_mask = width.select1hot(Bits(4)(0b0001), Bits(4)(0b0011), Bits(4)(0b1111))
+        tail = self.tail[0]
+        with Condition(enq):
+            self.addr[tail] = addr[2:31]
+            self.data[tail] = wdata << shamt
+            self.mask[tail] = raw_mask << addr[0:1].bitcast(UInt(2))
+            debug_log("SB: Enqueue Addr=0x{:x} Data=0x{:x}", addr, wdata)
+
+        with Condition(do_write):
+            debug_log("SB: Drain Addr=0x{:x} Data=0x{:x}", concat(self.addr[head], Bits(2)(0)), write_data)
+
+        tail_inc = (tail.bitcast(UInt(n)) + UInt(n)(1)).bitcast(Bits(n))
+        head_inc = (head.bitcast(UInt(n)) + UInt(n)(1)).bitcast(Bits(n))
+        self.tail[0] <= enq.select(tail_inc, tail)
+        self.head[0] <= do_write.select(head_inc, head)
+
+        count = self.count[0].bitcast(UInt(n + 1))
+        count_inc = (count + UInt(n + 1)(1)).bitcast(Bits(n + 1))
+        count_dec = (count - UInt(n + 1)(1)).bitcast(Bits(n + 1))
+        self.count[0] <= (enq ^ do_write).select(enq.select(count_inc, count_dec), self.count[0])
+
+        return do_write, self.addr[head], write_data
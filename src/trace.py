@@ -0,0 +1,60 @@
+from collections import namedtuple
+from itertools import zip_longest
+
+# 结构化 trace：COMMIT / REDIRECT 在 log_level 为 "trace" 起输出，PIPE 在 "profile" 起输出，各字段均为不带前缀的十六进制
+#   COMMIT: <cycle> <pc> <inst> <rd> <wdata> <mem_addr>
+#     WriteBack 对每条退休的指令输出一行；rd 为 0 时 wdata 为 0，非访存指令 mem_addr 为 0
+#     乘除法在完成当拍提交，cycle 为提交周期
+#   PIPE: <cycle> <pc> <stall> <flush>
+#     DecoderImpl 每周期输出一行：ID 中指令的 pc，以及本周期是否被 stall / 冲刷
+#   REDIRECT: <cycle> <pc> <replay>
+#     EX 重定向取指时输出：replay=0 为分支预测失败，replay=1 为数据 cache 未命中重放
+# 读取时只做定长切分和 int(x, 16)，不使用正则，可以边读边比对很长的日志
+# first_mismatch() 逐条比对两个记录流（模拟器 vs Verilator），两个后端周期精确，cycle 也参与比较
+
+TRACE_TAG = "COMMIT:"
+TRACE_FORMAT = TRACE_TAG + " {:x} {:x} {:x} {:x} {:x} {:x}"
+PIPE_TAG = "PIPE:"
+PIPE_FORMAT = PIPE_TAG + " {:x} {:x} {:x} {:x}"
+REDIRECT_TAG = "REDIRECT:"
+REDIRECT_FORMAT = REDIRECT_TAG + " {:x} {:x} {:x}"
+
+CommitRecord = namedtuple("CommitRecord", ["cycle", "pc", "inst", "rd", "wdata", "mem_addr"])
+PipeRecord = namedtuple("PipeRecord", ["cycle", "pc", "stall", "flush"])
+RedirectRecord = namedtuple("RedirectRecord", ["cycle", "pc", "replay"])
+
+RECORD_TYPES = {
+    TRACE_TAG: CommitRecord,
+    PIPE_TAG: PipeRecord,
+    REDIRECT_TAG: RedirectRecord,
+}
+
+def parse_lines(lines, tags=tuple(RECORD_TYPES)):
+    # 从任意行迭代器中按出现顺序取出指定种类的记录（生成器）
+    # 日志行前面带有后端添加的前缀，因此按标签查找而不是按行首匹配
+    for line in lines:
+        for tag in tags:
+            pos = line.find(tag)
+            if pos >= 0:
+                record_type = RECORD_TYPES[tag]
+                fields = line[pos + len(tag):].split()
+                yield record_type(*(int(field, 16) for field in fields[:len(record_type._fields)]))
+                break
+
+def parse_commit_lines(lines):
+    return parse_lines(lines, (TRACE_TAG,))
+
+def first_mismatch(a, b):
+    # 返回第一处不一致的 (序号, a 的记录, b 的记录)，一方提前结束时另一方记为 None；完全一致返回 None
+    for i, (x, y) in enumerate(zip_longest(a, b)):
+        if x != y:
+            return i, x, y
+    return None
+
+def read_trace(path, tags=tuple(RECORD_TYPES)):
+    # 流式读取 raw.log 等日志文件，不把整个文件读入内存
+    with open(path) as f:
+        yield from parse_lines(f, tags)
+
+def read_commit_trace(path):
+    return read_trace(path, (TRACE_TAG,))
@@ -1,42 +1,82 @@
 from assassyn.frontend import *
 
-# opcode 常量
+from . import isa
+
+# 日志级别：在构建电路前由 build_cpu 设置，按详细程度从低到高排列
+# "perf"  : 只保留停机与统计输出，debug_log / trace_log 不生成任何日志节点
+# "trace"   : 额外输出提交记录与重定向记录（COMMIT / REDIRECT，见 trace.py），用于比对两个后端
+# "profile" : 再输出每周期一行的 PIPE 记录，供 profiler.py 做热点分析
+# "debug"   : 生成所有调试日志
+LOG_LEVELS = ("perf", "trace", "profile", "debug")
+_log_level = "debug"
+
+def set_log_level(level):
+    global _log_level
+    assert level in LOG_LEVELS, f"unknown log level {level}"
+    _log_level = level
+
+def debug_log(fmt, *args):
+    if _log_level == "debug":
+        log(fmt, *args)
+
+def trace_log(fmt, *args):
+    if LOG_LEVELS.index(_log_level) >= LOG_LEVELS.index("trace"):
+        log(fmt, *args)
+
+def profile_log(fmt, *args):
+    if LOG_LEVELS.index(_log_level) >= LOG_LEVELS.index("profile"):
+        log(fmt, *args)
+
+# opcode 常量（数值见 isa.py）
 # decode 阶段可以直接使用
 
-OP_R_TYPE = Bits(7)(0b0110011)
-OP_I_TYPE = Bits(7)(0b0010011)
-OP_LOAD = Bits(7)(0b0000011)
-OP_STORE = Bits(7)(0b0100011)
-OP_BRANCH = Bits(7)(0b1100011)
-OP_JAL = Bits(7)(0b1101111)
-OP_JALR = Bits(7)(0b1100111)
-OP_LUI = Bits(7)(0b0110111)
-OP_AUIPC = Bits(7)(0b0010111)
-OP_SYSTEM = Bits(7)(0b1110011)
+OP_R_TYPE = Bits(7)(isa.OPCODE_R_TYPE)
+OP_I_TYPE = Bits(7)(isa.OPCODE_I_TYPE)
+OP_LOAD = Bits(7)(isa.OPCODE_LOAD)
+OP_STORE = Bits(7)(isa.OPCODE_STORE)
+OP_BRANCH = Bits(7)(isa.OPCODE_BRANCH)
+OP_JAL = Bits(7)(isa.OPCODE_JAL)
+OP_JALR = Bits(7)(isa.OPCODE_JALR)
+OP_LUI = Bits(7)(isa.OPCODE_LUI)
+OP_AUIPC = Bits(7)(isa.OPCODE_AUIPC)
+OP_SYSTEM = Bits(7)(isa.OPCODE_SYSTEM)
 
 class ImmType:
-    R = Bits(6)(0b000001)
-    I = Bits(6)(0b000010)
-    S = Bits(6)(0b000100)
-    B = Bits(6)(0b001000)
-    U = Bits(6)(0b010000)
-    J = Bits(6)(0b100000)
+    R = Bits(6)(isa.IMM_R)
+    I = Bits(6)(isa.IMM_I)
+    S = Bits(6)(isa.IMM_S)
+    B = Bits(6)(isa.IMM_B)
+    U = Bits(6)(isa.IMM_U)
+    J = Bits(6)(isa.IMM_J)
 
 # ex 阶段
 
 class ALUOp:
-    ADD = Bits(12)(0b000000000001)
-    SUB = Bits(12)(0b000000000010)
-    SLL = Bits(12)(0b000000000100)
-    SLT = Bits(12)(0b000000001000)
-    SLTU = Bits(12)(0b000000010000)
-    XOR = Bits(12)(0b000000100000)
-    SRL = Bits(12)(0b000001000000)
-    SRA = Bits(12)(0b000010000000)
-    OR = Bits(12)(0b000100000000)
-    AND = Bits(12)(0b001000000000)
-    SYS = Bits(12)(0b010000000000)
-    NOP = Bits(12)(0b100000000000)
+    ADD = Bits(14)(0b00000000000001)
+    SUB = Bits(14)(0b00000000000010)
+    SLL = Bits(14)(0b00000000000100)
+    SLT = Bits(14)(0b00000000001000)
+    SLTU = Bits(14)(0b00000000010000)
+    XOR = Bits(14)(0b00000000100000)
+    SRL = Bits(14)(0b00000001000000)
+    SRA = Bits(14)(0b00000010000000)
+    OR = Bits(14)(0b00000100000000)
+    AND = Bits(14)(0b00001000000000)
+    SYS = Bits(14)(0b00010000000000)
+    NOP = Bits(14)(0b00100000000000)
+    MDU = Bits(14)(0b01000000000000) # 乘除法，交给 MulDivUnit，具体操作见 MulDivOp
+    CSR = Bits(14)(0b10000000000000) # 读性能计数器 CSR，地址为 imm 低 12 位
+
+# RV32M 乘除法操作，直接沿用指令的 funct3 编码
+class MulDivOp:
+    MUL = Bits(3)(0b000)
+    MULH = Bits(3)(0b001)
+    MULHSU = Bits(3)(0b010)
+    MULHU = Bits(3)(0b011)
+    DIV = Bits(3)(0b100)
+    DIVU = Bits(3)(0b101)
+    REM = Bits(3)(0b110)
+    REMU = Bits(3)(0b111)
 
 class BranchType:
     NONE = Bits(9)(0b000000001)
@@ -59,6 +99,19 @@ class Op2Type:
     IMM = Bits(3)(0b010)
     FOUR = Bits(3)(0b100)
 
+# EX / ROB 写给 IF 的重定向寄存器 branch_target：[0:31] 为目标 pc，[32] 为有效位
+# 有效位单独给出，目标可以是 0（如 pc 0 处访存指令的 DCache 重放）
+REDIRECT_WIDTH = 33
+
+def redirect_word(valid, target):
+    return valid.select(concat(Bits(1)(1), target), Bits(REDIRECT_WIDTH)(0))
+
+def redirect_valid(word):
+    return word[32:32]
+
+def redirect_target(word):
+    return word[0:31]
+
 # mem 阶段
 
 class MemOp:
@@ -75,36 +128,132 @@ class MemSign:
     SIGNED = Bits(1)(0b0)
     UNSIGNED = Bits(1)(0b1)
 
-WbCtrlSignals = Record(
-    rd = Bits(5),
-    is_halt = Bits(1),
+# 级间记录（流水线寄存器）
+# 紧凑编码模式（build_cpu(compact_ctrl=True)）下，其中的独热字段改为二进制编号，
+# 生产端打包时编码，消费端 pop 之后再译回独热码，阶段内部逻辑不变
+# {字段名: 独热码位宽}
+ONEHOT_FIELDS = {
+    'alu_op': 14,
+    'branch_type': 9,
+    'op1_type': 3,
+    'op2_type': 3,
+    'mem_op': 3,
+    'mem_width': 3,
+}
+
+def code_bits(width):
+    return max(1, (width - 1).bit_length())
+
+def onehot_to_index(value, width):
+    # 编号的第 k 位为所有下标第 k 位为 1 的独热位之或；全 0 的独热码编码为 0
+    bits = []
+    for k in range(code_bits(width)):
+        bit = Bits(1)(0)
+        for i in range(width):
+            if i >> k & 1:
+                bit = bit | value[i:i]
+        bits.append(bit)
+    return bits[0] if len(bits) == 1 else concat(*reversed(bits))
+
+def index_to_onehot(index, width):
+    n = code_bits(width)
+    return concat(*[index == Bits(n)(i) for i in reversed(range(width))])
+
+class CompactView:
+    # 紧凑记录的读取端：独热字段在第一次访问时译回独热码，其余字段原样返回
+    def __init__(self, value):
+        self._value = value
+        self._decoded = {}
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        if name not in ONEHOT_FIELDS:
+            return getattr(self._value, name)
+        if name not in self._decoded:
+            self._decoded[name] = index_to_onehot(getattr(self._value, name), ONEHOT_FIELDS[name])
+        return self._decoded[name]
+
+class StageRecord:
+    # fields 为 {字段名: 位宽}，同时生成独热（wide）与紧凑（compact）两种 Record，没有独热字段时两者相同
+    def __init__(self, **fields):
+        self.fields = fields
+        self.wide = Record(**{name: Bits(width) for name, width in self._widths(False).items()})
+        self.compact = self.wide
+        if any(name in ONEHOT_FIELDS for name in fields):
+            self.compact = Record(**{name: Bits(width) for name, width in self._widths(True).items()})
+
+    def _widths(self, compact):
+        return {
+            name: code_bits(width) if compact and name in ONEHOT_FIELDS else width
+            for name, width in self.fields.items()
+        }
+
+    def record(self, compact=False):
+        return self.compact if compact else self.wide
+
+    def bits(self, compact=False):
+        return sum(self._widths(compact).values())
+
+    def bundle(self, compact=False, **values):
+        if compact:
+            values = {
+                name: onehot_to_index(value, ONEHOT_FIELDS[name]) if name in ONEHOT_FIELDS else value
+                for name, value in values.items()
+            }
+        return self.record(compact).bundle(**values)
+
+    def view(self, value, compact=False):
+        return CompactView(value) if compact else value
+
+WbCtrlFormat = StageRecord(
+    rd = 5,
+    is_halt = 1,
+    retire = 1,     # 有效指令（非气泡），用于 instret 计数
+    pc = 32,        # 以下三项只用于提交记录
+    inst = 32,
+    mem_addr = 32,  # 访存地址，非访存指令为 0
 )
 
-MemCtrlSignals = Record(
-    mem_op = Bits(3),
-    mem_width = Bits(3),
-    mem_sign = Bits(1), # 0 for signed, 1 for unsigned
-    rd = Bits(5),
-    is_halt = Bits(1),
+MemCtrlFormat = StageRecord(
+    mem_op = 3,
+    mem_width = 3,
+    mem_sign = 1,   # 0 for signed, 1 for unsigned
+    rd = 5,
+    is_halt = 1,
+    retire = 1,
+    pc = 32,
+    inst = 32,
 )
 
-ExCtrlSignals = Record(
-    alu_op = Bits(12),
-    branch_type = Bits(9),
-    op1_type = Bits(3),
-    op2_type = Bits(3),
-    predicted_pc = Bits(32),
-    mem_op = Bits(3),
-    mem_width = Bits(3),
-    mem_sign = Bits(1),
-    rd = Bits(5),
-    is_halt = Bits(1),
-    rs1_data = Bits(32),
-    rs2_data = Bits(32),
+# valid 为 0 表示气泡（冲刷 / 停顿或取指为 0 换成的占位 NOP），EX 不计入退休
+ExCtrlFormat = StageRecord(
+    valid = 1,
+    alu_op = 14,
+    md_op = 3,
+    branch_type = 9,
+    op1_type = 3,
+    op2_type = 3,
+    predicted_pc = 32,
+    mem_op = 3,
+    mem_width = 3,
+    mem_sign = 1,
+    rd = 5,
+    is_halt = 1,
+    rs1_data = 32,
+    rs2_data = 32,
+    inst = 32,
 )
 
+WbCtrlSignals = WbCtrlFormat.wide
+MemCtrlSignals = MemCtrlFormat.wide
+ExCtrlSignals = ExCtrlFormat.wide
+
+# Decoder -> DecoderImpl 为同一周期内的组合信号，不经过流水线寄存器，始终为独热编码
 DecoderSignals = Record(
-    alu_op = Bits(12),
+    valid = Bits(1),
+    alu_op = Bits(14),
+    md_op = Bits(3),
     branch_type = Bits(9),
     op1_type = Bits(3),
     op2_type = Bits(3),
@@ -118,8 +267,50 @@ DecoderSignals = Record(
     rs1_data = Bits(32),
     rs2_data = Bits(32),
     imm = Bits(32),
+    ras_push = Bits(1),
+    ras_pop = Bits(1),
+    inst = Bits(32),
+)
+
+# 双发射模式下第二条流水线（lane 1）的控制信号，lane 1 只执行不访存、不跳转的 ALU 指令
+# ID -> EX：valid 为 0 时本周期只发射了一条指令
+Lane1ExFormat = StageRecord(
+    valid = 1,
+    alu_op = 14,
+    op1_type = 3,
+    op2_type = 3,
+    rd = 5,
+    rs1_data = 32,
+    rs2_data = 32,
+    imm = 32,
+    pc = 32,
+    inst = 32,
+)
+
+# EX -> MEM -> WB，数据单独走 data1 端口
+Lane1Format = StageRecord(
+    rd = 5,
+    retire = 1,
+    pc = 32,
+    inst = 32,
 )
 
+Lane1ExSignals = Lane1ExFormat.wide
+Lane1Signals = Lane1Format.wide
+
+def pipeline_register_bits(compact=False, dual_issue=False):
+    # 各级间 FIFO 每项的位宽（控制记录加上单独的数据端口），返回 {级间: 位数}
+    bits = {
+        "ID->EX": ExCtrlFormat.bits(compact) + 4 * 32,  # pc / rs1 / rs2 / imm
+        "EX->MEM": MemCtrlFormat.bits(compact) + 32,    # alu_result
+        "MEM->WB": WbCtrlFormat.bits(compact) + 32,     # data
+    }
+    if dual_issue:
+        bits["ID->EX"] += Lane1ExFormat.bits(compact)
+        bits["EX->MEM"] += Lane1Format.bits(compact) + 32
+        bits["MEM->WB"] += Lane1Format.bits(compact) + 32
+    return bits
+
 # bypass 阶段
 
 class Rs1Type:
@@ -134,6 +325,16 @@ class Rs2Type:
     MEM = Bits(4)(0b0100)
     WB = Bits(4)(0b1000)
 
+# 双发射模式的旁路选择：两条流水线各有 EX / MEM / WB 三个来源
+class FwdType:
+    NONE = Bits(7)(0b0000001)
+    EX = Bits(7)(0b0000010)
+    MEM = Bits(7)(0b0000100)
+    WB = Bits(7)(0b0001000)
+    EX1 = Bits(7)(0b0010000)
+    MEM1 = Bits(7)(0b0100000)
+    WB1 = Bits(7)(0b1000000)
+
 # writeback 阶段
 class IF_WB:
     YES = Bits(2)(0b01)
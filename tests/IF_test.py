@@ -6,6 +6,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 from assassyn.frontend import *
 from tests.common import run_test_module
 from src.IF import Fetcher, FetcherImpl
+from src.utils import REDIRECT_WIDTH, redirect_word
 
 
 # --- Driver ---
@@ -49,8 +50,8 @@ class Driver(Module):
             log("Driver: All vectors applied. Finishing simulation.")
             finish()
 
-        # 驱动全局寄存器
-        branch_target[0] = t
+        # 驱动全局寄存器（向量中目标为 0 表示不重定向）
+        branch_target[0] = redirect_word(t != Bits(32)(0), t)
 
         return s
 
@@ -155,7 +156,7 @@ if __name__ == "__main__":
         driver = Driver()
 
         # 全局控制信号
-        br_target = RegArray(Bits(32), 1)
+        br_target = RegArray(Bits(REDIRECT_WIDTH), 1)
         pc_reg, last_pc_reg = fetcher.build()
         pc = decoder.build()
         stall_wire = driver.build(br_target, fetcher)
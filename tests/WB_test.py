@@ -7,6 +7,28 @@ from assassyn.frontend import *
 from tests.common import run_test_module
 from src.WB import WriteBack
 from src.utils import WbCtrlSignals
+from src.trace import parse_commit_lines
+
+
+# 测试向量: (rd, data, is_halt)
+# 覆盖各种情况：
+# 1. 正常写回（非零寄存器）
+# 2. 零寄存器保护（不写入 x0）
+# 3. 多次写回（覆盖测试）
+# 4. 旁路数据输出验证
+# 5. is_halt 信号测试
+VECTORS = [
+    (1, 0x12345678, 0),  # Cyc 0: 写入 x1 = 0x12345678
+    (2, 0x9ABCDEF0, 0),  # Cyc 1: 写入 x2 = 0x9ABCDEF0
+    (0, 0xDEADBEEF, 0),  # Cyc 2: 尝试写入 x0（应该被忽略）
+    (1, 0x11111111, 0),  # Cyc 3: 覆盖 x1 = 0x11111111
+    (5, 0x22222222, 0),  # Cyc 4: 写入 x5 = 0x22222222
+    (10, 0x33333333, 0), # Cyc 5: 写入 x10 = 0x33333333
+    (31, 0xFFFFFFFF, 0), # Cyc 6: 写入 x31 = 0xFFFFFFFF
+    (15, 0x00000000, 0), # Cyc 7: 写入 x15 = 0x00000000
+    (20, 0x88888888, 0), # Cyc 8: 写入 x20 = 0x88888888
+    (0, 0x00000001, 1),  # Cyc 9: 尝试写入 x0 且 is_halt=1（应该被忽略且暂停）
+]
 
 
 # --- Driver ---
@@ -16,47 +38,32 @@ class Driver(Module):
 
     @module.combinational
     def build(self, dut: Module):
-        # 测试向量: (rd, data, is_halt)
-        # 覆盖各种情况：
-        # 1. 正常写回（非零寄存器）
-        # 2. 零寄存器保护（不写入 x0）
-        # 3. 多次写回（覆盖测试）
-        # 4. 旁路数据输出验证
-        # 5. is_halt 信号测试
-        vectors = [
-            (1, 0x12345678, 0),  # Cyc 0: 写入 x1 = 0x12345678
-            (2, 0x9ABCDEF0, 0),  # Cyc 1: 写入 x2 = 0x9ABCDEF0
-            (0, 0xDEADBEEF, 0),  # Cyc 2: 尝试写入 x0（应该被忽略）
-            (1, 0x11111111, 0),  # Cyc 3: 覆盖 x1 = 0x11111111
-            (5, 0x22222222, 0),  # Cyc 4: 写入 x5 = 0x22222222
-            (10, 0x33333333, 0), # Cyc 5: 写入 x10 = 0x33333333
-            (31, 0xFFFFFFFF, 0), # Cyc 6: 写入 x31 = 0xFFFFFFFF
-            (15, 0x00000000, 0), # Cyc 7: 写入 x15 = 0x00000000
-            (20, 0x88888888, 0), # Cyc 8: 写入 x20 = 0x88888888
-            (0, 0x00000001, 1),  # Cyc 9: 尝试写入 x0 且 is_halt=1（应该被忽略且暂停）
-        ]
-
         cnt = RegArray(UInt(32), 1, initializer=[0])
         (cnt & self)[0] <= cnt[0] + UInt(32)(1)
         idx = cnt[0]
 
-        rd, data, is_halt = Bits(5)(0), Bits(32)(0), Bits(1)(0)
+        rd, data, is_halt, pc = Bits(5)(0), Bits(32)(0), Bits(1)(0), Bits(32)(0)
 
-        for i, v in enumerate(vectors):
+        for i, v in enumerate(VECTORS):
             is_match = idx == UInt(32)(i)
             rd = is_match.select(Bits(5)(v[0]), rd)
             data = is_match.select(Bits(32)(v[1]), data)
             is_halt = is_match.select(Bits(1)(v[2]), is_halt)
+            pc = is_match.select(Bits(32)(i * 4), pc)
 
-        valid_test = idx < UInt(32)(len(vectors))
+        valid_test = idx < UInt(32)(len(VECTORS))
         with Condition(valid_test):
             ctrl = WbCtrlSignals.bundle(
                 rd=rd,
                 is_halt=is_halt,
+                retire=Bits(1)(1),
+                pc=pc,
+                inst=Bits(32)(0x00000013),
+                mem_addr=Bits(32)(0),
             )
             call = dut.async_called(ctrl=ctrl, data=data)
 
-        test_end_cycle = UInt(32)(len(vectors) + 2)
+        test_end_cycle = UInt(32)(len(VECTORS) + 2)
 
         with Condition(idx >= test_end_cycle):
             log("Driver: All vectors applied. Finishing simulation.")
@@ -134,6 +141,14 @@ def check(output):
         print(f"❌ Error: x1 second write should be 0x11111111, got 0x{x1_writes[1][0]:08x}.")
         assert False, "x1 second write mismatch"
 
+    # 验证提交记录：每条 retire 的指令一条，x0 的写回数据记为 0
+    records = list(parse_commit_lines(output.split("\n")))
+    print(f"Commit Records: {[(hex(r.pc), r.rd, hex(r.wdata)) for r in records]}")
+    expected_commits = [(i * 4, rd, data if rd != 0 else 0) for i, (rd, data, _) in enumerate(VECTORS[:9])]
+    if [(r.pc, r.rd, r.wdata) for r in records[:9]] != expected_commits:
+        print(f"❌ Error: commit records mismatch.")
+        assert False, "Commit trace mismatch"
+
     # 验证 is_halt 信号（检查仿真是否正常结束）
     if "WB: Halt signal received, finishing simulation." not in output:
         print(f"❌ Error: Simulation did not complete properly.")
@@ -0,0 +1,73 @@
+import sys
+import os
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tests.common import run_test_module
+from tests.iss_test import i_type, s_type
+from src.main import build_cpu
+from src.memory_map import write_word_image
+from src.perf import parse_summary
+from src.trace import parse_lines, parse_commit_lines, REDIRECT_TAG
+
+
+# 测试程序：数据 cache 未命中时从本条指令的 pc 重放
+#   0x00 的 lw 冷启动未命中，重放目标为 pc 0，不能被当作"没有重定向"而丢掉
+#   0x08 的 sw 与 lw 在同一行，命中
+#   0x0C 的停机 store 写 0xFFFFFFFF，未命中而重放；重放的那一次不能停机，填充后再次执行时才停机
+PROGRAM = [
+    i_type(64, 0, 0x2, 1, 0x03),        # 0x00: lw   x1, 64(x0)
+    i_type(1, 1, 0x0, 2, 0x13),         # 0x04: addi x2, x1, 1
+    s_type(68, 2, 0, 0x2),              # 0x08: sw   x2, 68(x0)
+    0xFE000FA3,                         # 0x0C: sb   x0, -1(x0)（停机）
+]
+DATA = [0] * 32
+DATA[64 // 4] = 7
+
+# (pc, rd, wdata)
+EXPECTED = [
+    (0x00, 1, 7),
+    (0x04, 2, 8),
+    (0x08, 0, 0),
+    (0x0C, 0, 0),
+]
+
+# (pc, replay)
+EXPECTED_REDIRECTS = [(0x00, 1), (0x0C, 1)]
+
+
+# --- Check ---
+def check(output):
+    print(">>> Verifying DCache replay at PC 0 and of the halt store...")
+    lines = output.split("\n")
+
+    committed = [(r.pc, r.rd, r.wdata) for r in parse_commit_lines(lines)]
+    print(f"Commit Records: {[(hex(pc), rd, hex(wdata)) for pc, rd, wdata in committed]}")
+    if committed != EXPECTED:
+        print(f"❌ Error: expected {[(hex(pc), rd, hex(wdata)) for pc, rd, wdata in EXPECTED]}")
+        assert False, "Commit trace mismatch"
+
+    redirects = [(r.pc, r.replay) for r in parse_lines(lines, (REDIRECT_TAG,))]
+    print(f"Redirects: {[(hex(pc), replay) for pc, replay in redirects]}")
+    if redirects != EXPECTED_REDIRECTS:
+        print(f"❌ Error: expected {[(hex(pc), replay) for pc, replay in EXPECTED_REDIRECTS]}")
+        assert False, "DCache replay redirects mismatch"
+
+    perf = parse_summary(output)
+    assert perf is not None, "No PERF_SUMMARY"
+
+    print("✅ DCache Replay Passed:")
+    print("  - Load missing at PC 0 replayed from PC 0 and committed once.")
+    print("  - Halt store halted only after its miss was replayed.")
+
+
+# --- Top ---
+if __name__ == "__main__":
+    workspace_dir = tempfile.mkdtemp()
+    write_word_image(os.path.join(workspace_dir, "workload.exe"), PROGRAM)
+    write_word_image(os.path.join(workspace_dir, "workload.data"), DATA)
+
+    sys = build_cpu(10, harvard=True, dcache_set_bits=1, log_level="trace", workspace_dir=workspace_dir)
+
+    run_test_module(sys, check)
@@ -0,0 +1,141 @@
+import sys
+import os
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from assassyn.frontend import *
+from tests.common import run_test_module
+from src.dcache import DCache
+
+# 2 组、2 路 LRU、每行 2 个字：0x00 / 0x10 / 0x20 映射到同一组
+# 测试向量: (is_load, is_store, addr, wdata)，未命中时重复该访存直到命中（模拟 EX 的重放）
+ACCESS_SEQ = [
+    (0, 1, 0x00, 0xA),   # 未命中，填充后写入，行变脏
+    (1, 0, 0x04, 0),     # 命中同一行
+    (0, 1, 0x10, 0xB),   # 未命中，占用另一路
+    (1, 0, 0x00, 0),     # 命中，0x10 行成为 LRU
+    (1, 0, 0x20, 0),     # 未命中，替换 0x10 行（脏，写回）
+    (1, 0, 0x10, 0),     # 未命中，替换 0x00 行（脏，写回），从后备存储器读回 0xB
+    (1, 0, 0x00, 0),     # 未命中，替换 0x20 行（干净），读回 0xA
+]
+EXPECTED_MISSES = 5
+EXPECTED_WRITEBACKS = 2
+LATENCY = 2
+MEM_WORDS = 64
+SIM_CYCLES = 200
+
+
+def mem_word(addr):
+    return 0x2000 + (addr >> 2)
+
+
+# --- Driver ---
+class Driver(Module):
+    def __init__(self):
+        super().__init__(ports={})
+
+    @module.combinational
+    def build(self, dut: Module):
+        cnt = RegArray(UInt(32), 1, initializer=[0])
+        (cnt & self)[0] <= cnt[0] + UInt(32)(1)
+
+        with Condition(cnt[0] < UInt(32)(SIM_CYCLES)):
+            call = dut.async_called()
+
+        with Condition(cnt[0] >= UInt(32)(SIM_CYCLES)):
+            log("Driver: All cycles done. Finishing simulation.")
+            finish()
+
+
+# --- Harness ---
+class DCacheHarness(Module):
+    def __init__(self):
+        super().__init__(ports={})
+
+    @module.combinational
+    def build(self, dcache: DCache, mem: SRAM):
+        # 上一拍命中的 load 结果
+        delivered = RegArray(Bits(1), 1, initializer=[0])
+        with Condition(delivered[0] == Bits(1)(1)):
+            log("DC_TEST: data=0x{:x}", dcache.dout[0])
+
+        seq_idx = RegArray(UInt(32), 1, initializer=[0])
+        is_load, is_store, addr, wdata = Bits(1)(0), Bits(1)(0), Bits(32)(0), Bits(32)(0)
+        for i, v in enumerate(ACCESS_SEQ):
+            is_match = seq_idx[0] == UInt(32)(i)
+            is_load = is_match.select(Bits(1)(v[0]), is_load)
+            is_store = is_match.select(Bits(1)(v[1]), is_store)
+            addr = is_match.select(Bits(32)(v[2]), addr)
+            wdata = is_match.select(Bits(32)(v[3]), wdata)
+
+        hit = dcache.hit(addr)
+        dcache.build(
+            is_load=is_load,
+            is_store=is_store,
+            addr=addr,
+            wdata=wdata,
+            width=Bits(3)(0b100),
+            mem=mem,
+        )
+
+        advance = (is_load | is_store) & hit
+        delivered[0] <= is_load & hit
+        with Condition(advance):
+            seq_idx[0] <= seq_idx[0] + UInt(32)(1)
+
+        with Condition(seq_idx[0] == UInt(32)(len(ACCESS_SEQ))):
+            dcache.report()
+
+
+# --- Check ---
+def check(output):
+    print(">>> Verifying DCache...")
+    captured = []
+    report = None
+    for line in output.split("\n"):
+        if "DC_TEST: data=" in line:
+            captured.append(int(line.split("=")[-1], 16))
+        if "DCache: hits=" in line:
+            report = line
+
+    expected = [mem_word(0x04), 0xA, mem_word(0x20), 0xB, 0xA]
+
+    print(f"Captured Sequence: {[hex(x) for x in captured]}")
+    print(f"Expected Sequence: {[hex(x) for x in expected]}")
+
+    if captured != expected:
+        print("❌ Error: load data mismatch.")
+        assert False, "Load data mismatch"
+
+    assert report is not None, "Missing DCache report"
+    stats = dict(kv.split("=") for kv in report.split("DCache: ")[1].split())
+    print(f"Stats: {stats}")
+    assert int(stats["hits"]) == len(ACCESS_SEQ), "Hit count mismatch"
+    assert int(stats["misses"]) == EXPECTED_MISSES, "Miss count mismatch"
+    assert int(stats["writebacks"]) == EXPECTED_WRITEBACKS, "Writeback count mismatch"
+
+    print("✅ DCache Passed:")
+    print("  - Write-allocate and write-back of dirty victims verified.")
+    print("  - LRU replacement and hit/miss/writeback counters verified.")
+
+
+# --- Top ---
+if __name__ == "__main__":
+    init_path = os.path.join(tempfile.gettempdir(), "dcache_test.exe")
+    with open(init_path, "w") as f:
+        for i in range(MEM_WORDS):
+            f.write(f"{mem_word(i << 2):08x}\n")
+
+    sys = SysBuilder("test_dcache")
+    with sys:
+        mem = SRAM(width=32, depth=MEM_WORDS, init_file=init_path)
+        dcache = DCache(set_bits=1, way_bits=1, line_bits=1, latency=LATENCY, replacement="lru", mem_addr_bits=6)
+
+        harness = DCacheHarness()
+        driver = Driver()
+
+        harness.build(dcache, mem)
+        driver.build(harness)
+
+    run_test_module(sys, check)
@@ -0,0 +1,71 @@
+import sys
+import os
+import random
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.instructions import instruction_table, decode_table, decode_control, control_word, _value
+from src.isa import ENCODINGS
+from src.utils import IF_WB
+
+
+# 原来逐条匹配的译码：所有命中条目的控制字按位或
+def linear_decode(inst):
+    opcode, funct3, funct7 = inst & 0x7F, (inst >> 12) & 0x7, inst >> 25
+    word = 0
+    for entry in instruction_table:
+        if opcode != _value(entry[1]):
+            continue
+        if entry[2] is not None and funct3 != entry[2]:
+            continue
+        if entry[3] is not None and funct7 != entry[3]:
+            continue
+        word |= control_word(entry)
+    return word
+
+
+def samples(count=20000, seed=0):
+    # 每个 opcode / funct3 / funct7 组合各一条，再加上随机指令字
+    rng = random.Random(seed)
+    for opcode in range(0x80):
+        for funct3 in range(8):
+            for funct7 in (0x00, 0x01, 0x20, 0x21, 0x60, 0x7F):
+                rs = rng.getrandbits(18) << 7 & 0x01FF8F80  # 随机 rd / rs1 / rs2
+                yield (funct7 << 25) | (funct3 << 12) | opcode | rs
+    for _ in range(count):
+        yield rng.getrandbits(32)
+
+
+# --- Check ---
+def check():
+    print(">>> Verifying two-level decode table...")
+    print(f"Opcode groups: {len(decode_table)}, "
+          f"max index bits: {max(len(g.f7_bits) + 3 * g.use_funct3 for g in decode_table.values())}")
+
+    mismatches = [inst for inst in samples() if decode_control(inst) != linear_decode(inst)]
+    if mismatches:
+        inst = mismatches[0]
+        print(f"❌ Error: 0x{inst:08x} decodes to 0x{decode_control(inst):x}, expected 0x{linear_decode(inst):x}")
+        assert False, "Decode table mismatch"
+
+    for entry in instruction_table:
+        assert control_word(entry) != 0, f"Empty control word for {entry[0]}"
+
+    # ISS 使用的纯 Python 编码表与 instruction_table 逐项一致
+    hardware = [
+        (entry[0], _value(entry[1]), entry[2], entry[3], _value(entry[-1]), _value(entry[-3]) == _value(IF_WB.YES))
+        for entry in instruction_table
+    ]
+    for expected, actual in zip(hardware, ENCODINGS):
+        assert expected == actual, f"isa.ENCODINGS entry {actual} does not match instruction_table {expected}"
+    assert len(hardware) == len(ENCODINGS), "isa.ENCODINGS and instruction_table differ in length"
+
+    print("✅ Decode Table Passed:")
+    print("  - Table lookup matches per-entry matching on all opcode / funct3 / funct7 combinations.")
+    print("  - Table lookup matches per-entry matching on random instruction words.")
+    print("  - isa.ENCODINGS (used by the ISS) matches instruction_table.")
+
+
+# --- Top ---
+if __name__ == "__main__":
+    check()
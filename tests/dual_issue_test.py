@@ -0,0 +1,98 @@
+import sys
+import os
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tests.common import run_test_module
+from src.main import build_cpu
+from src.memory_map import write_word_image
+from src.perf import parse_summary
+from src.trace import parse_commit_lines
+
+
+def r_type(funct7, rs2, rs1, funct3, rd, opcode=0x33):
+    return (funct7 << 25) | (rs2 << 20) | (rs1 << 15) | (funct3 << 12) | (rd << 7) | opcode
+
+def i_type(imm, rs1, funct3, rd, opcode=0x13):
+    return ((imm & 0xFFF) << 20) | (rs1 << 15) | (funct3 << 12) | (rd << 7) | opcode
+
+
+# 测试程序：完整的双发射流水线（哈佛模式）
+#   0x00 / 0x04 无相关，0x10 / 0x14 无相关，应配对发射
+#   0x08 -> 0x0C -> 0x10 依次读上一条的 rd，不能配对，结果经 lane 0 旁路
+#   0x18 读 lane 1（0x14）和 lane 0（0x10）上一拍的结果；0x1C 为停机指令，只能在 lane 0
+PROGRAM = [
+    i_type(5, 0, 0x0, 1),               # 0x00: addi x1, x0, 5
+    i_type(7, 0, 0x0, 2),               # 0x04: addi x2, x0, 7
+    r_type(0x00, 2, 1, 0x0, 3),         # 0x08: add  x3, x1, x2
+    r_type(0x00, 1, 3, 0x0, 4),         # 0x0C: add  x4, x3, x1
+    i_type(1, 4, 0x0, 5),               # 0x10: addi x5, x4, 1
+    r_type(0x20, 1, 2, 0x0, 6),         # 0x14: sub  x6, x2, x1
+    r_type(0x00, 5, 6, 0x0, 7),         # 0x18: add  x7, x6, x5
+    0x00000073,                         # 0x1C: ecall（停机）
+]
+
+# (pc, rd, wdata)
+EXPECTED = [
+    (0x00, 1, 5),
+    (0x04, 2, 7),
+    (0x08, 3, 12),
+    (0x0C, 4, 17),
+    (0x10, 5, 18),
+    (0x14, 6, 2),
+    (0x18, 7, 20),
+    (0x1C, 0, 0),
+]
+
+PAIRED = [(0x00, 0x04), (0x10, 0x14)]
+UNPAIRED = [(0x08, 0x0C), (0x0C, 0x10), (0x18, 0x1C)]
+
+
+# --- Check ---
+def check(output):
+    print(">>> Verifying Dual Issue...")
+    lines = output.split("\n")
+
+    records = list(parse_commit_lines(lines))
+    committed = [(r.pc, r.rd, r.wdata) for r in records]
+    print(f"Commit Records: {[(hex(pc), rd, hex(wdata)) for pc, rd, wdata in committed]}")
+    if committed != EXPECTED:
+        print(f"❌ Error: expected {[(hex(pc), rd, hex(wdata)) for pc, rd, wdata in EXPECTED]}")
+        assert False, "Commit trace mismatch"
+
+    cycle = {r.pc: r.cycle for r in records}
+    for a, b in PAIRED:
+        if cycle[a] != cycle[b]:
+            print(f"❌ Error: 0x{a:x} and 0x{b:x} committed in cycles {cycle[a]} and {cycle[b]}")
+            assert False, "Independent pair was not dual-issued"
+    for a, b in UNPAIRED:
+        if cycle[a] >= cycle[b]:
+            print(f"❌ Error: 0x{b:x} committed together with 0x{a:x}")
+            assert False, "Dependent or halting pair was dual-issued"
+
+    # PERF_SUMMARY 在停机当拍输出，instret 此时还未计入停机指令；配对的周期应计入两条
+    perf = parse_summary(output)
+    assert perf is not None, "No PERF_SUMMARY"
+    halt_cycle = cycle[0x1C]
+    expected_instret = sum(r.cycle < halt_cycle for r in records)
+    if perf["instret"] != expected_instret:
+        print(f"❌ Error: instret={perf['instret']}, expected {expected_instret}")
+        assert False, "instret mismatch"
+
+    print("✅ Dual Issue Passed:")
+    print("  - Results committed in program order.")
+    print("  - Values forwarded from both lanes.")
+    print("  - Independent pair retired in one cycle and counted twice in instret.")
+
+
+# --- Top ---
+if __name__ == "__main__":
+    workspace_dir = tempfile.mkdtemp()
+    # 哈佛模式下数据存储器由 workload.data 初始化，程序不访存，与指令映像相同即可
+    write_word_image(os.path.join(workspace_dir, "workload.exe"), PROGRAM)
+    write_word_image(os.path.join(workspace_dir, "workload.data"), PROGRAM)
+
+    sys = build_cpu(10, harvard=True, dual_issue=True, log_level="trace", workspace_dir=workspace_dir)
+
+    run_test_module(sys, check)
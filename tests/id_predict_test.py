@@ -0,0 +1,74 @@
+import sys
+import os
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tests.common import run_test_module
+from tests.iss_test import i_type, b_type, j_type
+from src.main import build_cpu
+from src.memory_map import write_word_image
+from src.perf import parse_summary
+from src.trace import parse_lines, parse_commit_lines, REDIRECT_TAG
+
+
+# 测试程序：ID 阶段预测（early_jump + static_branch），未启用 BTB
+#   0x08 的 jal 在 ID 直接重定向，不经过 EX 的预测失败
+#   0x18 的 bne 向后跳转，静态预测为跳转：4 次循环中只有最后一次（退出循环）预测失败
+#   不启用 ID 阶段预测时 jal 与前 3 次跳转都会预测失败（共 4 次）
+LOOPS = 4
+PROGRAM = [
+    i_type(LOOPS, 0, 0x0, 1, 0x13),     # 0x00: addi x1, x0, 4
+    i_type(0, 0, 0x0, 2, 0x13),         # 0x04: addi x2, x0, 0
+    j_type(8, 0),                       # 0x08: j    0x10
+    i_type(100, 2, 0x0, 2, 0x13),       # 0x0C: addi x2, x2, 100（被跳过）
+    i_type(3, 2, 0x0, 2, 0x13),         # 0x10: addi x2, x2, 3
+    i_type(-1, 1, 0x0, 1, 0x13),        # 0x14: addi x1, x1, -1
+    b_type(-8, 0, 1, 0x1),              # 0x18: bne  x1, x0, 0x10
+    0x00000073,                         # 0x1C: ecall（停机）
+]
+
+# (pc, rd, wdata)
+EXPECTED = [(0x00, 1, LOOPS), (0x04, 2, 0), (0x08, 0, 0)]
+for i in range(LOOPS):
+    EXPECTED += [(0x10, 2, 3 * (i + 1)), (0x14, 1, LOOPS - 1 - i), (0x18, 0, 0)]
+EXPECTED += [(0x1C, 0, 0)]
+
+
+# --- Check ---
+def check(output):
+    print(">>> Verifying ID-stage jal redirect and static branch prediction...")
+    lines = output.split("\n")
+
+    committed = [(r.pc, r.rd, r.wdata) for r in parse_commit_lines(lines)]
+    print(f"Commit Records: {[(hex(pc), rd, hex(wdata)) for pc, rd, wdata in committed]}")
+    if committed != EXPECTED:
+        print(f"❌ Error: expected {[(hex(pc), rd, hex(wdata)) for pc, rd, wdata in EXPECTED]}")
+        assert False, "Commit trace mismatch"
+
+    # EX 只在退出循环时重定向一次
+    redirects = [(r.pc, r.replay) for r in parse_lines(lines, (REDIRECT_TAG,))]
+    print(f"Redirects: {[(hex(pc), replay) for pc, replay in redirects]}")
+    if redirects != [(0x18, 0)]:
+        print("❌ Error: expected a single EX redirect at the loop exit (0x18).")
+        assert False, "Unexpected EX redirects"
+
+    perf = parse_summary(output)
+    assert perf is not None, "No PERF_SUMMARY"
+    if perf["branch_mispredict"] != 1:
+        print(f"❌ Error: branch_mispredict={perf['branch_mispredict']}, expected 1 (baseline: {LOOPS})")
+        assert False, "ID-stage prediction did not remove mispredicts"
+
+    print("✅ ID-stage Prediction Passed:")
+    print("  - jal redirected in ID without an EX mispredict.")
+    print("  - Backward branch predicted taken; only the loop exit mispredicts.")
+
+
+# --- Top ---
+if __name__ == "__main__":
+    workspace_dir = tempfile.mkdtemp()
+    write_word_image(os.path.join(workspace_dir, "workload.exe"), PROGRAM)
+
+    sys = build_cpu(10, early_jump=True, static_branch=True, log_level="trace", workspace_dir=workspace_dir)
+
+    run_test_module(sys, check)
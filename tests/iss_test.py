@@ -0,0 +1,94 @@
+import sys
+import os
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.iss import ISS, load_image, commit_writes
+from src.trace import TRACE_FORMAT, parse_commit_lines, first_mismatch
+
+
+def r_type(funct7, rs2, rs1, funct3, rd, opcode=0x33):
+    return (funct7 << 25) | (rs2 << 20) | (rs1 << 15) | (funct3 << 12) | (rd << 7) | opcode
+
+def i_type(imm, rs1, funct3, rd, opcode):
+    return ((imm & 0xFFF) << 20) | (rs1 << 15) | (funct3 << 12) | (rd << 7) | opcode
+
+def s_type(imm, rs2, rs1, funct3):
+    return ((imm >> 5) << 25) | (rs2 << 20) | (rs1 << 15) | (funct3 << 12) | ((imm & 0x1F) << 7) | 0x23
+
+def b_type(imm, rs2, rs1, funct3):
+    return (((imm >> 12) & 1) << 31) | (((imm >> 5) & 0x3F) << 25) | (rs2 << 20) | (rs1 << 15) \
+        | (funct3 << 12) | (((imm >> 1) & 0xF) << 8) | (((imm >> 11) & 1) << 7) | 0x63
+
+def j_type(imm, rd):
+    return (((imm >> 20) & 1) << 31) | (((imm >> 1) & 0x3FF) << 21) | (((imm >> 11) & 1) << 20) \
+        | (((imm >> 12) & 0xFF) << 12) | (rd << 7) | 0x6F
+
+
+PROGRAM = [
+    i_type(7, 0, 0x0, 1, 0x13),         #  0: addi x1, x0, 7
+    i_type(-3, 0, 0x0, 2, 0x13),        #  4: addi x2, x0, -3
+    r_type(0x01, 2, 1, 0x0, 3),         #  8: mul  x3, x1, x2
+    r_type(0x01, 1, 2, 0x4, 4),         # 12: div  x4, x2, x1
+    s_type(64, 3, 0, 0x2),              # 16: sw   x3, 64(x0)
+    i_type(64, 0, 0x0, 5, 0x03),        # 20: lb   x5, 64(x0)
+    b_type(8, 3, 5, 0x1),               # 24: bne  x5, x3, 8（不跳转）
+    j_type(8, 6),                       # 28: jal  x6, 8
+    i_type(1, 0, 0x0, 7, 0x13),         # 32: addi x7, x0, 1（被跳过）
+    0x00100073,                         # 36: ebreak
+]
+
+EXPECTED_TRACE = [
+    (0, 1, 7),
+    (4, 2, 0xFFFFFFFD),
+    (8, 3, 0xFFFFFFEB),
+    (12, 4, 0),
+    (20, 5, 0xFFFFFFEB),
+    (28, 6, 32),
+]
+
+
+def commit_log(writes):
+    # 按 WriteBack 的 COMMIT 格式生成日志行，前面加上后端输出的前缀
+    return [
+        "@line:42 [WriteBack] " + TRACE_FORMAT.format(i, pc, 0, rd, value, 0)
+        for i, (pc, rd, value) in enumerate(writes)
+    ]
+
+
+# --- Check ---
+def check(iss, trace):
+    print(">>> Verifying ISS...")
+    print(f"Captured: {trace}")
+    print(f"Expected: {EXPECTED_TRACE}")
+
+    assert iss.halted, "ISS did not halt"
+    assert iss.pc == 36, "Halt PC mismatch"
+    assert iss.instret == 8, "Retired instruction count mismatch"
+    assert trace == EXPECTED_TRACE, "Trace mismatch"
+    assert iss.regs[7] == 0, "Skipped instruction was executed"
+
+    # 与 CPU 提交记录比对：混入不写寄存器的提交（rd=0），第三条写回被篡改
+    log = commit_log([(pc, rd, value) for pc, rd, value in trace] + [(36, 0, 0)])
+    assert first_mismatch(trace, commit_writes(parse_commit_lines(log))) is None, "Identical traces reported as divergent"
+    bad = [(pc, rd, 0 if i == 2 else value) for i, (pc, rd, value) in enumerate(trace)]
+    observed = commit_writes(parse_commit_lines(commit_log(bad)))
+    assert first_mismatch(trace, observed) == (2, EXPECTED_TRACE[2], (8, 3, 0)), "Divergence not located"
+    short = commit_writes(parse_commit_lines(commit_log(trace[:-1])))
+    assert first_mismatch(trace, short) == (5, EXPECTED_TRACE[5], None), "Missing commit not reported"
+
+    print("✅ ISS Passed:")
+    print("  - ALU / RV32M / load / store / branch / jal semantics verified.")
+    print("  - Commit trace divergence detection verified.")
+
+
+# --- Top ---
+if __name__ == "__main__":
+    init_path = os.path.join(tempfile.gettempdir(), "iss_test.exe")
+    with open(init_path, "w") as f:
+        for word in PROGRAM:
+            f.write(f"{word:08x}\n")
+
+    iss = ISS(load_image(init_path, depth_log=8), depth_log=8)
+    check(iss, iss.run())
@@ -0,0 +1,68 @@
+import sys
+import os
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from tests.common import run_test_module
+from tests.iss_test import i_type, s_type
+from src.main import build_cpu
+from src.memory_map import write_word_image
+from src.perf import parse_summary
+from src.trace import parse_commit_lines
+
+
+# 测试程序：哈佛模式的 load-use stall
+#   0x08 的 lw 后面紧跟与它无关的指令，不应 stall
+#   0x10 的 lw 后面紧跟读它 rd 的指令，应 stall 恰好一拍，数据从 MEM 旁路
+PROGRAM = [
+    i_type(7, 0, 0x0, 1, 0x13),         # 0x00: addi x1, x0, 7
+    s_type(64, 1, 0, 0x2),              # 0x04: sw   x1, 64(x0)
+    i_type(64, 0, 0x2, 2, 0x03),        # 0x08: lw   x2, 64(x0)
+    i_type(1, 0, 0x0, 3, 0x13),         # 0x0C: addi x3, x0, 1（与 x2 无关）
+    i_type(64, 0, 0x2, 4, 0x03),        # 0x10: lw   x4, 64(x0)
+    i_type(1, 4, 0x0, 5, 0x13),         # 0x14: addi x5, x4, 1（load-use）
+    0x00000073,                         # 0x18: ecall（停机）
+]
+
+# (pc, rd, wdata)
+EXPECTED = [
+    (0x00, 1, 7),
+    (0x04, 0, 0),
+    (0x08, 2, 7),
+    (0x0C, 3, 1),
+    (0x10, 4, 7),
+    (0x14, 5, 8),
+    (0x18, 0, 0),
+]
+
+
+# --- Check ---
+def check(output):
+    print(">>> Verifying Harvard load-use stall...")
+    committed = [(r.pc, r.rd, r.wdata) for r in parse_commit_lines(output.split("\n"))]
+    print(f"Commit Records: {[(hex(pc), rd, hex(wdata)) for pc, rd, wdata in committed]}")
+    if committed != EXPECTED:
+        print(f"❌ Error: expected {[(hex(pc), rd, hex(wdata)) for pc, rd, wdata in EXPECTED]}")
+        assert False, "Commit trace mismatch"
+
+    perf = parse_summary(output)
+    assert perf is not None, "No PERF_SUMMARY"
+    if perf["stall_load"] != 1:
+        print(f"❌ Error: stall_load={perf['stall_load']}, expected 1")
+        assert False, "Load-use stall count mismatch"
+
+    print("✅ Load-Use Stall Passed:")
+    print("  - Dependent load-use pair stalled exactly one cycle and got the loaded value.")
+    print("  - Independent instruction after a load did not stall.")
+
+
+# --- Top ---
+if __name__ == "__main__":
+    workspace_dir = tempfile.mkdtemp()
+    write_word_image(os.path.join(workspace_dir, "workload.exe"), PROGRAM)
+    write_word_image(os.path.join(workspace_dir, "workload.data"), [0] * 32)
+
+    sys = build_cpu(10, harvard=True, log_level="trace", workspace_dir=workspace_dir)
+
+    run_test_module(sys, check)
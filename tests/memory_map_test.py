@@ -0,0 +1,112 @@
+import sys
+import os
+import tempfile
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.memory_map import MemoryMap, read_word_image, write_word_image
+from src.main import load_test_case
+from src.iss import ISS, load_image
+from tests.iss_test import i_type, s_type
+from tests.elf_loader_test import make_elf, PT_LOAD
+
+
+# 链接到 0x80000000 的程序：从数据存储器读一个字，经栈（SP=0x1000）存取后加 1
+PROGRAM = [
+    i_type(4, 0, 0x2, 1, 0x03),             # lw   x1, 4(x0)（数据映像中的 0x1234）
+    (0x1 << 12) | (2 << 7) | 0x37,          # lui  x2, 0x1
+    s_type(-4 & 0xFFF, 1, 2, 0x2),          # sw   x1, -4(x2)
+    i_type(-4, 2, 0x2, 3, 0x03),            # lw   x3, -4(x2)
+    i_type(1, 3, 0x0, 4, 0x13),             # addi x4, x3, 1
+    0x00100073,                             # ebreak
+]
+DATA = [0x00000000, 0x00001234]
+STACK = [(0xF00, 0x100)]
+BASE = 0x80000000
+
+EXPECTED_REGIONS = [[0x0, 0x100], [0xF00, 0x100], [BASE, 0x100]]
+EXPECTED_TRACE = [
+    (BASE + 0x0, 1, 0x1234),
+    (BASE + 0x4, 2, 0x1000),
+    (BASE + 0xC, 3, 0x1234),
+    (BASE + 0x10, 4, 0x1235),
+]
+
+
+def raises(fn, *args, **kwargs):
+    try:
+        fn(*args, **kwargs)
+    except ValueError as e:
+        return str(e)
+    return None
+
+
+def check_layout():
+    # 重叠 / 相邻区间合并，按基址排序后依次占用 SRAM 下标
+    m = MemoryMap([(0x1000, 4), (0x104, 8), (0x100, 6)])
+    assert m.regions == [(0x100, 3, 0), (0x1000, 1, 3)], f"Bad regions {m.regions}"
+    assert (m.words, m.depth_log) == (4, 2), "Bad size"
+    assert [m.index(a) for a in (0x100, 0x108, 0x10B, 0x1000, 0x10C, 0x0, 0x1004)] == [0, 2, 2, 3, None, None, None]
+    assert m.to_json() == [[0x100, 12], [0x1000, 4]], "Bad to_json"
+
+    dense = MemoryMap.dense_map(4)
+    assert dense.index(0x44) == 1 and dense.index(0x40) == 0, "Dense map does not wrap"
+
+    m = MemoryMap.from_segments([(0x1010, b"\x01" * 8)], granule=0x100, extra=STACK)
+    assert m.to_json() == [[0xF00, 0x200]], "from_segments did not round to granule / merge extra"
+
+    # pack：区间之间的空隙不占空间，超出区间的字节被裁掉
+    m = MemoryMap([(0x0, 8), (0x100, 4)])
+    packed = m.pack({0x4: b"\x11\x22\x33\x44", 0x100: b"\x55\x66\x77\x88\x99"})
+    assert list(packed) == [0, 0x44332211, 0x88776655], f"Bad pack {[hex(w) for w in packed]}"
+
+
+def check_load(src, work):
+    with open(os.path.join(src, "prog.elf"), "wb") as f:
+        code = b"".join(word.to_bytes(4, "little") for word in PROGRAM)
+        f.write(make_elf([(PT_LOAD, BASE, code, len(code))]))
+    write_word_image(os.path.join(src, "prog.data"), DATA)
+
+    # 稠密布局容不下 0x80000000 的映像；auto 必须给出栈区间
+    assert "dense" in (raises(load_test_case, "prog", source_subdir=src, workspace_dir=work) or ""), \
+        "Sparse image accepted in dense mode"
+    assert "extra_regions" in (raises(
+        load_test_case, "prog", source_subdir=src, workspace_dir=work, mem_regions="auto"
+    ) or ""), "auto map accepted without a stack region"
+
+    regions = load_test_case("prog", source_subdir=src, workspace_dir=work, mem_regions="auto", extra_regions=STACK)
+    print(f"Regions: {[(hex(b), hex(s)) for b, s in regions]}")
+    assert regions == EXPECTED_REGIONS, "auto regions mismatch"
+
+    m = MemoryMap(regions)
+    code = load_image(os.path.join(work, "workload.exe"), mem_map=m)
+    data = load_image(os.path.join(work, "workload.data"), mem_map=m)
+    assert len(read_word_image(os.path.join(work, "workload.exe"))) == m.words * 4, "Image size mismatch"
+    assert [code[m.index(BASE + 4 * i)] for i in range(len(PROGRAM))] == PROGRAM, "Program not at its ELF address"
+    assert code[m.index(4)] == 0 and data[m.index(4)] == DATA[1], "Data image not separate from program image"
+
+    # ISS 使用与 CPU 相同的两块映像与地址翻译
+    iss = ISS(code, pc=BASE, data_mem=data, mem_map=m)
+    trace = iss.run()
+    print(f"ISS trace: {[(hex(pc), rd, hex(v)) for pc, rd, v in trace]}")
+    assert iss.halted and trace == EXPECTED_TRACE, "ISS trace mismatch"
+    assert data[m.index(0xFFC)] == 0x1234 and code[m.index(0xFFC)] == 0, "Store did not go to the data image"
+
+    stray = ISS(code, pc=0x2000, data_mem=data, mem_map=m)
+    assert "Unmapped" in (raises(stray.run) or ""), "Unmapped fetch not reported"
+
+
+# --- Check ---
+def check(src, work):
+    print(">>> Verifying memory map and image loading...")
+    check_layout()
+    check_load(src, work)
+    print("✅ Memory Map Passed:")
+    print("  - Region merge, translation, from_segments and pack verified.")
+    print("  - ELF + word-format data loaded into separate sparse images; ISS runs on them.")
+
+
+# --- Top ---
+if __name__ == "__main__":
+    with tempfile.TemporaryDirectory() as src, tempfile.TemporaryDirectory() as work:
+        check(src, work)
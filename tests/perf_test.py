@@ -0,0 +1,101 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from assassyn.frontend import *
+from tests.common import run_test_module
+from src.perf import PerfCounters, CSR_CYCLE, CSR_INSTRET, CSR_HPMCOUNTER3, CSR_HIGH_OFFSET, HPM_EVENTS
+
+NUM_CYCLES = 10
+CSR_LOAD = CSR_HPMCOUNTER3 + HPM_EVENTS.index("load")
+
+
+# --- Driver ---
+class Driver(Module):
+    def __init__(self):
+        super().__init__(ports={})
+
+    @module.combinational
+    def build(self, dut: Module, perf: PerfCounters):
+        cnt = RegArray(UInt(32), 1, initializer=[0])
+        (cnt & self)[0] <= cnt[0] + UInt(32)(1)
+        idx = cnt[0]
+
+        perf.tick()
+
+        with Condition(idx < UInt(32)(NUM_CYCLES)):
+            call = dut.async_called(idx=idx.bitcast(Bits(32)), is_load=idx.bitcast(Bits(32))[0:0])
+
+        with Condition(idx >= UInt(32)(NUM_CYCLES + 2)):
+            log("Driver: All vectors applied. Finishing simulation.")
+            finish()
+
+
+# --- Harness ---
+class PerfHarness(Module):
+    def __init__(self):
+        super().__init__(
+            ports={
+                "idx": Port(Bits(32)),
+                "is_load": Port(Bits(1)),
+            }
+        )
+
+    @module.combinational
+    def build(self, perf: PerfCounters):
+        idx, is_load = self.pop_all_ports(True)
+        # 读出的是本周期开始时的值，本周期的计数下一周期可见
+        log(
+            "PERF_TEST: idx={} cycle={} instret={} loads={} cycleh={}",
+            idx,
+            perf.read(Bits(12)(CSR_CYCLE)),
+            perf.read(Bits(12)(CSR_INSTRET)),
+            perf.read(Bits(12)(CSR_LOAD)),
+            perf.read(Bits(12)(CSR_CYCLE + CSR_HIGH_OFFSET)),
+        )
+        perf.retire(idx.bitcast(UInt(32)) < UInt(32)(4))
+        perf.count("load", is_load == Bits(1)(1))
+
+
+# --- Check ---
+def check(output):
+    print(">>> Verifying Performance Counters...")
+    captured = []
+    for line in output.split("\n"):
+        if "PERF_TEST: idx=" in line:
+            fields = dict(kv.split("=") for kv in line.split("PERF_TEST: ")[1].split())
+            captured.append(tuple(int(fields[k]) for k in ("idx", "cycle", "instret", "loads", "cycleh")))
+
+    # Driver 在第 i 周期调用，Harness 在第 i+1 周期执行
+    expected = [(i, i + 1, min(i, 4), i // 2, 0) for i in range(NUM_CYCLES)]
+
+    print(f"Captured: {captured}")
+    print(f"Expected: {expected}")
+
+    if len(captured) != len(expected):
+        print(f"❌ Error: Expected {len(expected)} samples, got {len(captured)}.")
+        assert False, "Sample count mismatch"
+
+    for exp, act in zip(expected, captured):
+        if exp != act:
+            print(f"❌ Mismatch: expected {exp}, got {act}")
+            assert False, "Counter mismatch"
+
+    print("✅ Performance Counters Passed:")
+    print("  - cycle / instret / hpmcounter reads verified.")
+
+
+# --- Top ---
+if __name__ == "__main__":
+    sys = SysBuilder("test_perf")
+    with sys:
+        perf = PerfCounters()
+
+        harness = PerfHarness()
+        driver = Driver()
+
+        harness.build(perf)
+        driver.build(harness, perf)
+
+    run_test_module(sys, check)
@@ -0,0 +1,65 @@
+import sys
+import os
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.trace import TRACE_FORMAT, PIPE_FORMAT, CommitRecord, parse_lines, parse_commit_lines, first_mismatch
+
+
+# (cycle, pc, inst, rd, wdata, mem_addr)
+COMMITS = [
+    (5, 0x0, 0x00500093, 1, 5, 0),
+    (6, 0x4, 0x00102023, 0, 0, 0x0),
+    (7, 0x8, 0x00002103, 2, 5, 0x0),
+]
+
+
+def log_lines(commits, prefix="@line:42 [WriteBack] "):
+    # 与后端输出相同：提交记录前带有前缀，中间夹着其他日志
+    lines = []
+    for i, record in enumerate(commits):
+        lines.append(prefix + PIPE_FORMAT.format(i, record[1], 0, 0))
+        lines.append(prefix + TRACE_FORMAT.format(*record))
+    lines.append("PERF_SUMMARY: cycles=9 instret=3")
+    return lines
+
+
+def streamed(lines, consumed):
+    # 逐行产出并记录读到了第几行，用来确认比对在第一处不一致时停下
+    for line in lines:
+        consumed.append(line)
+        yield line
+
+
+# --- Check ---
+def check():
+    print(">>> Verifying commit trace parsing and comparison...")
+    expected = [CommitRecord(*record) for record in COMMITS]
+    records = list(parse_commit_lines(log_lines(COMMITS)))
+    assert records == expected, f"Bad commit records {records}"
+    assert len(list(parse_lines(log_lines(COMMITS)))) == 2 * len(COMMITS), "PIPE records not parsed"
+
+    assert first_mismatch(iter(expected), parse_commit_lines(log_lines(COMMITS))) is None, \
+        "Identical traces reported as divergent"
+
+    # 数值不一致：报告序号与两边的记录，且不再继续读取后面的行
+    bad = [COMMITS[0], COMMITS[1][:4] + (1,) + COMMITS[1][5:], COMMITS[2]]
+    consumed = []
+    mismatch = first_mismatch(parse_commit_lines(log_lines(COMMITS)), parse_commit_lines(streamed(log_lines(bad), consumed)))
+    assert mismatch == (1, expected[1], CommitRecord(*bad[1])), f"Value mismatch not located: {mismatch}"
+    assert len(consumed) == 4, f"Comparison read past the mismatch ({len(consumed)} lines)"
+
+    # 长度不一致：较短一方以 None 补齐（zip_longest 的尾部）
+    mismatch = first_mismatch(iter(expected), parse_commit_lines(log_lines(COMMITS[:2])))
+    assert mismatch == (2, expected[2], None), f"Missing commit not reported: {mismatch}"
+    mismatch = first_mismatch(parse_commit_lines(log_lines(COMMITS[:1])), iter(expected))
+    assert mismatch == (1, None, expected[1]), f"Extra commit not reported: {mismatch}"
+
+    print("✅ Trace Passed:")
+    print("  - COMMIT / PIPE records parsed from prefixed log lines.")
+    print("  - first_mismatch stops at a value mismatch and reports length mismatches.")
+
+
+# --- Top ---
+if __name__ == "__main__":
+    check()
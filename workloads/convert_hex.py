@@ -1,6 +1,6 @@
 #!/usr/bin/env python3
 """
-将 verilog hex format 转换为纯十六进制格式
+将 verilog hex format 或 RISC-V ELF32 可执行文件转换为纯十六进制格式
 
 输入格式 (verilog hex format):
 @00000000
@@ -8,6 +8,8 @@
 @00001000
 ...
 
+或 ELF32 小端 RISC-V 可执行文件（按 PT_LOAD 段的物理地址装入，.bss 部分补零）
+
 输出格式 (纯十六进制):
 37010200
 ef100004
@@ -15,138 +17,157 @@ ef100004
 ...
 """
 
+import os
 import sys
-import re
+import struct
+from array import array
 from pathlib import Path
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.memory_map import MemoryMap, write_word_image
+
+ELF_MAGIC = b"\x7fELF"
+EM_RISCV = 0xF3
+PT_LOAD = 1
+
 
 def parse_verilog_hex(filepath):
     """
     解析 verilog hex format 文件
-    
-    返回: dict {address: [bytes]}
+
+    返回: dict {address: bytes}
     """
     data = {}
     current_addr = None
-    current_bytes = []
-    
+    current_lines = []
+
+    def flush():
+        if current_addr is not None and current_lines:
+            # 整段一次性转换，避免逐字节 int()
+            try:
+                data[current_addr] = bytes.fromhex("".join(current_lines))
+            except ValueError as e:
+                raise ValueError(f"{filepath}: bad hex data in segment @{current_addr:08x}: {e}") from None
+
     with open(filepath, 'r') as f:
         for line in f:
-            line = line.strip()
-            
+            # "//" 之后为注释，去掉注释与首尾空白
+            line = line.split("//", 1)[0].strip()
+
             # 空行跳过
             if not line:
                 continue
-            
+
             # 地址标记 @xxxxxxxx
             if line.startswith('@'):
-                # 保存之前的地址段
-                if current_addr is not None and current_bytes:
-                    data[current_addr] = current_bytes
-                
-                # 解析新地址
-                addr_str = line[1:]
-                current_addr = int(addr_str, 16)
-                current_bytes = []
+                flush()
+                current_addr = int(line[1:], 16)
+                current_lines = []
             else:
-                # 数据行：空格分隔的字节
-                bytes_list = line.split()
-                for b in bytes_list:
-                    current_bytes.append(int(b, 16))
-        
-        # 保存最后一个地址段
-        if current_addr is not None and current_bytes:
-            data[current_addr] = current_bytes
-    
+                # 数据行：空白（空格 / 制表符）分隔的字节
+                current_lines.append("".join(line.split()))
+
+    flush()
     return data
 
 
-def merge_to_flat_memory(data):
+def parse_elf(filepath):
     """
-    将分段数据合并为平坦的内存映像
-    
-    返回: dict {address: byte}
+    解析 ELF32 小端 RISC-V 可执行文件的 PT_LOAD 段
+
+    返回: dict {address: bytes}
     """
-    memory = {}
-    
-    for addr, bytes_list in data.items():
-        for i, byte_val in enumerate(bytes_list):
-            memory[addr + i] = byte_val
-    
-    return memory
+    with open(filepath, 'rb') as f:
+        elf = f.read()
+
+    if elf[:4] != ELF_MAGIC or elf[4] != 1 or elf[5] != 1:
+        raise ValueError(f"{filepath}: not a little-endian ELF32 file")
+    e_machine, = struct.unpack_from("<H", elf, 18)
+    if e_machine != EM_RISCV:
+        raise ValueError(f"{filepath}: not a RISC-V executable (e_machine=0x{e_machine:x})")
+
+    e_phoff, = struct.unpack_from("<I", elf, 28)
+    e_phentsize, e_phnum = struct.unpack_from("<HH", elf, 42)
+
+    data = {}
+    for i in range(e_phnum):
+        p_type, p_offset, p_vaddr, p_paddr, p_filesz, p_memsz = struct.unpack_from(
+            "<IIIIII", elf, e_phoff + i * e_phentsize
+        )
+        if p_type != PT_LOAD or p_memsz == 0:
+            continue
+        # memsz 超出 filesz 的部分（.bss）补零
+        data[p_paddr] = elf[p_offset:p_offset + p_filesz] + bytes(p_memsz - p_filesz)
+    return data
 
 
-def convert_to_hex_format(memory):
+def load_segments(filepath):
     """
-    将内存映像转换为纯十六进制格式
-    
-    返回: list of (address, word32)
+    按文件内容自动识别 ELF 或 verilog hex
+
+    返回: dict {address: bytes}
     """
-    # 找到最小和最大地址
-    if not memory:
-        return []
-    
-    min_addr = min(memory.keys())
-    max_addr = max(memory.keys())
-    
-    # 按字对齐（4字节）
-    min_addr = min_addr & ~0x3
-    max_addr = (max_addr + 3) & ~0x3
-    
-    # 生成32位字列表
-    words = []
-    for addr in range(min_addr, max_addr, 4):
-        # 小端序：低字节在低地址
-        word = 0
-        for i in range(4):
-            byte_addr = addr + i
-            if byte_addr in memory:
-                word |= (memory[byte_addr] & 0xFF) << (i * 8)
-        words.append((addr, word))
-    
-    return words
-
-
-def write_hex_format(output_path, words):
+    with open(filepath, 'rb') as f:
+        magic = f.read(4)
+    if magic == ELF_MAGIC:
+        return parse_elf(filepath)
+    return parse_verilog_hex(filepath)
+
+
+def build_image(data, depth_log=16):
     """
-    写入纯十六进制格式文件
+    按稠密布局（.exe 格式）把分段数据排布为从地址 0 开始的 32 位字序列，每段放在自己的地址上，段之间的空隙为 0
+
+    映像必须落在 2^depth_log 字的稠密 SRAM 以内，否则报错：链接到高地址（如 0x80000000）或段之间相距很远的程序
+    不能转换为 .exe，应把 ELF 直接交给 load_test_case(mem_regions="auto")，按 MemoryMap 紧凑排布
+
+    返回: array('I')
     """
-    with open(output_path, 'w') as f:
-        for addr, word in words:
-            # 格式：xxxxxxxx // address: 0x...
-            f.write(f"{word:08x}\n")
+    if not data:
+        return array('I')
+
+    end = max(addr + len(seg) for addr, seg in data.items())
+    if end > 4 << depth_log:
+        lo, hi = min(data), max(data)
+        raise ValueError(
+            f"segments span 0x{lo:08x}..0x{end:08x} (highest segment at 0x{hi:08x}), beyond the dense "
+            f"{4 << depth_log}-byte SRAM of a .exe image; load the ELF with load_test_case(mem_regions=\"auto\") instead"
+        )
+    return MemoryMap([(0, end)]).pack(data)
 
 
 def main():
     if len(sys.argv) < 2:
         print("用法: python convert_hex.py <input_file> [output_file]")
         print("示例: python convert_hex.py array_test1.data array_test1.exe")
+        print("      python convert_hex.py program.elf program.exe")
         sys.exit(1)
-    
+
     input_file = sys.argv[1]
-    
+
     # 默认输出文件名：将 .data 改为 .exe
     if len(sys.argv) >= 3:
         output_file = sys.argv[2]
     else:
         input_path = Path(input_file)
         output_file = str(input_path.with_suffix('.exe'))
-    
+
     # 解析输入文件
     print(f"读取输入文件: {input_file}")
-    data = parse_verilog_hex(input_file)
+    data = load_segments(input_file)
     print(f"找到 {len(data)} 个地址段")
-    
-    # 合并为平坦内存
-    memory = merge_to_flat_memory(data)
-    print(f"总字节数: {len(memory)}")
-    
-    # 转换为32位字格式
-    words = convert_to_hex_format(memory)
-    print(f"生成 {len(words)} 个32位字")
-    
+
+    # 按地址排布为从 0 开始的32位字
+    try:
+        words = build_image(data)
+    except ValueError as e:
+        print(f"错误: {e}")
+        sys.exit(1)
+    print(f"生成 {len(words)} 个32位字（地址 0x00000000..0x{4 * len(words):08x}）")
+
     # 写入输出文件
-    write_hex_format(output_file, words)
+    write_word_image(output_file, words)
     print(f"输出文件: {output_file}")
     print("转换完成!")
 